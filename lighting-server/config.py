@@ -1,6 +1,8 @@
 # lighting control passthough (halcyon and xim)
 # Ben Hussey - Sept 16
 
+import json
+
 # Halcyon Rooms
 ROOMS = {
     2: "Lounge",
@@ -63,3 +65,21 @@ STATES = {
         ]
     },
 }
+
+# Flattened per-state plans, built once at import so a state change only
+# walks a tuple of ready-made request bodies
+# XIM_PLAN[state] = ((device, level, device path, json body), ...)
+XIM_PLAN = {
+    state: tuple((device, level, str(device), json.dumps({"intensity": level}))
+                 for devices, level in value["xim_levels"]
+                 for device in devices)
+    for state, value in STATES.items()
+}
+
+# HALCYON_PLAN[state] = ((room, level, json body), ...)
+HALCYON_PLAN = {
+    state: tuple((room, level,
+                  json.dumps({"roomId": room, "luminanceTarget": level}))
+                 for room, level in value["halcyon_levels"].items())
+    for state, value in STATES.items()
+}
@@ -1,19 +1,53 @@
 # lighting control passthough (halcyon and xim)
 # Ben Hussey - Sept 16
 
+from concurrent.futures import ThreadPoolExecutor
+
+import time
+
 import requests
-from config import STATES
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import HALCYON_PLAN
 
 DEVICE = "http://10.0.0.60/"
 AUTH = ('admin', 'gup1t1m3')
+TIMEOUT = 2
+JSON_HEADERS = {'Content-Type': 'application/json'}
+CACHE_TTL = 60.0 # resend unchanged levels after this long (seconds)
+
+# single keep-alive session, the halcyon controller is one host
+SESSION = requests.Session()
+SESSION.auth = AUTH
+SESSION.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=16,
+              max_retries=Retry(total=2, backoff_factor=0.1)))
+POOL = ThreadPoolExecutor(max_workers=4)
+
+# last level sent to each room, {room: (level, time)}
+_last_halcyon = {}
+
+def halcyon_refresh():
+    _last_halcyon.clear()
 
 def halcyon_level(room, level):
+    _last_halcyon.pop(room, None)
     data={"roomId": room, "luminanceTarget": level,}
-    return requests.get(DEVICE + 'api/rooms/luminanceTarget',
-                        auth=AUTH, data=data).content
+    return SESSION.get(DEVICE + 'api/rooms/luminanceTarget',
+                       data=data, timeout=TIMEOUT).content
+
+def _post_room(step):
+    room, level, body = step
+    last = _last_halcyon.get(room)
+    if last and last[0] == level and time.time() - last[1] < CACHE_TTL:
+        return None
+    response = SESSION.post(DEVICE + 'api/rooms/luminanceTarget', data=body,
+                            headers=JSON_HEADERS, timeout=TIMEOUT)
+    if response.ok:
+        _last_halcyon[room] = (level, time.time())
+    return response.content
 
 def halcyon_state(state):
-    for room, level in STATES[state]["halcyon_levels"].items():
-        data={"roomId": room, "luminanceTarget": level,}
-        print requests.post(DEVICE + 'api/rooms/luminanceTarget',
-                     auth=AUTH, json=data).content
+    # rooms are independent, send them all at once
+    for content in POOL.map(_post_room, HALCYON_PLAN[state]):
+        if content is not None:
+            print(content)
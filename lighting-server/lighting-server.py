@@ -1,26 +1,83 @@
 # lighting control passthough (halcyon and xim)
 # Ben Hussey - Sept 16
 
-from bottle import route, run, HTTPError
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import traceback
+
+from bottle import route, run, HTTPError, HTTPResponse
 
 from config import STATES, ROOMS
-from halcyon import halcyon_state, halcyon_level
-from xim import xim_state
+from halcyon import halcyon_state, halcyon_level, halcyon_refresh
+from xim import xim_state, xim_refresh
+
+POOL = ThreadPoolExecutor(max_workers=2)
+
+# latest requested state, only the newest is applied if requests pile up
+_pending_state = None
+_pending_lock = threading.Lock()
+_pending_event = threading.Event()
+
+def apply_state(state):
+    # halcyon and xim are separate systems, drive both at the same time
+    halcyon = POOL.submit(halcyon_state, state)
+    xim = POOL.submit(xim_state, state)
+    halcyon.result()
+    xim.result()
+
+def queue_state(state):
+    global _pending_state
+    with _pending_lock:
+        _pending_state = state
+        _pending_event.set()
+
+def state_worker():
+    global _pending_state
+    while True:
+        _pending_event.wait()
+        with _pending_lock:
+            state = _pending_state
+            _pending_state = None
+            _pending_event.clear()
+        try:
+            apply_state(state)
+        except Exception:
+            traceback.print_exc()
+
+worker = threading.Thread(target=state_worker)
+worker.daemon = True
+worker.start()
 
 @route('/level/<room>/<level>/')
 def level(room, level):
-    if int(room) not in ROOMS:
-        return HTTPError(404, "Page not found")
-    if 0 > int(level) or int(level) > 100:
+    try:
+        room, level = int(room), int(level)
+    except ValueError:
+        return HTTPError(400, "Bad request")
+    if room not in ROOMS or not 0 <= level <= 100:
         return HTTPError(404, "Page not found")
-    return halcyon_level(int(room), int(level))
+    return halcyon_level(room, level)
 
 
 @route('/state/<state>/')
+@route('/scene/<state>/')
 def state(state):
-    if int(state) not in STATES:
+    try:
+        state = int(state)
+    except ValueError:
+        return HTTPError(400, "Bad request")
+    if state not in STATES:
         return HTTPError(404, "Page not found")
-    halcyon_state(int(state))
-    xim_state(int(state))
+    # queue the state change and return straight away
+    queue_state(state)
+    return HTTPResponse(status=202)
+
+
+@route('/refresh/')
+def refresh():
+    # forget the cached levels so the next state is sent in full
+    halcyon_refresh()
+    xim_refresh()
 
-run(host='0.0.0.0', port=8000, debug=True, threaded=True)
+# picks waitress (or another production server) when one is installed
+run(host='0.0.0.0', port=8000, server='auto')
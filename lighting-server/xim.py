@@ -1,19 +1,85 @@
 # lighting control passthough (halcyon and xim)
 # Ben Hussey - Sept 16
 
+import json
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-from config import STATES
+from config import XIM_PLAN
 
 GATEWAY = "http://10.0.0.10:9000/"
+TIMEOUT = 2
+JSON_HEADERS = {'Content-Type': 'application/json'}
+CACHE_TTL = 60.0 # resend unchanged levels after this long (seconds)
+
+# every device the gateway drives, used to spot scenes that can be broadcast
+ALL_DEVICES = set(step[0] for plan in XIM_PLAN.values() for step in plan)
+
+# single keep-alive session, the xim gateway is one host
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=16,
+              max_retries=Retry(total=2, backoff_factor=0.1)))
+
+# last level sent to each device, {device: (level, time)}
+_last_xim = {}
+
+def xim_refresh():
+    _last_xim.clear()
+
+def _is_current(device, level):
+    last = _last_xim.get(device)
+    return last and last[0] == level and time.time() - last[1] < CACHE_TTL
 
 def xim_level(device, level):
+    _last_xim.pop(int(device), None)
     data={"intensity": level,}
-    return requests.get(GATEWAY + 'devices/' + device, data=data).content
+    return SESSION.get(GATEWAY + 'devices/' + device, data=data,
+                       timeout=TIMEOUT).content
+
+def _post_device(step):
+    device, level, path, body = step
+    response = SESSION.post(GATEWAY + 'devices/' + path, data=body,
+                            headers=JSON_HEADERS, timeout=TIMEOUT)
+    if response.ok:
+        _last_xim[device] = (level, time.time())
+    return response.content
+
+def xim_all(level):
+    data={"intensity": level,}
+    response = SESSION.post(GATEWAY + 'devices', json=data, timeout=TIMEOUT)
+    if response.ok:
+        now = time.time()
+        for device in ALL_DEVICES:
+            _last_xim[device] = (level, now)
+    return response.content
+
+def xim_levels(steps):
+    body = json.dumps({"levels": [{"device": step[0], "intensity": step[1]}
+                                  for step in steps]})
+    response = SESSION.post(GATEWAY + 'devices', data=body,
+                            headers=JSON_HEADERS, timeout=TIMEOUT)
+    if response.ok:
+        # only remember the devices the gateway accepted
+        now = time.time()
+        for accepted in response.json().get("levels", []):
+            if "device" in accepted:
+                _last_xim[accepted["device"]] = (accepted["intensity"], now)
+    return response.content
 
 def xim_state(state):
-    for group in STATES[state]["xim_levels"]:
-        data={"intensity": group[1],}
-        for device in group[0]:
-            requests.post(GATEWAY + 'devices/' + str(device), json=data).content
-            #time.sleep(0.1)
+    plan = XIM_PLAN[state]
+    if all(_is_current(step[0], step[1]) for step in plan):
+        return
+    # the whole installation at one level is a single broadcast on the gateway
+    if (len(set(step[1] for step in plan)) == 1 and
+            set(step[0] for step in plan) == ALL_DEVICES):
+        xim_all(plan[0][1])
+        return
+    changed = [step for step in plan if not _is_current(step[0], step[1])]
+    if len(changed) == 1:
+        _post_device(changed[0])
+    else:
+        # every changed device in one request rather than one each
+        xim_levels(changed)
@@ -3,6 +3,29 @@
 Library for printing messages to a file and the console
 
 Xicato Changelog:
+    V2.7 2026-10-15
+        - printDebug writes bytes and bytearray arguments as lists of ints,
+            so callers don't have to convert them before the debug check
+    V2.6 2026-10-15
+        - Added printDebug, which only formats and writes the message when
+            debug messages are enabled with EnableDebug
+    V2.5 2026-10-15
+        - The write buffer size can be set per log and EnableFlushTimer
+            flushes the buffer from a background thread every interval
+            instead of every LOG_FLUSH_COUNT messages
+    V2.4 2026-10-15
+        - Keeps the log file open with a buffered handle instead of opening
+            it for every message. The buffer is flushed every
+            LOG_FLUSH_COUNT messages, on console prints and by Close()
+        - The existing log files are sorted once after the directory is
+            listed, instead of with an insertion scan per file
+        - Uses os.scandir to list the directory, so each file is only
+            stat'ed once
+        - RenameSafely uses an atomic os.replace instead of removing the old
+            file and spinning until it is gone
+        - Ported to Python 3
+        - Counts the lines as they are written, so CleanLog no longer reads
+            the whole file back to check its length
     V2.3 2016-06-24
         - Added exception handling when the file is in use
     V2.2 2015-12-20
@@ -51,10 +74,14 @@ SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import os
 from os import remove, rename
 import time, datetime
+import threading
+from os import scandir
 
+LOG_BUFFER_SIZE = 8192
+LOG_FLUSH_COUNT = 100
 
 class LogHandler(object):
-    def __init__(self, directory, fileName, hasTimeStamp = False, maxFiles = 0):
+    def __init__(self, directory, fileName, hasTimeStamp = False, maxFiles = 0, bufferSize = LOG_BUFFER_SIZE):
 
         self.directory = directory
         self.maxFiles = maxFiles
@@ -65,6 +92,18 @@ class LogHandler(object):
         self.cleanInterval = None
         self.maxLines = None
 
+        self.debugEnabled = True
+
+        self.logFile = None
+        self.bufferSize = bufferSize
+        self.unflushedLines = 0
+        self.lineCount = 0
+
+        # Guards logFile when the flush timer is running
+        self.fileLock = threading.RLock()
+        self.flushInterval = None
+        self.flushTimerStop = threading.Event()
+
         if not os.path.exists(directory):
             os.makedirs(directory)
 
@@ -84,18 +123,10 @@ class LogHandler(object):
         #   know which device to remove first.
         self.fileTimeList = []
         if(maxFiles > 0):
-            for name in os.listdir(directory):
-                fullName = os.path.join(directory, name)
-                if (os.path.isfile(fullName) and (name[:len(fileName)] == fileName)):
-                    newTime = os.path.getmtime(fullName)
-
-                    insertIndex = 0
-                    for fileTime in self.fileTimeList:
-                        if(newTime < fileTime[1]):
-                            break
-                        insertIndex += 1
-
-                    self.fileTimeList.insert(insertIndex, [fullName, newTime])
+            for entry in scandir(directory):
+                if (entry.name[:len(fileName)] == fileName and entry.is_file()):
+                    self.fileTimeList.append([entry.path, entry.stat().st_mtime])
+            self.fileTimeList.sort(key=lambda fileTime: fileTime[1])
 
         # Create the new file and remove any old files
         self.CreateLogFile()
@@ -104,27 +135,32 @@ class LogHandler(object):
     # Creates a new log file, based on the arguments provided when the
     #   LogHandler object was created
     def CreateLogFile(self):
-
-        suffix = self.fileNameExtension
-        if(self.hasTimeStamp):
-            self.fullFileName = "{0}_{1}{2}".format(os.path.join(self.directory, self.fileNamePrefix), datetime.datetime.now().strftime("%Y_%m_%d_%H-%M-%S"), suffix)
-        else:
-            self.fullFileName = "{0}{1}".format(os.path.join(self.directory, self.fileNamePrefix), suffix)
-
-        if(os.path.isfile(self.fullFileName)):
-            i = 1
-            while(1):
-                testFileName = "{0}_{1}{2}".format(self.fullFileName[:-4], i, self.fullFileName[-4:])
-                if(os.path.isfile(testFileName) == False):
-                    os.rename(self.fullFileName, testFileName)
-                    break
-                i += 1
-
-        with open(self.fullFileName, 'w') as f:
-            pass
-
-        newTime = os.path.getctime(self.fullFileName)
-        self.fileTimeList.append([self.fullFileName, newTime])
+        with self.fileLock:
+            if(self.logFile):
+                self.logFile.close()
+                self.logFile = None
+
+            suffix = self.fileNameExtension
+            if(self.hasTimeStamp):
+                self.fullFileName = "{0}_{1}{2}".format(os.path.join(self.directory, self.fileNamePrefix), datetime.datetime.now().strftime("%Y_%m_%d_%H-%M-%S"), suffix)
+            else:
+                self.fullFileName = "{0}{1}".format(os.path.join(self.directory, self.fileNamePrefix), suffix)
+
+            if(os.path.isfile(self.fullFileName)):
+                i = 1
+                while(1):
+                    testFileName = "{0}_{1}{2}".format(self.fullFileName[:-4], i, self.fullFileName[-4:])
+                    if(os.path.isfile(testFileName) == False):
+                        os.rename(self.fullFileName, testFileName)
+                        break
+                    i += 1
+
+            self.logFile = open(self.fullFileName, 'w', self.bufferSize)
+            self.unflushedLines = 0
+            self.lineCount = 0
+
+            newTime = os.path.getctime(self.fullFileName)
+            self.fileTimeList.append([self.fullFileName, newTime])
 
     # Removes old files based on when they were created.
     # The directory will store up to self.maxFiles
@@ -157,49 +193,86 @@ class LogHandler(object):
     #    created and any old files (more than self.maxFiles) are removed
     def CleanLog(self):
         self.lastCleanUp = time.time()
-        tempFileName = self.fullFileName.split('.')[0] + ".tmp"
-        lines = []
 
-        try:
-            with open(self.fullFileName) as f:
-                lines = f.readlines()
-
-            if(self.maxLines and len(lines) > self.maxLines):
-                print("Starting a new file")
-                self.CreateLogFile()
-                self.RemoveOldFiles()
-        except IOError:
-            if(os.path.isfile(self.fullFileName) == False):
-                with open(tempFileName, 'w') as f:
-                    pass
+        if(self.maxLines and self.lineCount > self.maxLines):
+            print("Starting a new file")
+            self.CreateLogFile()
+            self.RemoveOldFiles()
+
+    # Flushes the buffered messages every interval (in seconds) from a
+    #   background thread, instead of after every LOG_FLUSH_COUNT messages
+    def EnableFlushTimer(self, interval):
+        isRunning = (self.flushInterval != None)
+        self.flushInterval = interval
+        if(not isRunning):
+            thread = threading.Thread(target=self.FlushPeriodically, name='log-flush')
+            thread.daemon = True
+            thread.start()
+
+    def FlushPeriodically(self):
+        while not self.flushTimerStop.wait(self.flushInterval):
+            self.Flush()
+
+    # Writes any buffered messages to the file
+    def Flush(self):
+        with self.fileLock:
+            try:
+                if(self.logFile):
+                    self.logFile.flush()
+            except (IOError, ValueError):
+                pass
+            self.unflushedLines = 0
+
+    # Flushes and closes the log file. Called on shutdown
+    def Close(self):
+        self.flushTimerStop.set()
+        with self.fileLock:
+            if(self.logFile):
+                self.logFile.close()
+                self.logFile = None
+
+    def __del__(self):
+        self.Close()
 
     # Renames the file and reports an error if there's an exception
     def RenameSafely(self, newFileName, oldFileName):
         try:
-            attempts = 0
-            while(attempts < 3 and os.path.isfile(oldFileName) and os.path.isfile(newFileName)):
-                remove(oldFileName)
-                attempts += 1
-                start_time = time.time()
-                while(os.path.isfile(oldFileName) and (time.time() - start_time < 0.2)):
-                    pass
-            if(os.path.isfile(oldFileName) == False and os.path.isfile(newFileName)):
-                rename(newFileName, oldFileName)
-        except IOError:
+            os.replace(newFileName, oldFileName)
+        except OSError:
             self.printLog("Error when renaming {0} to {1}".format(newFileName, oldFileName), True)
             if(os.path.isfile(oldFileName) == False):
                 self.printLog("{0} is missing. Will create a blank file".format(oldFileName), True)
                 with open(oldFileName, 'w') as f:
                     pass
 
+    # Enables or disables the messages written by printDebug
+    def EnableDebug(self, isEnabled):
+        self.debugEnabled = isEnabled
+
+    # Writes a debug message to the file. The message is only formatted
+    #   (message.format(*args)) when debug messages are enabled, so callers
+    #   can pass large packets without converting them first. bytes and
+    #   bytearray arguments are written as lists of ints, like the packets
+    #   that are kept as lists
+    def printDebug(self, message, *args):
+        if(self.debugEnabled):
+            args = [list(arg) if isinstance(arg, (bytes, bytearray)) else arg for arg in args]
+            self.printLog(message.format(*args))
+
     # Writes the message to a file and if enabled, prints to the console
     #   message: the string to be written
     #   consolePrint: When True, the message will be printed to the console
     def printLog(self, message, consolePrint = False):
         try:
-            with open(self.fullFileName, 'a') as f:
-                f.write(message + "\n")
-        except IOError:
+            with self.fileLock:
+                if(self.logFile == None):
+                    self.logFile = open(self.fullFileName, 'a', self.bufferSize)
+                self.logFile.write(message + "\n")
+                self.unflushedLines += 1
+                self.lineCount += message.count("\n") + 1
+                if(consolePrint or (self.flushInterval == None and self.unflushedLines >= LOG_FLUSH_COUNT)):
+                    self.Flush()
+        except (IOError, ValueError):
             pass
 
         if(consolePrint):
@@ -35,6 +35,21 @@ V1.2.4
 - For the SetIntensity function's deviceId parameter, changed the broadcast value
     from None to ximGateway.DEMO_ID_ALL_DEVICES (-1)
 
+V1.2.6l
+- Ported to Python 3
+- ximGateway.Run is driven by one long-lived worker thread that waits
+    POOL_TIME on a stop event between runs, instead of re-creating a
+    threading.Timer every cycle
+- Removed the console printout of every JSON response
+- Serves the app with waitress when it is installed, falling back to
+    Flask's built-in development server
+- POST to /devices accepts a levels list, so several devices can be set to
+    different intensities with one request
+- Uses orjson for the JSON responses when it is installed
+- Between runs the worker sleeps in ximGateway.WaitForActivity for up to
+    IDLE_POOL_TIME and wakes when serial data arrives or a command is queued.
+    Runs are still at least POOL_TIME apart
+
 Unless otherwise stated, the XimWebServer is updated to match the ximGateway
 version number
 """
@@ -53,6 +68,20 @@ import sys
 
 import ximGateway, cfg
 
+# orjson is optional. When it is installed, jsonify and request.get_json use it
+try:
+    import orjson
+    from flask.json.provider import JSONProvider
+
+    class OrJsonProvider(JSONProvider):
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+except ImportError:
+    OrJsonProvider = None
+
 
 ##try:
 ##    # The typical way to import flask-cors
@@ -67,6 +96,7 @@ import ximGateway, cfg
 
 
 POOL_TIME = 0.01 #Seconds
+IDLE_POOL_TIME = 0.05 #Seconds, longest sleep between runs when there is no activity
 
 # variables that are accessible from anywhere
 commonDataStruct = {}
@@ -78,6 +108,9 @@ dataLock = threading.Lock()
 yourThread = threading.Thread()
 yourThread.daemon = True
 
+# set to stop the worker thread
+stopEvent = threading.Event()
+
 threadStarted = False
 
 def create_app():
@@ -85,26 +118,25 @@ def create_app():
 
     app = Flask(__name__)
 #    cors = CORS(app)
+    if(OrJsonProvider):
+        app.json = OrJsonProvider(app)
 
     def interrupt():
-        global yourThread
-        yourThread.cancel()
+        stopEvent.set()
+        ximGateway.SignalActivity()
 
     def doStuff():
         global commonDataStruct
-        global yourThread
-        with dataLock:
-            # Do your stuff with commonDataStruct Here
-            ximGateway.Run()
-
-        # Set the next thread to happen
-        try:
-            yourThread = threading.Timer(POOL_TIME, doStuff, ())
-            yourThread.daemon = True
-            yourThread.start()
-        except KeyboardInterrupt:
-            print("Ctrl-c pressed ...")
-            sys.exit(1)
+        while not stopEvent.is_set():
+            runStart = time.time()
+            with dataLock:
+                # Do your stuff with commonDataStruct Here
+                ximGateway.Run()
+
+            # Wait for serial data, a queued command or the idle timeout, then
+            #   keep runs at least POOL_TIME apart
+            if(ximGateway.WaitForActivity(IDLE_POOL_TIME)):
+                stopEvent.wait(max(0, POOL_TIME - (time.time() - runStart)))
 
     def doStuffStart():
         # Do initialisation stuff here
@@ -115,7 +147,8 @@ def create_app():
         # Create your thread
         if(threadStarted == False):
             try:
-                yourThread = threading.Timer(POOL_TIME, doStuff, ()) #this is where doStuff is launched the first time
+                yourThread = threading.Thread(target=doStuff) #this is where doStuff is launched
+                yourThread.daemon = True
                 yourThread.start()
                 threadStarted = True
             except KeyboardInterrupt:
@@ -124,7 +157,7 @@ def create_app():
 
     # Initiate
     doStuffStart()
-    # When you kill Flask (SIGTERM), clear the trigger for the next thread
+    # When you kill Flask (SIGTERM), stop the worker thread
     atexit.register(interrupt)
     return app
 
@@ -151,6 +184,27 @@ def ximAllDevices():
 
             except IOError:
                 responseData = {'error':'Invalid value for intensity: {0}. Must be a number'.format(data['intensity'])}
+
+        # Several device intensities in one request:
+        #   {"levels": [{"device": DeviceId, "intensity": intensity}, ...]}
+        elif(data and 'levels' in data):
+            responseData = {'levels': []}
+            for deviceLevel in data['levels']:
+                try:
+                    deviceId = int(deviceLevel['device'])
+                    intensity = float(deviceLevel['intensity'])
+                except (KeyError, TypeError, ValueError):
+                    responseData['levels'].append({'error':'Invalid level: {0}. Needs a device and intensity number'.format(deviceLevel)})
+                    continue
+
+                if(ximGateway.IsValidDeviceByIndex(deviceId)):
+                    ximGateway.SetIntensity(deviceId, intensity)
+                    responseData['levels'].append({'device': deviceId, 'intensity': intensity})
+                else:
+                    responseData['levels'].append({'error':'Device {0} not found'.format(deviceId)})
+
+        else:
+            responseData = {'error':'Needs JSON packet with intensity or levels field.'}
     else:
 #        DeviceList = ximGateway.ximList()
 #        for ListIndex in DeviceList:
@@ -159,9 +213,7 @@ def ximAllDevices():
     ##    print("\ndata: {0}\n".format(responseData))
 
     # Reply as a JSON packet
-    jData = jsonify(responseData)
-    print("\njData: {0}\n".format(jData))
-    return jData
+    return jsonify(responseData)
 
 # Device-specific XIM
 @app.route('/devices/<int:DeviceId>', methods=['GET', 'POST'])
@@ -176,7 +228,6 @@ def ximDeviceSpecific(DeviceId):
 
                 try:
                     intensity = float(data['intensity'])
-#                    print("Received intensity: {0}".format(intensity))
 
                     ximGateway.SetIntensity(DeviceId, intensity)
                     responseData = ximGateway.ReadRealTimeData(DeviceId)
@@ -202,9 +253,7 @@ def ximDeviceSpecific(DeviceId):
         responseData = {'error':'Device {0} not found'.format(DeviceId)}
 
     # Reply as a JSON packet
-    jData = jsonify(responseData)
-    print("\njData: {0}\n".format(jData))
-    return jData
+    return jsonify(responseData)
 
 # Device-specific XIM History
 @app.route('/device/<int:deviceNumber>/history', methods=['GET'])
@@ -218,9 +267,7 @@ def ximDeviceSpecificHistory(deviceNumber):
         responseData = {'error':'Device {0} not found'.format(deviceNumber)}
 
     # Reply as a JSON packet
-    jData = jsonify(responseData)
-    print("\njData: {0}\n".format(jData))
-    return jData
+    return jsonify(responseData)
 
 # Indicate function
 @app.route('/device/indicate/<int:DeviceId>', methods=['GET', 'POST'])
@@ -234,13 +281,13 @@ def ximDeviceIndicate(DeviceId):
         responseData = {'error':'Device {0} not found'.format(DeviceId)}
 
     # Reply as a JSON packet
-    jData = jsonify(responseData)
-    print("\njData: {0}\n".format(jData))
-    return jData
+    return jsonify(responseData)
 
 def ctrl_c_handler(signal, frame):
-    ximGateway.Close()
-    yourThread.cancel()
+    stopEvent.set()
+    ximGateway.SignalActivity()
+    with dataLock:
+        ximGateway.Close()
     print('Goodbye!')
     sys.exit(0)
 
@@ -269,5 +316,10 @@ if __name__ == '__main__':
 
     sys.excepthook = myExceptHook
 
-    app.run(host='0.0.0.0', port=9000, debug=True, threaded=True)
+    try:
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=9000, threads=8, connection_limit=200)
+    except ImportError:
+        # Flask's built-in server is only suitable for development
+        app.run(host='0.0.0.0', port=9000, debug=True, threaded=True)
 
@@ -42,31 +42,48 @@ GENERATOR_NONCE = [0x8F, 0x43, 0xBB, 0x26, 0x86, 0x7E, 0x4E, 0x6A, 0x71, 0x0B, 0
 
 bleNetworkList = []
 
+# Credentials already derived, keyed by (networkName, networkPassword)
+networkCredentialCache = {}
+
+# Repeats text until it is at least length characters long. Longer text is
+#   returned unchanged
+def RepeatToLength(text, length):
+    if(0 < len(text) < length):
+        text = (text * (length // len(text) + 1))[:length]
+    return text
+
 # Creates the network credentials based on the strings networkName and networkPassword
 def CreateNetworkCredentials(networkName, networkPassword):
-    networkId, mic = ble_xim.AesCcmEncrypt(NETWORK_ID_GENERATOR_KEY, GENERATOR_NONCE, map(ord,list(networkName)))
+    # The keys only depend on the name and password, so skip the AES
+    #   operations when they have already been derived
+    cacheKey = (networkName, networkPassword)
+    if(cacheKey in networkCredentialCache):
+        bleNetworkList.append(dict(networkCredentialCache[cacheKey]))
+        return
+
+    networkId, mic = ble_xim.AesCcmEncrypt(NETWORK_ID_GENERATOR_KEY, GENERATOR_NONCE, list(networkName.encode('utf-8')))
     networkId = networkId[:4]
 
     # Repeat the string until it fills 16 characters
-    while(len(networkPassword) < 16):
-        networkPassword += networkPassword[:max(0, 16 - len(networkPassword))]
+    networkPassword = RepeatToLength(networkPassword, 16)
+    passwordBytes = list(networkPassword.encode('utf-8'))
 
-    txNetworkKey, mic = ble_xim.AesCcmEncrypt(TXKEY_GENERATOR_KEY, GENERATOR_NONCE, map(ord,list(networkPassword)))
+    txNetworkKey, mic = ble_xim.AesCcmEncrypt(TXKEY_GENERATOR_KEY, GENERATOR_NONCE, passwordBytes)
     txNetworkKey = txNetworkKey[:16]
 
-    rxNetworkKey, mic = ble_xim.AesCcmEncrypt(RXKEY_GENERATOR_KEY, GENERATOR_NONCE, map(ord,list(networkPassword)))
+    rxNetworkKey, mic = ble_xim.AesCcmEncrypt(RXKEY_GENERATOR_KEY, GENERATOR_NONCE, passwordBytes)
     rxNetworkKey = rxNetworkKey[:16]
 
-    networkHeaderInput = networkName
-    while(len(networkHeaderInput) < 16):
-        networkHeaderInput += networkName[:max(0, 16 - len(networkHeaderInput))]
-    networkHeaderKey, mic = ble_xim.AesCcmEncrypt(NETWORK_HEADER_KEY_GENERATOR_KEY, GENERATOR_NONCE, map(ord,list(networkHeaderInput)))
+    networkHeaderInput = RepeatToLength(networkName, 16)
+    networkHeaderKey, mic = ble_xim.AesCcmEncrypt(NETWORK_HEADER_KEY_GENERATOR_KEY, GENERATOR_NONCE, list(networkHeaderInput.encode('utf-8')))
 
-    print "networkId: {0}".format(networkId)
-    print "networkPassword: {0}".format(networkPassword)
-    print "networkHeaderInput: {0}".format(networkHeaderInput)
-    print "txNetworkKey: {0}, rxNetworkKey: {1}, networkHeaderKey: {2}".format(txNetworkKey, rxNetworkKey, networkHeaderKey)
-    bleNetworkList.append({'name': networkName, 'netId': networkId, 'txKey': txNetworkKey, 'rxKey': rxNetworkKey, 'headerKey': networkHeaderKey})
+    print("networkId: {0}".format(networkId))
+    print("networkPassword: {0}".format(networkPassword))
+    print("networkHeaderInput: {0}".format(networkHeaderInput))
+    print("txNetworkKey: {0}, rxNetworkKey: {1}, networkHeaderKey: {2}".format(txNetworkKey, rxNetworkKey, networkHeaderKey))
+    networkInfo = {'name': networkName, 'netId': networkId, 'txKey': txNetworkKey, 'rxKey': rxNetworkKey, 'headerKey': networkHeaderKey}
+    networkCredentialCache[cacheKey] = networkInfo
+    bleNetworkList.append(dict(networkInfo))
 
 
 # Sets the local network credentials
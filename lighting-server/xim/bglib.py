@@ -3,6 +3,18 @@
 """ Bluegiga BGAPI/BGLib implementation
 
 Xicato Changelog:
+	2026-10-15 - The packet payload is copied out of bgapi_rx_buffer once,
+	             through a memoryview, and byte array fields are converted
+	             straight to lists instead of going through bytearray
+	2026-10-15 - The reader thread sets rx_event (when one is assigned) as
+	             data is queued, so callers can sleep until input arrives
+	2026-10-15 - bgapi_rx_buffer is a preallocated bytearray filled up to
+	             bgapi_rx_length instead of a list that is rebuilt per packet
+	2026-10-15 - Serial input is read by a background thread into a queue.
+	             check_activity parses queued chunks instead of polling the
+	             port one byte at a time
+	2026-10-15 - Ported to Python 3. Byte strings are built and parsed with
+	             bytes/bytearray instead of chr/ord
 	2015-05-10 - Added rxgain configuration support
 	2015-02-25 - Clears rx_buffer and rx_expected_length when there's a timeout
                - Error checks bgapi_rx_payload length for ble_rsp_system_address_get
@@ -70,7 +82,12 @@ THE SOFTWARE.
 
 """
 
+import queue
 import struct
+import threading
+
+# 4 header bytes plus up to 2047 bytes of payload (11-bit length)
+BGAPI_MAX_PACKET_LENGTH = 4 + 2047
 
 # thanks to Masaaki Shibata for Python event handler code
 # http://www.emptypage.jp/notes/pyevent.en.html
@@ -145,6 +162,9 @@ class BGAPIEventHandler(object):
 
 class BGLib(object):
 
+    def __init__(self):
+        self.bgapi_rx_buffer = bytearray(BGAPI_MAX_PACKET_LENGTH)
+
     def ble_cmd_system_reset(self, boot_in_dfu):
         return struct.pack('<4BB', 0, 1, 0, 0, boot_in_dfu)
     def ble_cmd_system_hello(self):
@@ -164,11 +184,11 @@ class BGLib(object):
     def ble_cmd_system_get_info(self):
         return struct.pack('<4B', 0, 0, 0, 8)
     def ble_cmd_system_endpoint_tx(self, endpoint, data):
-        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 0, 9, endpoint, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 0, 9, endpoint, len(data), bytes(bytearray(data)))
     def ble_cmd_system_whitelist_append(self, address, address_type):
-        return struct.pack('<4B6sB', 0, 7, 0, 10, b''.join(chr(i) for i in address), address_type)
+        return struct.pack('<4B6sB', 0, 7, 0, 10, bytes(bytearray(address)), address_type)
     def ble_cmd_system_whitelist_remove(self, address, address_type):
-        return struct.pack('<4B6sB', 0, 7, 0, 11, b''.join(chr(i) for i in address), address_type)
+        return struct.pack('<4B6sB', 0, 7, 0, 11, bytes(bytearray(address)), address_type)
     def ble_cmd_system_whitelist_clear(self):
         return struct.pack('<4B', 0, 0, 0, 12)
     def ble_cmd_system_endpoint_rx(self, endpoint, size):
@@ -182,7 +202,7 @@ class BGLib(object):
     def ble_cmd_flash_ps_erase_all(self):
         return struct.pack('<4B', 0, 0, 1, 2)
     def ble_cmd_flash_ps_save(self, key, value):
-        return struct.pack('<4BHB' + str(len(value)) + 's', 0, 3 + len(value), 1, 3, key, len(value), b''.join(chr(i) for i in value))
+        return struct.pack('<4BHB' + str(len(value)) + 's', 0, 3 + len(value), 1, 3, key, len(value), bytes(bytearray(value)))
     def ble_cmd_flash_ps_load(self, key):
         return struct.pack('<4BH', 0, 2, 1, 4, key)
     def ble_cmd_flash_ps_erase(self, key):
@@ -190,15 +210,15 @@ class BGLib(object):
     def ble_cmd_flash_erase_page(self, page):
         return struct.pack('<4BB', 0, 1, 1, 6, page)
     def ble_cmd_flash_write_words(self, address, words):
-        return struct.pack('<4BHB' + str(len(words)) + 's', 0, 3 + len(words), 1, 7, address, len(words), b''.join(chr(i) for i in words))
+        return struct.pack('<4BHB' + str(len(words)) + 's', 0, 3 + len(words), 1, 7, address, len(words), bytes(bytearray(words)))
     def ble_cmd_attributes_write(self, handle, offset, value):
-        return struct.pack('<4BHBB' + str(len(value)) + 's', 0, 4 + len(value), 2, 0, handle, offset, len(value), b''.join(chr(i) for i in value))
+        return struct.pack('<4BHBB' + str(len(value)) + 's', 0, 4 + len(value), 2, 0, handle, offset, len(value), bytes(bytearray(value)))
     def ble_cmd_attributes_read(self, handle, offset):
         return struct.pack('<4BHH', 0, 4, 2, 1, handle, offset)
     def ble_cmd_attributes_read_type(self, handle):
         return struct.pack('<4BH', 0, 2, 2, 2, handle)
     def ble_cmd_attributes_user_read_response(self, connection, att_error, value):
-        return struct.pack('<4BBBB' + str(len(value)) + 's', 0, 3 + len(value), 2, 3, connection, att_error, len(value), b''.join(chr(i) for i in value))
+        return struct.pack('<4BBBB' + str(len(value)) + 's', 0, 3 + len(value), 2, 3, connection, att_error, len(value), bytes(bytearray(value)))
     def ble_cmd_attributes_user_write_response(self, connection, att_error):
         return struct.pack('<4BBB', 0, 2, 2, 4, connection, att_error)
     def ble_cmd_connection_disconnect(self, connection):
@@ -212,37 +232,37 @@ class BGLib(object):
     def ble_cmd_connection_channel_map_get(self, connection):
         return struct.pack('<4BB', 0, 1, 3, 4, connection)
     def ble_cmd_connection_channel_map_set(self, connection, map):
-        return struct.pack('<4BBB' + str(len(map)) + 's', 0, 2 + len(map), 3, 5, connection, len(map), b''.join(chr(i) for i in map))
+        return struct.pack('<4BBB' + str(len(map)) + 's', 0, 2 + len(map), 3, 5, connection, len(map), bytes(bytearray(map)))
     def ble_cmd_connection_features_get(self, connection):
         return struct.pack('<4BB', 0, 1, 3, 6, connection)
     def ble_cmd_connection_get_status(self, connection):
         return struct.pack('<4BB', 0, 1, 3, 7, connection)
     def ble_cmd_connection_raw_tx(self, connection, data):
-        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 3, 8, connection, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 3, 8, connection, len(data), bytes(bytearray(data)))
     def ble_cmd_attclient_find_by_type_value(self, connection, start, end, uuid, value):
-        return struct.pack('<4BBHHHB' + str(len(value)) + 's', 0, 8 + len(value), 4, 0, connection, start, end, uuid, len(value), b''.join(chr(i) for i in value))
+        return struct.pack('<4BBHHHB' + str(len(value)) + 's', 0, 8 + len(value), 4, 0, connection, start, end, uuid, len(value), bytes(bytearray(value)))
     def ble_cmd_attclient_read_by_group_type(self, connection, start, end, uuid):
-        return struct.pack('<4BBHHB' + str(len(uuid)) + 's', 0, 6 + len(uuid), 4, 1, connection, start, end, len(uuid), b''.join(chr(i) for i in uuid))
+        return struct.pack('<4BBHHB' + str(len(uuid)) + 's', 0, 6 + len(uuid), 4, 1, connection, start, end, len(uuid), bytes(bytearray(uuid)))
     def ble_cmd_attclient_read_by_type(self, connection, start, end, uuid):
-        return struct.pack('<4BBHHB' + str(len(uuid)) + 's', 0, 6 + len(uuid), 4, 2, connection, start, end, len(uuid), b''.join(chr(i) for i in uuid))
+        return struct.pack('<4BBHHB' + str(len(uuid)) + 's', 0, 6 + len(uuid), 4, 2, connection, start, end, len(uuid), bytes(bytearray(uuid)))
     def ble_cmd_attclient_find_information(self, connection, start, end):
         return struct.pack('<4BBHH', 0, 5, 4, 3, connection, start, end)
     def ble_cmd_attclient_read_by_handle(self, connection, chrhandle):
         return struct.pack('<4BBH', 0, 3, 4, 4, connection, chrhandle)
     def ble_cmd_attclient_attribute_write(self, connection, atthandle, data):
-        return struct.pack('<4BBHB' + str(len(data)) + 's', 0, 4 + len(data), 4, 5, connection, atthandle, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBHB' + str(len(data)) + 's', 0, 4 + len(data), 4, 5, connection, atthandle, len(data), bytes(bytearray(data)))
     def ble_cmd_attclient_write_command(self, connection, atthandle, data):
-        return struct.pack('<4BBHB' + str(len(data)) + 's', 0, 4 + len(data), 4, 6, connection, atthandle, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBHB' + str(len(data)) + 's', 0, 4 + len(data), 4, 6, connection, atthandle, len(data), bytes(bytearray(data)))
     def ble_cmd_attclient_indicate_confirm(self, connection):
         return struct.pack('<4BB', 0, 1, 4, 7, connection)
     def ble_cmd_attclient_read_long(self, connection, chrhandle):
         return struct.pack('<4BBH', 0, 3, 4, 8, connection, chrhandle)
     def ble_cmd_attclient_prepare_write(self, connection, atthandle, offset, data):
-        return struct.pack('<4BBHHB' + str(len(data)) + 's', 0, 6 + len(data), 4, 9, connection, atthandle, offset, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBHHB' + str(len(data)) + 's', 0, 6 + len(data), 4, 9, connection, atthandle, offset, len(data), bytes(bytearray(data)))
     def ble_cmd_attclient_execute_write(self, connection, commit):
         return struct.pack('<4BBB', 0, 2, 4, 10, connection, commit)
     def ble_cmd_attclient_read_multiple(self, connection, handles):
-        return struct.pack('<4BBB' + str(len(handles)) + 's', 0, 2 + len(handles), 4, 11, connection, len(handles), b''.join(chr(i) for i in handles))
+        return struct.pack('<4BBB' + str(len(handles)) + 's', 0, 2 + len(handles), 4, 11, connection, len(handles), bytes(bytearray(handles)))
     def ble_cmd_sm_encrypt_start(self, handle, bonding):
         return struct.pack('<4BBB', 0, 2, 5, 0, handle, bonding)
     def ble_cmd_sm_set_bondable_mode(self, bondable):
@@ -256,7 +276,7 @@ class BGLib(object):
     def ble_cmd_sm_get_bonds(self):
         return struct.pack('<4B', 0, 0, 5, 5)
     def ble_cmd_sm_set_oob_data(self, oob):
-        return struct.pack('<4BB' + str(len(oob)) + 's', 0, 1 + len(oob), 5, 6, len(oob), b''.join(chr(i) for i in oob))
+        return struct.pack('<4BB' + str(len(oob)) + 's', 0, 1 + len(oob), 5, 6, len(oob), bytes(bytearray(oob)))
     def ble_cmd_gap_set_privacy_flags(self, peripheral_privacy, central_privacy):
         return struct.pack('<4BBB', 0, 2, 6, 0, peripheral_privacy, central_privacy)
     def ble_cmd_gap_set_mode(self, discover, connect):
@@ -264,7 +284,7 @@ class BGLib(object):
     def ble_cmd_gap_discover(self, mode):
         return struct.pack('<4BB', 0, 1, 6, 2, mode)
     def ble_cmd_gap_connect_direct(self, address, addr_type, conn_interval_min, conn_interval_max, timeout, latency):
-        return struct.pack('<4B6sBHHHH', 0, 15, 6, 3, b''.join(chr(i) for i in address), addr_type, conn_interval_min, conn_interval_max, timeout, latency)
+        return struct.pack('<4B6sBHHHH', 0, 15, 6, 3, bytes(bytearray(address)), addr_type, conn_interval_min, conn_interval_max, timeout, latency)
     def ble_cmd_gap_end_procedure(self):
         return struct.pack('<4B', 0, 0, 6, 4)
     def ble_cmd_gap_connect_selective(self, conn_interval_min, conn_interval_max, timeout, latency):
@@ -276,9 +296,9 @@ class BGLib(object):
     def ble_cmd_gap_set_adv_parameters(self, adv_interval_min, adv_interval_max, adv_channels):
         return struct.pack('<4BHHB', 0, 5, 6, 8, adv_interval_min, adv_interval_max, adv_channels)
     def ble_cmd_gap_set_adv_data(self, set_scanrsp, adv_data):
-        return struct.pack('<4BBB' + str(len(adv_data)) + 's', 0, 2 + len(adv_data), 6, 9, set_scanrsp, len(adv_data), b''.join(chr(i) for i in adv_data))
+        return struct.pack('<4BBB' + str(len(adv_data)) + 's', 0, 2 + len(adv_data), 6, 9, set_scanrsp, len(adv_data), bytes(bytearray(adv_data)))
     def ble_cmd_gap_set_directed_connectable_mode(self, address, addr_type):
-        return struct.pack('<4B6sB', 0, 7, 6, 10, b''.join(chr(i) for i in address), addr_type)
+        return struct.pack('<4B6sB', 0, 7, 6, 10, bytes(bytearray(address)), addr_type)
     def ble_cmd_hardware_io_port_config_irq(self, port, enable_bits, falling_edge):
         return struct.pack('<4BBBB', 0, 3, 7, 0, port, enable_bits, falling_edge)
     def ble_cmd_hardware_set_soft_timer(self, time, handle, single_shot):
@@ -298,11 +318,11 @@ class BGLib(object):
     def ble_cmd_hardware_spi_config(self, channel, polarity, phase, bit_order, baud_e, baud_m):
         return struct.pack('<4BBBBBBB', 0, 6, 7, 8, channel, polarity, phase, bit_order, baud_e, baud_m)
     def ble_cmd_hardware_spi_transfer(self, channel, data):
-        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 7, 9, channel, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 7, 9, channel, len(data), bytes(bytearray(data)))
     def ble_cmd_hardware_i2c_read(self, address, stop, length):
         return struct.pack('<4BBBB', 0, 3, 7, 10, address, stop, length)
     def ble_cmd_hardware_i2c_write(self, address, stop, data):
-        return struct.pack('<4BBBB' + str(len(data)) + 's', 0, 3 + len(data), 7, 11, address, stop, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBBB' + str(len(data)) + 's', 0, 3 + len(data), 7, 11, address, stop, len(data), bytes(bytearray(data)))
     def ble_cmd_hardware_set_txpower(self, power):
         return struct.pack('<4BB', 0, 1, 7, 12, power)
     def ble_cmd_hardware_timer_comparator(self, timer, channel, mode, comparator_value):
@@ -318,7 +338,7 @@ class BGLib(object):
     def ble_cmd_test_get_channel_map(self):
         return struct.pack('<4B', 0, 0, 8, 4)
     def ble_cmd_test_debug(self, input):
-        return struct.pack('<4BB' + str(len(input)) + 's', 0, 1 + len(input), 8, 5, len(input), b''.join(chr(i) for i in input))
+        return struct.pack('<4BB' + str(len(input)) + 's', 0, 1 + len(input), 8, 5, len(input), bytes(bytearray(input)))
     def ble_cmd_hardware_set_rxgain(self, gain):
         return struct.pack('<4BB', 0, 1, 7, 19, gain)
 
@@ -449,7 +469,7 @@ class BGLib(object):
     def wifi_cmd_dfu_flash_set_address(self, address):
         return struct.pack('<4BI', 0, 4, 0, 1, address)
     def wifi_cmd_dfu_flash_upload(self):
-        return struct.pack('<4BB' + str(len(data)) + 's', 0, 1 + len(data), 0, 2, data, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BB' + str(len(data)) + 's', 0, 1 + len(data), 0, 2, data, len(data), bytes(bytearray(data)))
     def wifi_cmd_dfu_flash_upload_finish(self):
         return struct.pack('<4B', 0, 0, 0, 3)
     def wifi_cmd_system_sync(self):
@@ -471,23 +491,23 @@ class BGLib(object):
     def wifi_cmd_sme_power_on(self, enable):
         return struct.pack('<4BB', 0, 1, 3, 2, enable)
     def wifi_cmd_sme_start_scan(self, hw_interface):
-        return struct.pack('<4BBB' + str(len(chList)) + 's', 0, 2 + len(chList), 3, 3, hw_interface, chList, len(chList), b''.join(chr(i) for i in chList))
+        return struct.pack('<4BBB' + str(len(chList)) + 's', 0, 2 + len(chList), 3, 3, hw_interface, chList, len(chList), bytes(bytearray(chList)))
     def wifi_cmd_sme_stop_scan(self):
         return struct.pack('<4B', 0, 0, 3, 4)
     def wifi_cmd_sme_set_password(self):
-        return struct.pack('<4BB' + str(len(password)) + 's', 0, 1 + len(password), 3, 5, password, len(password), b''.join(chr(i) for i in password))
+        return struct.pack('<4BB' + str(len(password)) + 's', 0, 1 + len(password), 3, 5, password, len(password), bytes(bytearray(password)))
     def wifi_cmd_sme_connect_bssid(self):
         return struct.pack('<4B', 0, 0, 3, 6, bssid)
     def wifi_cmd_sme_connect_ssid(self):
-        return struct.pack('<4BB' + str(len(ssid)) + 's', 0, 1 + len(ssid), 3, 7, ssid, len(ssid), b''.join(chr(i) for i in ssid))
+        return struct.pack('<4BB' + str(len(ssid)) + 's', 0, 1 + len(ssid), 3, 7, ssid, len(ssid), bytes(bytearray(ssid)))
     def wifi_cmd_sme_disconnect(self):
         return struct.pack('<4B', 0, 0, 3, 8)
     def wifi_cmd_sme_set_scan_channels(self, hw_interface):
-        return struct.pack('<4BBB' + str(len(chList)) + 's', 0, 2 + len(chList), 3, 9, hw_interface, chList, len(chList), b''.join(chr(i) for i in chList))
+        return struct.pack('<4BBB' + str(len(chList)) + 's', 0, 2 + len(chList), 3, 9, hw_interface, chList, len(chList), bytes(bytearray(chList)))
     def wifi_cmd_sme_set_operating_mode(self, mode):
         return struct.pack('<4BB', 0, 1, 3, 10, mode)
     def wifi_cmd_sme_start_ap_mode(self, channel, security):
-        return struct.pack('<4BBBB' + str(len(ssid)) + 's', 0, 3 + len(ssid), 3, 11, channel, security, ssid, len(ssid), b''.join(chr(i) for i in ssid))
+        return struct.pack('<4BBBB' + str(len(ssid)) + 's', 0, 3 + len(ssid), 3, 11, channel, security, ssid, len(ssid), bytes(bytearray(ssid)))
     def wifi_cmd_sme_stop_ap_mode(self):
         return struct.pack('<4B', 0, 0, 3, 12)
     def wifi_cmd_tcpip_start_tcp_server(self, port, default_destination):
@@ -503,9 +523,9 @@ class BGLib(object):
     def wifi_cmd_tcpip_dns_configure(self, index):
         return struct.pack('<4BB', 0, 1, 4, 5, index, address)
     def wifi_cmd_tcpip_dns_gethostbyname(self):
-        return struct.pack('<4BB' + str(len(name)) + 's', 0, 1 + len(name), 4, 6, name, len(name), b''.join(chr(i) for i in name))
+        return struct.pack('<4BB' + str(len(name)) + 's', 0, 1 + len(name), 4, 6, name, len(name), bytes(bytearray(name)))
     def wifi_cmd_endpoint_send(self, endpoint):
-        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 5, 0, endpoint, data, len(data), b''.join(chr(i) for i in data))
+        return struct.pack('<4BBB' + str(len(data)) + 's', 0, 2 + len(data), 5, 0, endpoint, data, len(data), bytes(bytearray(data)))
     def wifi_cmd_endpoint_set_streaming(self, endpoint, streaming):
         return struct.pack('<4BBB', 0, 2, 5, 1, endpoint, streaming)
     def wifi_cmd_endpoint_set_active(self, endpoint, active):
@@ -541,7 +561,7 @@ class BGLib(object):
     def wifi_cmd_flash_ps_erase_all(self):
         return struct.pack('<4B', 0, 0, 7, 2)
     def wifi_cmd_flash_ps_save(self, key):
-        return struct.pack('<4BHB' + str(len(value)) + 's', 0, 3 + len(value), 7, 3, key, value, len(value), b''.join(chr(i) for i in value))
+        return struct.pack('<4BHB' + str(len(value)) + 's', 0, 3 + len(value), 7, 3, key, value, len(value), bytes(bytearray(value)))
     def wifi_cmd_flash_ps_load(self, key):
         return struct.pack('<4BH', 0, 2, 7, 4, key)
     def wifi_cmd_flash_ps_erase(self, key):
@@ -653,49 +673,94 @@ class BGLib(object):
     on_before_tx_command = BGAPIEvent()
     on_tx_command_complete = BGAPIEvent()
 
-    bgapi_rx_buffer = []
+    bgapi_rx_buffer = None
+    bgapi_rx_length = 0
     bgapi_rx_expected_length = 0
     busy = False
     packet_mode = False
     debug = False
+    rx_queue = None
+    rx_reader = None
+    rx_reader_serial = None
+    rx_event = None
 
     def send_command(self, ser, packet):
-        if self.packet_mode: packet = chr(len(packet) & 0xFF) + packet
-        if self.debug: print ('=>[ ' + ' '.join(['%02X' % ord(b) for b in packet ]) + ' ]')
+        if self.packet_mode: packet = struct.pack('<B', len(packet) & 0xFF) + packet
+        if self.debug: print ('=>[ ' + ' '.join(['%02X' % b for b in bytearray(packet) ]) + ' ]')
         self.on_before_tx_command()
         self.busy = True
         self.on_busy()
         ser.write(packet)
         self.on_tx_command_complete()
 
+    def start_reader(self, ser):
+        if self.rx_reader_serial is not ser:
+            # New port, so anything queued from the old one is stale
+            self.rx_queue = queue.SimpleQueue()
+            self.rx_reader_serial = ser
+        elif self.rx_reader.is_alive():
+            return
+        self.rx_reader = threading.Thread(target=self.read_serial, args=(ser, self.rx_queue), name='bglib-rx')
+        self.rx_reader.daemon = True
+        self.rx_reader.start()
+
+    def read_serial(self, ser, rx_queue):
+        # Blocks in ser.read() until data arrives, then takes everything waiting.
+        # Errors (including the port being closed) are queued for check_activity
+        # to raise and end the reader
+        while 1:
+            try:
+                x = ser.read(ser.in_waiting or 1)
+            except Exception as e:
+                rx_queue.put(e)
+                if self.rx_event is not None: self.rx_event.set()
+                break
+            if len(x) > 0:
+                rx_queue.put(x)
+                if self.rx_event is not None: self.rx_event.set()
+
+    def parse_chunk(self, x):
+        if isinstance(x, Exception):
+            raise x
+        for b in bytearray(x):
+            self.parse(b)
+
     def check_activity(self, ser, timeout=0):
+        self.start_reader(ser)
         if timeout > 0:
-            ser.timeout = timeout
             while 1:
-                x = ser.read()
-                if len(x) > 0:
-                    self.parse(ord(x))
-                else: # timeout
+                try:
+                    self.parse_chunk(self.rx_queue.get(timeout=timeout))
+                except queue.Empty: # timeout
                     self.busy = False
                     self.on_idle()
                     self.on_timeout()
 
-                    self.bgapi_rx_buffer = []
+                    self.bgapi_rx_length = 0
                     self.bgapi_rx_expected_length = 0
                 if not self.busy: # finished
                     break
         else:
-            while ser.inWaiting(): self.parse(ord(ser.read()))
+            while 1:
+                try:
+                    self.parse_chunk(self.rx_queue.get_nowait())
+                except queue.Empty:
+                    break
         return self.busy
 
     def parse(self, b):
-        if len(self.bgapi_rx_buffer) == 0 and (b == 0x00 or b == 0x80 or b == 0x08 or b == 0x88):
-            self.bgapi_rx_buffer.append(b)
-        elif len(self.bgapi_rx_buffer) == 1:
-            self.bgapi_rx_buffer.append(b)
+        rx_length = self.bgapi_rx_length
+        if rx_length == 0 and (b == 0x00 or b == 0x80 or b == 0x08 or b == 0x88):
+            self.bgapi_rx_buffer[0] = b
+            rx_length = 1
+        elif rx_length == 1:
+            self.bgapi_rx_buffer[1] = b
+            rx_length = 2
             self.bgapi_rx_expected_length = 4 + (self.bgapi_rx_buffer[0] & 0x07) + self.bgapi_rx_buffer[1]
-        elif len(self.bgapi_rx_buffer) > 1:
-            self.bgapi_rx_buffer.append(b)
+        elif rx_length > 1:
+            self.bgapi_rx_buffer[rx_length] = b
+            rx_length += 1
+        self.bgapi_rx_length = rx_length
 
         """
         BGAPI packet structure (as of 2012-11-07):
@@ -709,14 +774,14 @@ class BGLib(object):
             Bytes 4-n:  0 - 2048 Bytes, Payload (PL)     Up to 2048 bytes of payload
         """
 
-        #print '%02X: %d, %d' % (b, len(self.bgapi_rx_buffer), self.bgapi_rx_expected_length)
-        if self.bgapi_rx_expected_length > 0 and len(self.bgapi_rx_buffer) == self.bgapi_rx_expected_length:
+        #print '%02X: %d, %d' % (b, self.bgapi_rx_length, self.bgapi_rx_expected_length)
+        if self.bgapi_rx_expected_length > 0 and rx_length == self.bgapi_rx_expected_length:
 
-            if self.debug: print ('<=[ ' + ' '.join(['%02X' % b for b in self.bgapi_rx_buffer ]) + ' ]')
+            if self.debug: print ('<=[ ' + self.bgapi_rx_buffer[:rx_length].hex(' ').upper() + ' ]')
             packet_type, payload_length, packet_class, packet_command = self.bgapi_rx_buffer[:4]
-            self.bgapi_rx_payload = b''.join(chr(i) for i in self.bgapi_rx_buffer[4:])
+            self.bgapi_rx_payload = bytes(memoryview(self.bgapi_rx_buffer)[4:rx_length])
 #            print "bgapi_rx_buffer: {0}".format(self.bgapi_rx_buffer)
-            self.bgapi_rx_buffer = []
+            self.bgapi_rx_length = 0
             if packet_type & 0x88 == 0x00:
                 # 0x00 = BLE response packet
                 if packet_class == 0:
@@ -729,7 +794,7 @@ class BGLib(object):
                     elif packet_command == 2: # ble_rsp_system_address_get
                         if(len(self.bgapi_rx_payload) >= 6):
                             address = struct.unpack('<6s', self.bgapi_rx_payload[:6])[0]
-                            address = [ord(b) for b in address]
+                            address = list(address)
                             self.ble_rsp_system_address_get({ 'address': address })
                     elif packet_command == 3: # ble_rsp_system_reg_write
                         result = struct.unpack('<H', self.bgapi_rx_payload[:2])[0]
@@ -745,7 +810,7 @@ class BGLib(object):
                         self.ble_rsp_system_get_connections({ 'maxconn': maxconn })
                     elif packet_command == 7: # ble_rsp_system_read_memory
                         address, data_len = struct.unpack('<IB', self.bgapi_rx_payload[:5])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[5:]]
+                        data_data = list(self.bgapi_rx_payload[5:])
                         self.ble_rsp_system_read_memory({ 'address': address, 'data': data_data })
                     elif packet_command == 8: # ble_rsp_system_get_info
                         print ("ble_rsp_system_get_info: {0}".format(self.bgapi_rx_payload))
@@ -764,7 +829,7 @@ class BGLib(object):
                         self.ble_rsp_system_whitelist_clear({  })
                     elif packet_command == 13: # ble_rsp_system_endpoint_rx
                         result, data_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        data_data = list(self.bgapi_rx_payload[3:])
                         self.ble_rsp_system_endpoint_rx({ 'result': result, 'data': data_data })
                     elif packet_command == 14: # ble_rsp_system_endpoint_set_watermarks
                         result = struct.unpack('<H', self.bgapi_rx_payload[:2])[0]
@@ -781,7 +846,7 @@ class BGLib(object):
                         self.ble_rsp_flash_ps_save({ 'result': result })
                     elif packet_command == 4: # ble_rsp_flash_ps_load
                         result, value_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        value_data = list(self.bgapi_rx_payload[3:])
                         self.ble_rsp_flash_ps_load({ 'result': result, 'value': value_data })
                     elif packet_command == 5: # ble_rsp_flash_ps_erase
                         self.ble_rsp_flash_ps_erase({  })
@@ -796,11 +861,11 @@ class BGLib(object):
                         self.ble_rsp_attributes_write({ 'result': result })
                     elif packet_command == 1: # ble_rsp_attributes_read
                         handle, offset, result, value_len = struct.unpack('<HHHB', self.bgapi_rx_payload[:7])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[7:]]
+                        value_data = list(self.bgapi_rx_payload[7:])
                         self.ble_rsp_attributes_read({ 'handle': handle, 'offset': offset, 'result': result, 'value': value_data })
                     elif packet_command == 2: # ble_rsp_attributes_read_type
                         handle, result, value_len = struct.unpack('<HHB', self.bgapi_rx_payload[:5])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[5:]]
+                        value_data = list(self.bgapi_rx_payload[5:])
                         self.ble_rsp_attributes_read_type({ 'handle': handle, 'result': result, 'value': value_data })
                     elif packet_command == 3: # ble_rsp_attributes_user_read_response
                         self.ble_rsp_attributes_user_read_response({  })
@@ -821,7 +886,7 @@ class BGLib(object):
                         self.ble_rsp_connection_version_update({ 'connection': connection, 'result': result })
                     elif packet_command == 4: # ble_rsp_connection_channel_map_get
                         connection, map_len = struct.unpack('<BB', self.bgapi_rx_payload[:2])
-                        map_data = [ord(b) for b in self.bgapi_rx_payload[2:]]
+                        map_data = list(self.bgapi_rx_payload[2:])
                         self.ble_rsp_connection_channel_map_get({ 'connection': connection, 'map': map_data })
                     elif packet_command == 5: # ble_rsp_connection_channel_map_set
                         connection, result = struct.unpack('<BH', self.bgapi_rx_payload[:3])
@@ -954,11 +1019,11 @@ class BGLib(object):
                         self.ble_rsp_hardware_spi_config({ 'result': result })
                     elif packet_command == 9: # ble_rsp_hardware_spi_transfer
                         result, channel, data_len = struct.unpack('<HBB', self.bgapi_rx_payload[:4])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[4:]]
+                        data_data = list(self.bgapi_rx_payload[4:])
                         self.ble_rsp_hardware_spi_transfer({ 'result': result, 'channel': channel, 'data': data_data })
                     elif packet_command == 10: # ble_rsp_hardware_i2c_read
                         result, data_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        data_data = list(self.bgapi_rx_payload[3:])
                         self.ble_rsp_hardware_i2c_read({ 'result': result, 'data': data_data })
                     elif packet_command == 11: # ble_rsp_hardware_i2c_write
                         written = struct.unpack('<B', self.bgapi_rx_payload[:1])[0]
@@ -983,11 +1048,11 @@ class BGLib(object):
                         self.ble_rsp_test_phy_reset({  })
                     elif packet_command == 4: # ble_rsp_test_get_channel_map
                         channel_map_len = struct.unpack('<B', self.bgapi_rx_payload[:1])[0]
-                        channel_map_data = [ord(b) for b in self.bgapi_rx_payload[1:]]
+                        channel_map_data = list(self.bgapi_rx_payload[1:])
                         self.ble_rsp_test_get_channel_map({ 'channel_map': channel_map_data })
                     elif packet_command == 5: # ble_rsp_test_debug
                         output_len = struct.unpack('<B', self.bgapi_rx_payload[:1])[0]
-                        output_data = [ord(b) for b in self.bgapi_rx_payload[1:]]
+                        output_data = list(self.bgapi_rx_payload[1:])
                         self.ble_rsp_test_debug({ 'output': output_data })
                 self.busy = False
                 self.on_idle()
@@ -1001,7 +1066,7 @@ class BGLib(object):
                         self.on_idle()
                     elif packet_command == 1: # ble_evt_system_debug
                         data_len = struct.unpack('<B', self.bgapi_rx_payload[:1])[0]
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[1:]]
+                        data_data = list(self.bgapi_rx_payload[1:])
                         self.ble_evt_system_debug({ 'data': data_data })
                     elif packet_command == 2: # ble_evt_system_endpoint_watermark_rx
                         endpoint, data = struct.unpack('<BB', self.bgapi_rx_payload[:2])
@@ -1017,12 +1082,12 @@ class BGLib(object):
                 elif packet_class == 1:
                     if packet_command == 0: # ble_evt_flash_ps_key
                         key, value_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        value_data = list(self.bgapi_rx_payload[3:])
                         self.ble_evt_flash_ps_key({ 'key': key, 'value': value_data })
                 elif packet_class == 2:
                     if packet_command == 0: # ble_evt_attributes_value
                         connection, reason, handle, offset, value_len = struct.unpack('<BBHHB', self.bgapi_rx_payload[:7])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[7:]]
+                        value_data = list(self.bgapi_rx_payload[7:])
                         self.ble_evt_attributes_value({ 'connection': connection, 'reason': reason, 'handle': handle, 'offset': offset, 'value': value_data })
                     elif packet_command == 1: # ble_evt_attributes_user_read_request
                         connection, handle, offset, maxsize = struct.unpack('<BHHB', self.bgapi_rx_payload[:6])
@@ -1033,18 +1098,18 @@ class BGLib(object):
                 elif packet_class == 3:
                     if packet_command == 0: # ble_evt_connection_status
                         connection, flags, address, address_type, conn_interval, timeout, latency, bonding = struct.unpack('<BB6sBHHHB', self.bgapi_rx_payload[:16])
-                        address = [ord(b) for b in address]
+                        address = list(address)
                         self.ble_evt_connection_status({ 'connection': connection, 'flags': flags, 'address': address, 'address_type': address_type, 'conn_interval': conn_interval, 'timeout': timeout, 'latency': latency, 'bonding': bonding })
                     elif packet_command == 1: # ble_evt_connection_version_ind
                         connection, vers_nr, comp_id, sub_vers_nr = struct.unpack('<BBHH', self.bgapi_rx_payload[:6])
                         self.ble_evt_connection_version_ind({ 'connection': connection, 'vers_nr': vers_nr, 'comp_id': comp_id, 'sub_vers_nr': sub_vers_nr })
                     elif packet_command == 2: # ble_evt_connection_feature_ind
                         connection, features_len = struct.unpack('<BB', self.bgapi_rx_payload[:2])
-                        features_data = [ord(b) for b in self.bgapi_rx_payload[2:]]
+                        features_data = list(self.bgapi_rx_payload[2:])
                         self.ble_evt_connection_feature_ind({ 'connection': connection, 'features': features_data })
                     elif packet_command == 3: # ble_evt_connection_raw_rx
                         connection, data_len = struct.unpack('<BB', self.bgapi_rx_payload[:2])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[2:]]
+                        data_data = list(self.bgapi_rx_payload[2:])
                         self.ble_evt_connection_raw_rx({ 'connection': connection, 'data': data_data })
                     elif packet_command == 4: # ble_evt_connection_disconnected
                         connection, reason = struct.unpack('<BH', self.bgapi_rx_payload[:3])
@@ -1058,28 +1123,28 @@ class BGLib(object):
                         self.ble_evt_attclient_procedure_completed({ 'connection': connection, 'result': result, 'chrhandle': chrhandle })
                     elif packet_command == 2: # ble_evt_attclient_group_found
                         connection, start, end, uuid_len = struct.unpack('<BHHB', self.bgapi_rx_payload[:6])
-                        uuid_data = [ord(b) for b in self.bgapi_rx_payload[6:]]
+                        uuid_data = list(self.bgapi_rx_payload[6:])
                         self.ble_evt_attclient_group_found({ 'connection': connection, 'start': start, 'end': end, 'uuid': uuid_data })
                     elif packet_command == 3: # ble_evt_attclient_attribute_found
                         connection, chrdecl, value, properties, uuid_len = struct.unpack('<BHHBB', self.bgapi_rx_payload[:7])
-                        uuid_data = [ord(b) for b in self.bgapi_rx_payload[7:]]
+                        uuid_data = list(self.bgapi_rx_payload[7:])
                         self.ble_evt_attclient_attribute_found({ 'connection': connection, 'chrdecl': chrdecl, 'value': value, 'properties': properties, 'uuid': uuid_data })
                     elif packet_command == 4: # ble_evt_attclient_find_information_found
                         connection, chrhandle, uuid_len = struct.unpack('<BHB', self.bgapi_rx_payload[:4])
-                        uuid_data = [ord(b) for b in self.bgapi_rx_payload[4:]]
+                        uuid_data = list(self.bgapi_rx_payload[4:])
                         self.ble_evt_attclient_find_information_found({ 'connection': connection, 'chrhandle': chrhandle, 'uuid': uuid_data })
                     elif packet_command == 5: # ble_evt_attclient_attribute_value
                         connection, atthandle, type, value_len = struct.unpack('<BHBB', self.bgapi_rx_payload[:5])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[5:]]
+                        value_data = list(self.bgapi_rx_payload[5:])
                         self.ble_evt_attclient_attribute_value({ 'connection': connection, 'atthandle': atthandle, 'type': type, 'value': value_data })
                     elif packet_command == 6: # ble_evt_attclient_read_multiple_response
                         connection, handles_len = struct.unpack('<BB', self.bgapi_rx_payload[:2])
-                        handles_data = [ord(b) for b in self.bgapi_rx_payload[2:]]
+                        handles_data = list(self.bgapi_rx_payload[2:])
                         self.ble_evt_attclient_read_multiple_response({ 'connection': connection, 'handles': handles_data })
                 elif packet_class == 5:
                     if packet_command == 0: # ble_evt_sm_smp_data
                         handle, packet, data_len = struct.unpack('<BBB', self.bgapi_rx_payload[:3])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        data_data = list(self.bgapi_rx_payload[3:])
                         self.ble_evt_sm_smp_data({ 'handle': handle, 'packet': packet, 'data': data_data })
                     elif packet_command == 1: # ble_evt_sm_bonding_fail
                         handle, result = struct.unpack('<BH', self.bgapi_rx_payload[:3])
@@ -1096,8 +1161,8 @@ class BGLib(object):
                 elif packet_class == 6:
                     if packet_command == 0: # ble_evt_gap_scan_response
                         rssi, packet_type, sender, address_type, bond, data_len = struct.unpack('<bB6sBBB', self.bgapi_rx_payload[:11])
-                        sender = [ord(b) for b in sender]
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[11:]]
+                        sender = list(sender)
+                        data_data = list(self.bgapi_rx_payload[11:])
                         self.ble_evt_gap_scan_response({ 'rssi': rssi, 'packet_type': packet_type, 'sender': sender, 'address_type': address_type, 'bond': bond, 'data': data_data })
                     elif packet_command == 1: # ble_evt_gap_mode_changed
                         discover, connect = struct.unpack('<BB', self.bgapi_rx_payload[:2])
@@ -1269,7 +1334,7 @@ class BGLib(object):
                         self.wifi_rsp_flash_ps_save({ 'result': result })
                     elif packet_command == 4: # wifi_rsp_flash_ps_load
                         result, value_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        value_data = list(self.bgapi_rx_payload[3:])
                         self.wifi_rsp_flash_ps_load({ 'result': result, 'value': value_data })
                     elif packet_command == 5: # wifi_rsp_flash_ps_erase
                         result = struct.unpack('<H', self.bgapi_rx_payload[:2])[0]
@@ -1324,7 +1389,7 @@ class BGLib(object):
                         self.wifi_evt_sme_wifi_is_off({ 'result': result })
                     elif packet_command == 2: # wifi_evt_sme_scan_result
                         channel, rssi, snr, secure, ssid_len = struct.unpack('<bhbBB', self.bgapi_rx_payload[:6])
-                        ssid_data = [ord(b) for b in self.bgapi_rx_payload[6:]]
+                        ssid_data = list(self.bgapi_rx_payload[6:])
                         self.wifi_evt_sme_scan_result({ 'channel': channel, 'rssi': rssi, 'snr': snr, 'secure': secure, 'ssid': ssid_data })
                     elif packet_command == 3: # wifi_evt_sme_scan_result_drop
                         self.wifi_evt_sme_scan_result_drop({  })
@@ -1373,7 +1438,7 @@ class BGLib(object):
                         self.wifi_evt_tcpip_endpoint_status({ 'endpoint': endpoint, 'local_port': local_port, 'remote_port': remote_port })
                     elif packet_command == 3: # wifi_evt_tcpip_dns_gethostbyname_result
                         result, name_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        name_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        name_data = list(self.bgapi_rx_payload[3:])
                         self.wifi_evt_tcpip_dns_gethostbyname_result({ 'result': result, 'name': name_data })
                 elif packet_class == 5:
                     if packet_command == 0: # wifi_evt_endpoint_syntax_error
@@ -1381,7 +1446,7 @@ class BGLib(object):
                         self.wifi_evt_endpoint_syntax_error({ 'endpoint': endpoint })
                     elif packet_command == 1: # wifi_evt_endpoint_data
                         endpoint, data_len = struct.unpack('<BB', self.bgapi_rx_payload[:2])
-                        data_data = [ord(b) for b in self.bgapi_rx_payload[2:]]
+                        data_data = list(self.bgapi_rx_payload[2:])
                         self.wifi_evt_endpoint_data({ 'endpoint': endpoint, 'data': data_data })
                     elif packet_command == 2: # wifi_evt_endpoint_status
                         endpoint, type, streaming, destination, active = struct.unpack('<BIBbB', self.bgapi_rx_payload[:8])
@@ -1402,7 +1467,7 @@ class BGLib(object):
                 elif packet_class == 7:
                     if packet_command == 0: # wifi_evt_flash_ps_key
                         key, value_len = struct.unpack('<HB', self.bgapi_rx_payload[:3])
-                        value_data = [ord(b) for b in self.bgapi_rx_payload[3:]]
+                        value_data = list(self.bgapi_rx_payload[3:])
                         self.wifi_evt_flash_ps_key({ 'key': key, 'value': value_data })
                 elif packet_class == 9:
                     if packet_command == 0: # wifi_evt_https_on_req
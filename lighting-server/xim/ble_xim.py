@@ -6,6 +6,143 @@ Library for interfacing to the XIM BLE modules via the BlueGiga BLED112 USB dong
 Based on the Bluegiga BGAPI/BGLib demo: Bluegiga "Cable Replacement Profile" collector
 
 Xicato Changelog:
+    V2.059 2026-10-15
+        - Ported to Python 3. Integer divisions use //, AES keys and data
+            are passed to PyCryptodome as bytes and hex strings are built
+            with bytearray.hex()
+        - AES-CCM uses the AESCCM cipher from the cryptography package
+            (OpenSSL, AES-NI where available) and falls back to PyCryptodome
+            when it is not installed
+        - AESCCM ciphers are cached per key so the key schedule is only
+            expanded once per network key
+        - XBeacon 1, XBeacon 2 and XSensor fields are unpacked with
+            precompiled struct formats and ConvertListToInt uses
+            int.from_bytes
+        - ProcessXBPacket and GetPayloadTypeText look up the encrypted packet
+            type in dispatch tables instead of walking an if/elif chain
+        - Devices are indexed by BLE address in devicesByAddress so
+            GetDeviceWithAddress no longer walks peripheral_list
+        - ConvertListToSeparatedHexString uses bytes.hex() and only falls
+            back to the per-value loop for lists that are not plain bytes
+        - TestPort resets the BGAPI receive buffer with bgapi_rx_length
+        - ConvertIntToList uses int.to_bytes for the SQN, address and
+            nonce fields of outgoing packets. Removed the unused array import
+        - fadeMap and overrideMap lookups bisect precomputed midpoints
+            (fadeMapMidpoints, overrideMapMidpoints), so finding the nearest
+            entry is a single bisect_left call
+        - Assigned XBeacon headers, unencrypted assigned packets and the light
+            control payload are packed with precompiled struct formats
+        - The packet log uses a PACKET_LOG_BUFFER_SIZE write buffer that is
+            flushed every PACKET_LOG_FLUSH_INTERVAL seconds by a timer thread
+        - BLE file paths are built once with os.path.join from
+            bleDirectoryPath, which Start() also creates, and the event and
+            packet log directories no longer need per-OS branches
+        - XDecrypt only retries with the TX network key when the TX network
+            has a different key and the packet's partial network ID matches it
+        - The default local device ID is drawn with secrets.randbelow
+            instead of the random module
+        - activityEvent is set when serial data arrives (or by
+            SignalActivity) so callers can sleep in WaitForActivity instead
+            of polling Process. Removed the unused msvcrt import
+        - Process reads the time once after checking for serial data and
+            uses it for all of its timeout checks
+        - NetworkConfig, ServiceInfo and AttributeInfo declare __slots__
+        - AES-CCM nonces are packed in one step with XBX_NONCE and
+            XBX_PADDED_NONCE instead of being copied into a shared list
+        - Per-packet trace messages use logHandler.printDebug, so they are
+            only formatted when cfg.DEBUG is set
+        - Scan packets from unknown devices are dropped before the fields are
+            parsed unless bytes.find locates the Xicato company ID or an
+            iXBeacon name in the data
+        - ConvertIntensityToValue rounds straight to an int and
+            ConvertValueToIntensity uses true division instead of float()
+        - XBX headers, XDevInfo fields and XBeacon group members are
+            unpacked with precompiled struct formats
+        - BytesToString builds the bytes in one copy, without an
+            intermediate bytearray
+        - Service and characteristic UUID constants are immutable bytes, so
+            UUID comparisons are a single memcmp
+        - Attribute lookups by UUID and by handle use dicts of the attribute
+            list (AttributeIndex) instead of scanning the list
+        - BleDevice, XimBleDevice and XSensorBleDevice declare __slots__
+        - 128-bit UUID constants are reversed with a bytes slice
+        - Scan data fields are sliced out by their length byte instead of
+            being copied into a list one byte at a time
+        - The XBX header is decrypted without a dummy MIC check, saving an
+            AES pass and an exception per packet
+        - The device type of a new device is looked up from the packet type
+            with XB_PAYLOAD_DEVICE_TYPES, once per packet
+        - Per-address APIs (GetScannedData, GetDeviceName, IsDeviceConnected,
+            etc.) use the devicesByAddress index instead of walking the
+            peripheral_list
+        - Group members in a group packet are unpacked in one call
+        - EncryptTest and the test application pack their nonces with
+            XBX_PADDED_NONCE
+        - The packet type of a Xicato field is sliced once per packet, and
+            legacy packet types are looked up in LEGACY_PACKET_TYPE_TEXT and
+            LEGACY_PACKET_DEVICE_TYPES
+        - UUID->Handle map files are parsed once into attributeInfoFileCache
+            and shared by every device, instead of being re-read and re-split
+            for each attribute of each connecting device
+        - SetUriBeaconURI finds URI suffixes with one compiled pattern, and
+            RequestUriBeaconURI joins the decoded URI once
+        - The network ID field and partial ID of an XBX packet are read once
+        - Received UUIDs are looked up in UUIDS_BY_WIRE_ORDER instead of being
+            reversed for every event, and commands send reversed bytes slices
+        - Process runs the connection timeout checks from
+            CONNECTION_STATE_CHECKS, by device connection state
+        - Added COMPANY_ID_LENGTH for the field offsets and the company ID
+            check in the scan handler
+        - GetVersionString zero pads the minor version with a format spec
+        - XDecrypt looks up the RX network and slices the encrypted payload
+            once, and only looks up the TX network when a retry is needed
+        - GetDeviceWithConnectionHandle remembers the device found for each
+            connection handle, and RemoveDevice uses devicesByAddress
+        - adminKey and oemKey are bytes so they can be passed straight to the
+            cipher and GATT write without converting them
+        - NetworkConfig keeps a bytes copy of each key, built when the key is
+            assigned, and the AES-CCM calls use it instead of converting the
+            key list on every packet
+        - The PyCryptodome fallback encrypts with encrypt_and_digest
+        - The services and characteristics of each device type are listed in
+            module level UUID tuples that InitializeServiceAttributeList
+            builds from
+        - GetDevicesInGroup classifies the address once and only compares
+            the non-wildcard bytes of a 4 byte address
+        - The scan handler unpacks UUID lists with struct.iter_unpack and
+            decodes the device name in one call
+        - ConvertListToSeparatedString joins the values in one call instead
+            of building the string one value at a time
+        - The unencrypted iXB packet writes the sequence number with
+            int.to_bytes straight into the packet
+        - The encrypted packet and OOB data checks no longer repeat the
+            NETWORK_KEY_NONE test that IsEncryptedAdvEnabled makes
+        - The network config file stores the TX sequence number
+            XBX_SEQUENCE_ID_RESERVE ahead, and sending a packet only rewrites
+            it once that block is used up
+        - The scan handler reads the time once per packet
+        - The packet builders and XDecrypt pass nonces and packets to
+            printDebug as they are, so they are only converted to lists when
+            debug messages are enabled
+        - The scan handler reads each field's type once, and only checks
+            for a complete iXBeacon after a UUID list or device name field
+        - XDecrypt keeps the results for recent packets in xDecryptCache, so
+            repeats of an advertisement aren't decrypted again
+        - The scan handler looks up the rx network and its partial ID once
+            per packet
+        - SetXBUnassignedPacket packs its fixed fields with XB_UNASSIGNED_PACKET
+        - Packet type membership tests use the XB_TYPES_UNENCRYPTED_PAYLOAD and
+            PACKET_TYPES_XSENSOR tuples instead of building a list per packet
+        - The Process*Fields functions take the scan time from the scan
+            handler for their update times
+        - HexToAsciiList and HexListToAsciiList look the hex digits up in
+            HEX_ASCII_PAIRS instead of formatting each byte
+        - The iXB and XB packet builders append to a bytearray instead of
+            concatenating lists of ints
+        - BroadcastIXBAssigned and SetXBAssignedPacket look up the TX network
+            once per packet
+        - BleDevice parses swVersion into swVersionValue when it is set, and
+            IsOobSupported and IsCombinedNotification use it
     V2.058 2016-08-11
         - Added uuid_light_control_scenes_characteristic
         - Added uuid_oem_service, uuid_access_oem_login_characteristic, and
@@ -459,17 +596,19 @@ BASIC ARCHITECTURAL OVERVIEW:
 
 """
 
-# NOTE: WINDOWS-ONLY without modifications, due to using "msvcrt" for keyboard input
-
 import bglib, serial, time, datetime, optparse, signal, sys, os, cfg
 
-if (cfg.WINDOWS):
-    import msvcrt
-
-import array
-from Crypto.Cipher import AES
+import re
+import struct
+import threading
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESCCM
+    from cryptography.exceptions import InvalidTag
+except ImportError:
+    AESCCM = None
+    from Crypto.Cipher import AES
 from bisect import bisect_left
-from random import randint
+import secrets
 
 import LogHandler
 
@@ -506,6 +645,9 @@ hello_received = False
 info_received = False
 local_address = None
 
+# Set by the bglib reader when serial data arrives and by SignalActivity
+activityEvent = threading.Event()
+
 # Maximum allowed failures from the serial port before it is restarted
 serialFailures = 0
 MAX_SERIAL_FAILURES = 5
@@ -525,25 +667,22 @@ ADMIN_KEY_DEFAULT = [0] * 16 # networkConfigs[selectedRxNetworkIndex].key
 
 bleDirectory = "BLE"
 workingDirectory = os.getcwd()
-if (cfg.WINDOWS):
-    bleComPortFileName = "{0}\\{1}\\BLE COM Port.txt".format(workingDirectory, bleDirectory)
-    bleConnectParamsFileName = "{0}\\{1}\\BLE Connection Parameters.txt".format(workingDirectory, bleDirectory)
-    bleRSSIFileName = "{0}\\{1}\\BLE RSSI Log.txt".format(workingDirectory, bleDirectory)
-    uuidHandleMapFileName = "{0}\\{1}\\UUID Handle Map.csv".format(workingDirectory, bleDirectory)
-    uuidHandleMapFileNameTemp = "{0}\\{1}\\UUID Handle Map.tmp".format(workingDirectory, bleDirectory)
-    sensorUuidHandleMapFileName = "{0}\\{1}\\Sensor UUID Handle Map.csv".format(workingDirectory, bleDirectory)
-    sensorUuidHandleMapFileNameTemp = "{0}\\{1}\\Sensor UUID Handle Map.tmp".format(workingDirectory, bleDirectory)
-    bleNetworkConfigFileName = "{0}\\{1}\\BLE Network Config.txt".format(workingDirectory, bleDirectory)
-
-if (cfg.LINUX or cfg.OSX):
-    bleComPortFileName = "{0}/{1}/BLE_COM_Port.txt".format(workingDirectory, bleDirectory)
-    bleConnectParamsFileName = "{0}/{1}/BLE_Connection_Parameters.txt".format(workingDirectory, bleDirectory)
-    bleRSSIFileName = "{0}/{1}/BLE_RSSI_Log.txt".format(workingDirectory, bleDirectory)
-    uuidHandleMapFileName = "{0}/{1}/UUID_Handle_Map.csv".format(workingDirectory, bleDirectory)
-    uuidHandleMapFileNameTemp = "{0}/{1}/UUID_Handle_Map.tmp".format(workingDirectory, bleDirectory)
-    sensorUuidHandleMapFileName = "{0}/{1}/Sensor_UUID_Handle_Map.csv".format(workingDirectory, bleDirectory)
-    sensorUuidHandleMapFileNameTemp = "{0}/{1}/Sensor_UUID_Handle_Map.tmp".format(workingDirectory, bleDirectory)
-    bleNetworkConfigFileName = "{0}/{1}/BLE_Network_Config.txt".format(workingDirectory, bleDirectory)
+bleDirectoryPath = os.path.join(workingDirectory, bleDirectory)
+
+# Windows file names use spaces, Linux and OS X file names use underscores
+def GetBleFileName(name):
+    if (cfg.WINDOWS):
+        return os.path.join(bleDirectoryPath, name)
+    return os.path.join(bleDirectoryPath, name.replace(" ", "_"))
+
+bleComPortFileName = GetBleFileName("BLE COM Port.txt")
+bleConnectParamsFileName = GetBleFileName("BLE Connection Parameters.txt")
+bleRSSIFileName = GetBleFileName("BLE RSSI Log.txt")
+uuidHandleMapFileName = GetBleFileName("UUID Handle Map.csv")
+uuidHandleMapFileNameTemp = GetBleFileName("UUID Handle Map.tmp")
+sensorUuidHandleMapFileName = GetBleFileName("Sensor UUID Handle Map.csv")
+sensorUuidHandleMapFileNameTemp = GetBleFileName("Sensor UUID Handle Map.tmp")
+bleNetworkConfigFileName = GetBleFileName("BLE Network Config.txt")
 
 
 
@@ -567,8 +706,18 @@ bleLocalDeviceIdV0 = [254,254,254,254]
 # Scanning State
 scanningEnabled = True
 
+# Packet log write buffering. Rows are written on every scan response and
+#   flushed to disk by a timer thread
+PACKET_LOG_BUFFER_SIZE = 1 << 20
+PACKET_LOG_FLUSH_INTERVAL = 1.0
+
 # List of supported devices that have been scanned
 peripheral_list = []
+# peripheral_list indexed by tuple(address)
+devicesByAddress = {}
+# Most recent device found for each connection handle. Entries are checked
+#   against device.connection_handle before use
+devicesByConnectionHandle = {}
 
 # Group polling
 groupPollingIndex = 0
@@ -602,11 +751,25 @@ STORED_ADDRESS_LENGTH = 4
 
 # Company ID
 ADV_COMPANY_ID_XICATO = [0x53, 0x02]
+COMPANY_ID_LENGTH = len(ADV_COMPANY_ID_XICATO)
+# Byte strings searched for in the raw scan data to find Xicato packets:
+#   the manufacturer-specific data type followed by the company ID, and the
+#   8 character "XI" device name field of an iXBeacon
+ADV_XICATO_MANUFACTURER_DATA = bytes([0xFF] + ADV_COMPANY_ID_XICATO)
+ADV_IXB_NAME_FIELD = bytes([0x09, 0x09, ord('X'), ord('I')])
+
+# One UUID, in wire order, of the partial or complete lists of 16, 32 and
+#   128-bit UUIDs, by AD type
+AD_UUID16_FORMAT = struct.Struct('2s')
+AD_UUID32_FORMAT = struct.Struct('4s')
+AD_UUID128_FORMAT = struct.Struct('16s')
+AD_UUID_LIST_FORMATS = {0x02: AD_UUID16_FORMAT, 0x03: AD_UUID16_FORMAT, 0x04: AD_UUID32_FORMAT, 0x05: AD_UUID32_FORMAT,
+                        0x06: AD_UUID128_FORMAT, 0x07: AD_UUID128_FORMAT}
 XB_PACKET_TYPE_LENGTH = 1
 
 # xBeacon1 field offsets
 XB_COMPANY_ID_OFFSET = 0
-XB_PACKET_TYPE_OFFSET = XB_COMPANY_ID_OFFSET + len(ADV_COMPANY_ID_XICATO)
+XB_PACKET_TYPE_OFFSET = XB_COMPANY_ID_OFFSET + COMPANY_ID_LENGTH
 
 # Xicato Advertisement Packet Types
 PACKET_TYPE_XB1 = [0x01, 0x01]
@@ -620,6 +783,10 @@ XB_TYPE_UNASSIGNED_DEST = 0x04
 XB_TYPE_UNENCRYPTED = 0x05
 XB_TYPE_ENCRYPTED_FLAG = 0x80
 
+# Packet types tested together by the scan handler, built once here
+XB_TYPES_UNENCRYPTED_PAYLOAD = (XB_TYPE_UNASSIGNED_SOURCE, XB_TYPE_UNENCRYPTED)
+PACKET_TYPES_XSENSOR = (PACKET_TYPE_XSENSOR_MOTION, PACKET_TYPE_XSENSOR_LUX)
+
 UNASSIGNED_RESERVED_LENGTH = 4
 UNASSIGNED_PAYLOAD_MAX_LENGTH = 12
 XB_UNASSIGNED_SOURCE_ADDRESS_OFFSET = XB_PACKET_TYPE_OFFSET + XB_PACKET_TYPE_LENGTH
@@ -725,6 +892,13 @@ XSENSOR_VIN_OFFSET = XSENSOR_TEMPERATURE_OFFSET + 1
 XSENSOR_STATUS_VINLOWER_OFFSET = XSENSOR_VIN_OFFSET + 1
 XSENSOR_VALUE_OFFSET = XSENSOR_STATUS_VINLOWER_OFFSET + 1
 
+# Little-endian field layouts, unpacked in one call per packet
+XB1_FIELDS = struct.Struct('<HBHBBBBBB')    # Intensity to extended Vin
+XB2_FIELDS = struct.Struct('<HHHBB')        # Hours to DALI status
+XSENSOR_FIELDS = struct.Struct('<bBB')      # Temperature, Vin, status/Vin lower
+XDEV_INFO_FIELDS = struct.Struct('<BBBBHB') # HW version to overtemperature threshold
+GROUP_MEMBERS_FORMAT = '<{0}H'               # Format for a number of group members
+
 
 # xBeacon Encrypted field lengths
 XBX_NETWORK_ID_LENGTH = 1
@@ -746,7 +920,7 @@ NONCE_RFU_OFFSET = NONCE_SQN_OFFSET + XBX_SEQUENCE_ID_LENGTH
 
 # xBeacon Encrypted field offsets
 XBX_COMPANY_ID_OFFSET = 0
-XBX_NETWORK_ID_OFFSET = XBX_COMPANY_ID_OFFSET + len(ADV_COMPANY_ID_XICATO)
+XBX_NETWORK_ID_OFFSET = XBX_COMPANY_ID_OFFSET + COMPANY_ID_LENGTH
 XBX_SOURCE_ADDR_OFFSET = XBX_NETWORK_ID_OFFSET + XBX_NETWORK_ID_LENGTH
 XBX_SEQUENCE_ID_OFFSET = XBX_SOURCE_ADDR_OFFSET + XBX_SOURCE_ADDR_LENGTH
 XBX_RFU_OFFSET = XBX_SEQUENCE_ID_OFFSET + XBX_SEQUENCE_ID_LENGTH
@@ -757,6 +931,25 @@ XB_TYPE_ENCRYPTED_FLAG = 0x80
 XBX_HEADER_ENCRYPTED_FLAG = 0x40
 XBX_NETWORK_ID_PARTIAL_ID_MASK = 0x1F
 XBX_SEQUENCE_ID_MAX_VALUE = 2 ** 32
+# The network config file stores a TX sequence number this far ahead of the
+#   one in use, so it is only rewritten once per block of packets. After a
+#   restart the sequence numbers carry on from the stored value, so none
+#   are reused
+XBX_SEQUENCE_ID_RESERVE = 100
+
+# Source address, SQN and RFU of an assigned XBeacon header
+XBX_HEADER = struct.Struct('<HIB')
+# AD flags, manufacturer data header, header byte and unencrypted XBX header
+XB_UNENCRYPTED_ASSIGNED_PACKET = struct.Struct('<8BHIB')
+# AD flags, manufacturer data header, header byte, source address,
+#   destination, zero RFU and payload type of an unassigned XBeacon
+XB_UNASSIGNED_PACKET = struct.Struct('<8BHB4xB')
+# Intensity, fade index and lockout/override/response time byte
+XB_LIGHT_CONTROL_PAYLOAD = struct.Struct('<HBB')
+# Source address and SQN of the AES-CCM nonce, zero padded to NONCE_LENGTH
+XBX_NONCE = struct.Struct('<HI{0}x'.format(NONCE_LENGTH - NONCE_RFU_OFFSET))
+# Any shorter byte string, zero padded (or truncated) to NONCE_LENGTH
+XBX_PADDED_NONCE = struct.Struct('<{0}s'.format(NONCE_LENGTH))
 
 
 # xBeacon Network Info field lengths
@@ -766,7 +959,7 @@ XBN_PARTIAL_NETWORK_ID_LENGTH = 1
 
 # xBeacon Network Info field offsets
 XBN_COMPANY_ID_OFFSET = 0
-XBN_PACKET_TYPE_OFFSET = XBN_COMPANY_ID_OFFSET + len(ADV_COMPANY_ID_XICATO)
+XBN_PACKET_TYPE_OFFSET = XBN_COMPANY_ID_OFFSET + COMPANY_ID_LENGTH
 XBN_PARTIAL_NETWORK_ID_OFFSET = XBN_PACKET_TYPE_OFFSET + XBN_PACKET_TYPE_LENGTH
 XBN_SOURCE_ADDR_OFFSET = XBN_PARTIAL_NETWORK_ID_OFFSET + XBN_PARTIAL_NETWORK_ID_LENGTH
 XBN_SEQUENCE_ID_OFFSET = (XBN_SOURCE_ADDR_OFFSET + XBX_SOURCE_ADDR_LENGTH)
@@ -869,8 +1062,8 @@ MAX_FAILED_CONNECTION_ATTEMPTS = 3
 ENCRYPTION_ENABLED = True
 BONDING_VALUE = 0 # 1 = Bonding Enabled
 
-adminKey = [0] * 16 # networkConfigs[selectedRxNetworkIndex].key
-oemKey = [0] * 16
+adminKey = bytes(NETWORK_KEY_LENGTH) # networkConfigs[selectedRxNetworkIndex].key
+oemKey = bytes(NETWORK_KEY_LENGTH)
 adminMode = False
 
 
@@ -880,144 +1073,160 @@ adminMode = False
 
 readInProgress = False
 
+# UUIDs are stored as bytes, least significant byte first
 # Standard BLE group types
-uuid_service = [0x28, 0x00] # 0x2800
-uuid_client_characteristic_configuration = [0x29, 0x02] # 0x2902
+uuid_service = bytes([0x28, 0x00]) # 0x2800
+uuid_client_characteristic_configuration = bytes([0x29, 0x02]) # 0x2902
 
 # Device Information Service and Characteristics
-uuid_dis_service = [0x18, 0x0A]
-uuid_dis_mfg_name_characteristic = [0x2A, 0x29]
-uuid_dis_model_number_characteristic = [0x2A, 0x24]
-uuid_dis_serial_number_characteristic = [0x2A, 0x25]
-uuid_dis_hardware_rev_characteristic = [0x2A, 0x27]
-uuid_dis_firmware_rev_characteristic = [0x2A, 0x26]
-uuid_dis_software_rev_characteristic = [0x2A, 0x28]
+uuid_dis_service = bytes([0x18, 0x0A])
+uuid_dis_mfg_name_characteristic = bytes([0x2A, 0x29])
+uuid_dis_model_number_characteristic = bytes([0x2A, 0x24])
+uuid_dis_serial_number_characteristic = bytes([0x2A, 0x25])
+uuid_dis_hardware_rev_characteristic = bytes([0x2A, 0x27])
+uuid_dis_firmware_rev_characteristic = bytes([0x2A, 0x26])
+uuid_dis_software_rev_characteristic = bytes([0x2A, 0x28])
 
 # Eddystone-URL Service
-uuid_uriBeacon_service = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x80, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_lock_state_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x81, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_lock_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x82, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_unlock_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x83, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_uri_data_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x84, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_flags_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x85, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_tx_power_levels_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x86, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_tx_power_mode_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x87, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_period_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x88, 0x20, 0x0C, 0xEE]))
-uuid_uriBeacon_reset_characteristic = list(reversed([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x89, 0x20, 0x0C, 0xEE]))
+uuid_uriBeacon_service = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x80, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_lock_state_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x81, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_lock_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x82, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_unlock_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x83, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_uri_data_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x84, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_flags_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x85, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_tx_power_levels_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x86, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_tx_power_mode_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x87, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_period_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x88, 0x20, 0x0C, 0xEE])[::-1]
+uuid_uriBeacon_reset_characteristic = bytes([0xD8, 0x81, 0xC9, 0x1A, 0xB9, 0x99, 0x96, 0xAB, 0xBA, 0x40, 0x86, 0x87, 0x89, 0x20, 0x0C, 0xEE])[::-1]
 
 EDDYSTONE_URI_PREFIXES = ["http://www.", "https://www.", "http://", "https://", "urn:uuid:"]
 EDDYSTONE_URI_SUFFIXES = [".com/", ".org/", ".edu/", ".net/", ".info/", ".biz/", ".gov/", ".com", ".org", ".edu", ".net", ".info", ".biz", ".gov"]
+# Matches the suffixes in list order, so ".com/" is preferred over ".com"
+EDDYSTONE_URI_SUFFIX_PATTERN = re.compile("|".join(re.escape(suffix) for suffix in EDDYSTONE_URI_SUFFIXES))
+EDDYSTONE_URI_SUFFIX_CODES = {suffix: i for i, suffix in enumerate(EDDYSTONE_URI_SUFFIXES)}
 
 # The following services are all Xicato-defined
 # Light Control Service
-uuid_light_control_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x10, 0x9F, 0xAA, 0x4C]))
-uuid_light_control_level_control_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x11, 0x9F, 0xAA, 0x4C]))
-uuid_light_control_indicate_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x12, 0x9F, 0xAA, 0x4C]))
-uuid_light_control_setup_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x13, 0x9F, 0xAA, 0x4C]))
-uuid_light_control_status_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x14, 0x9F, 0xAA, 0x4C]))
-uuid_light_control_scenes_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x15, 0x9F, 0xAA, 0x4C]))
+uuid_light_control_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x10, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_light_control_level_control_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x11, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_light_control_indicate_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x12, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_light_control_setup_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x13, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_light_control_status_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x14, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_light_control_scenes_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x15, 0x9F, 0xAA, 0x4C])[::-1]
 
 # XIM Access Service
-uuid_xim_access_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x20, 0x9F, 0xAA, 0x4C]))
-uuid_device_id_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x21, 0x9F, 0xAA, 0x4C]))
-uuid_access_key_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x23, 0x9F, 0xAA, 0x4C]))
-uuid_access_control_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x24, 0x9F, 0xAA, 0x4C]))
+uuid_xim_access_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x20, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_device_id_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x21, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_key_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x23, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_control_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x24, 0x9F, 0xAA, 0x4C])[::-1]
 
 # V0.075+
-uuid_group_membership_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x22, 0x9F, 0xAA, 0x4C]))
-uuid_access_network_select_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x23, 0x9F, 0xAA, 0x4C]))
-uuid_access_user_login_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x24, 0x9F, 0xAA, 0x4C]))
-uuid_access_config_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x25, 0x9F, 0xAA, 0x4C]))
-uuid_access_admin_login_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x26, 0x9F, 0xAA, 0x4C]))
-uuid_access_network_list_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x27, 0x9F, 0xAA, 0x4C]))
-uuid_access_network_config_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x28, 0x9F, 0xAA, 0x4C]))
-uuid_access_network_header_key_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x29, 0x9F, 0xAA, 0x4C]))
+uuid_group_membership_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x22, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_network_select_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x23, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_user_login_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x24, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_config_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x25, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_admin_login_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x26, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_network_list_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x27, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_network_config_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x28, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_network_header_key_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x29, 0x9F, 0xAA, 0x4C])[::-1]
 
-uuid_access_id_list_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x28, 0x9F, 0xAA, 0x4C]))
+uuid_access_id_list_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x28, 0x9F, 0xAA, 0x4C])[::-1]
 
 # XIM Radio Configuration Service
-uuid_xim_radio_configuration_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x30, 0x9F, 0xAA, 0x4C]))
-uuid_rssi_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x31, 0x9F, 0xAA, 0x4C]))
-uuid_tx_power_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x32, 0x9F, 0xAA, 0x4C]))
-uuid_rx_gain_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x33, 0x9F, 0xAA, 0x4C]))
-uuid_advertisement_settings_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x34, 0x9F, 0xAA, 0x4C]))
+uuid_xim_radio_configuration_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x30, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_rssi_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x31, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_tx_power_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x32, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_rx_gain_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x33, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_advertisement_settings_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x34, 0x9F, 0xAA, 0x4C])[::-1]
 
 # XIM Data Service
-uuid_xim_data_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x50, 0x9F, 0xAA, 0x4C]))
-uuid_xim_priority_data_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x51, 0x9F, 0xAA, 0x4C]))
-uuid_xim_memory_location_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x52, 0x9E, 0xAA, 0x4C]))
-uuid_xim_memory_value_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x53, 0x9E, 0xAA, 0x4C]))
-uuid_xim_temperature_histogram_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x53, 0x9E, 0xAA, 0x4C]))
-uuid_xim_intensity_histogram_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x54, 0x9E, 0xAA, 0x4C]))
-uuid_xim_historic_data_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x52, 0x9E, 0xAA, 0x4C]))
+uuid_xim_data_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x50, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_xim_priority_data_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x51, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_xim_memory_location_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x52, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_xim_memory_value_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x53, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_xim_temperature_histogram_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x53, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_xim_intensity_histogram_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x54, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_xim_historic_data_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x52, 0x9E, 0xAA, 0x4C])[::-1]
 MAX_BANK_DATA_PAYLOAD_SIZE = 16
 
 # iBeacon Service
-uuid_iBeacon_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x60, 0x9F, 0xAA, 0x4C]))
-uuid_iBeacon_uuid_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x61, 0x9F, 0xAA, 0x4C]))
-uuid_iBeacon_major_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x62, 0x9F, 0xAA, 0x4C]))
-uuid_iBeacon_minor_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x63, 0x9F, 0xAA, 0x4C]))
-uuid_iBeacon_measured_power_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x64, 0x9F, 0xAA, 0x4C]))
-uuid_iBeacon_period_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x65, 0x9F, 0xAA, 0x4C]))
+uuid_iBeacon_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x60, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_iBeacon_uuid_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x61, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_iBeacon_major_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x62, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_iBeacon_minor_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x63, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_iBeacon_measured_power_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x64, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_iBeacon_period_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x65, 0x9F, 0xAA, 0x4C])[::-1]
 
 # AltBeacon Service
-uuid_altBeacon_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x80, 0x9F, 0xAA, 0x4C]))
-uuid_altBeacon_company_id_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x81, 0x9F, 0xAA, 0x4C]))
-uuid_altBeacon_beacon_id_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x82, 0x9F, 0xAA, 0x4C]))
-uuid_altBeacon_mfg_data_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x83, 0x9F, 0xAA, 0x4C]))
-uuid_altBeacon_measured_power_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x84, 0x9F, 0xAA, 0x4C]))
-uuid_altBeacon_period_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x85, 0x9F, 0xAA, 0x4C]))
+uuid_altBeacon_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x80, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_altBeacon_company_id_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x81, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_altBeacon_beacon_id_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x82, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_altBeacon_mfg_data_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x83, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_altBeacon_measured_power_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x84, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_altBeacon_period_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x85, 0x9F, 0xAA, 0x4C])[::-1]
 
 # Scan Response Configuration Service
-uuid_scan_response_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x70, 0x9F, 0xAA, 0x4C]))
-uuid_scan_response_device_name_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x71, 0x9F, 0xAA, 0x4C]))
-uuid_scan_response_user_data_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x72, 0x9F, 0xAA, 0x4C]))
+uuid_scan_response_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x70, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_scan_response_device_name_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x71, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_scan_response_user_data_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x72, 0x9F, 0xAA, 0x4C])[::-1]
 
 DEVICE_NAME_MAX_LENGTH = 20
 
 # DALI Service
-uuid_dali_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x40, 0x9E, 0xAA, 0x4C]))
-uuid_dali_command_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x41, 0x9E, 0xAA, 0x4C]))
+uuid_dali_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x40, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_dali_command_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x41, 0x9E, 0xAA, 0x4C])[::-1]
 
-uuid_dali_status_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x43, 0x9E, 0xAA, 0x4C]))
-uuid_dali_light_config_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x44, 0x9E, 0xAA, 0x4C]))
-uuid_dali_address_config_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x45, 0x9E, 0xAA, 0x4C]))
-uuid_dali_scenes_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x46, 0x9E, 0xAA, 0x4C]))
+uuid_dali_status_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x43, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_dali_light_config_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x44, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_dali_address_config_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x45, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_dali_scenes_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x46, 0x9E, 0xAA, 0x4C])[::-1]
 
 
 # 1-10V Service
-uuid_dim_1_10V_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x30, 0x9E, 0xAA, 0x4C]))
-uuid_dim_1_10V_status_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x31, 0x9E, 0xAA, 0x4C]))
-uuid_dim_1_10V_config_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x32, 0x9E, 0xAA, 0x4C]))
+uuid_dim_1_10V_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x30, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_dim_1_10V_status_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x31, 0x9E, 0xAA, 0x4C])[::-1]
+uuid_dim_1_10V_config_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x32, 0x9E, 0xAA, 0x4C])[::-1]
 
 
 #Legacy
-uuid_dali_response_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x42, 0x9E, 0xAA, 0x4C]))
+uuid_dali_response_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x42, 0x9E, 0xAA, 0x4C])[::-1]
 
 # Bootloader Service
-uuid_bls_service = list(reversed([0x1B, 0xC5, 0xD5, 0xA5, 0x02, 0x00, 0xF4, 0xAB, 0xE4, 0x11, 0xCE, 0xF8, 0x00, 0x00, 0x06, 0x00]))
-uuid_bls_command_characteristic = list(reversed([0x1B, 0xC5, 0xD5, 0xA5, 0x02, 0x00, 0xF4, 0xAB, 0xE4, 0x11, 0xCE, 0xF8, 0x01, 0x00, 0x06, 0x00]))
+uuid_bls_service = bytes([0x1B, 0xC5, 0xD5, 0xA5, 0x02, 0x00, 0xF4, 0xAB, 0xE4, 0x11, 0xCE, 0xF8, 0x00, 0x00, 0x06, 0x00])[::-1]
+uuid_bls_command_characteristic = bytes([0x1B, 0xC5, 0xD5, 0xA5, 0x02, 0x00, 0xF4, 0xAB, 0xE4, 0x11, 0xCE, 0xF8, 0x01, 0x00, 0x06, 0x00])[::-1]
 
 # Sensor Response Configuration Service
-uuid_sensor_response_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x90, 0x9F, 0xAA, 0x4C]))
-uuid_sensor1_response_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x91, 0x9F, 0xAA, 0x4C]))
-uuid_sensor2_response_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x92, 0x9F, 0xAA, 0x4C]))
+uuid_sensor_response_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x90, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_sensor1_response_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x91, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_sensor2_response_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x92, 0x9F, 0xAA, 0x4C])[::-1]
 ##uuid_scan_response_user_data_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0x92, 0x9F, 0xAA, 0x4C]))
 
 # OEM Service
-uuid_oem_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA0, 0x9F, 0xAA, 0x4C]))
-uuid_access_oem_login_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA1, 0x9F, 0xAA, 0x4C]))
-uuid_access_oem_data_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA2, 0x9F, 0xAA, 0x4C]))
+uuid_oem_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA0, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_oem_login_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA1, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_access_oem_data_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA2, 0x9F, 0xAA, 0x4C])[::-1]
 
 
 
 # XSensor
 
 # Sensor Configuration Service
-uuid_sensor_config_service = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA0, 0x9F, 0xAA, 0x4C]))
-uuid_sensor_general_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA1, 0x9F, 0xAA, 0x4C]))
-uuid_sensor_lux_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA2, 0x9F, 0xAA, 0x4C]))
-uuid_sensor_motion_characteristic = list(reversed([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA3, 0x9F, 0xAA, 0x4C]))
+uuid_sensor_config_service = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA0, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_sensor_general_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA1, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_sensor_lux_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA2, 0x9F, 0xAA, 0x4C])[::-1]
+uuid_sensor_motion_characteristic = bytes([0x7A, 0xDF, 0x74, 0xF0, 0x0B, 0xD3, 0x15, 0x8E, 0xD3, 0x44, 0xDF, 0x2A, 0xA3, 0x9F, 0xAA, 0x4C])[::-1]
+
+# The uuid_* constants by their over-the-air byte order (least significant byte
+#   first), so received UUIDs map straight onto the shared constants
+UUIDS_BY_WIRE_ORDER = {value[::-1]: value for name, value in list(globals().items()) if name.startswith('uuid_') and isinstance(value, bytes)}
+
+# Returns the UUID for the given over-the-air UUID bytes
+def GetUuidFromWire(uuidData):
+    wireUuid = bytes(uuidData)
+    uuid = UUIDS_BY_WIRE_ORDER.get(wireUuid)
+    if(uuid is None):
+        uuid = wireUuid[::-1]
+    return uuid
 
 SERVICE_ATTRIBUTES_NONE = 0
 SERVICE_ATTRIBUTES_FINDING = 1
@@ -1025,6 +1234,8 @@ SERVICE_ATTRIBUTES_FOUND = 2
 
 # The ServiceInfo class stores the information about each service
 class ServiceInfo(object):
+    __slots__ = ('uuid', 'handle', 'att_handle_start', 'att_handle_end', 'attributesDiscovered')
+
     def __init__(self, id):
         self.uuid = id
         self.handle = None
@@ -1034,6 +1245,8 @@ class ServiceInfo(object):
 
 # The AttributeInfo class stores the information about each characteristic
 class AttributeInfo(object):
+    __slots__ = ('uuid', 'handle', 'value', 'hasCCC', 'cccHandle', 'cccValue', 'notifiedValue')
+
     def __init__(self, id, hasCCC = False):
         self.uuid = id
         self.handle = None
@@ -1043,6 +1256,19 @@ class AttributeInfo(object):
         self.cccValue = None
         self.notifiedValue = None
 
+# The AttributeIndex class stores dicts of a device's attribute list by UUID and
+#   by handle. Each entry is a list of the matching attributes, in list order
+class AttributeIndex(object):
+    __slots__ = ('attributeList', 'length', 'byUuid', 'byHandle')
+
+    def __init__(self, attributeList):
+        self.attributeList = attributeList
+        self.length = len(attributeList)
+        self.byUuid = {}
+        for attr in attributeList:
+            self.byUuid.setdefault(attr.uuid, []).append(attr)
+        self.byHandle = None
+
 
 # ######################################
 # Device Information
@@ -1059,8 +1285,60 @@ STATE_LISTENING_DATA = 6
 STATE_DISCONNECTING = 7
 STATE_ENCRYPTING = 8
 
+# Services and characteristics supported by each device type. Each device
+#   gets its own ServiceInfo and AttributeInfo objects built from these, since
+#   the handles and values found are stored in them
+DIS_ATTRIBUTE_UUIDS = (uuid_dis_mfg_name_characteristic, uuid_dis_model_number_characteristic, uuid_dis_serial_number_characteristic,
+                       uuid_dis_hardware_rev_characteristic, uuid_dis_firmware_rev_characteristic, uuid_dis_software_rev_characteristic)
+
+RADIO_ATTRIBUTE_UUIDS = (uuid_rssi_characteristic, uuid_tx_power_characteristic, uuid_rx_gain_characteristic,
+                         uuid_advertisement_settings_characteristic)
+
+BEACON_ATTRIBUTE_UUIDS = (uuid_iBeacon_uuid_characteristic, uuid_iBeacon_major_characteristic, uuid_iBeacon_minor_characteristic,
+                            uuid_iBeacon_measured_power_characteristic, uuid_iBeacon_period_characteristic,
+
+                          uuid_uriBeacon_lock_state_characteristic, uuid_uriBeacon_lock_characteristic,
+                            uuid_uriBeacon_unlock_characteristic, uuid_uriBeacon_uri_data_characteristic, uuid_uriBeacon_flags_characteristic,
+                            uuid_uriBeacon_tx_power_levels_characteristic, uuid_uriBeacon_tx_power_mode_characteristic, uuid_uriBeacon_period_characteristic,
+                            uuid_uriBeacon_reset_characteristic,
+
+                          uuid_altBeacon_company_id_characteristic, uuid_altBeacon_beacon_id_characteristic, uuid_altBeacon_mfg_data_characteristic,
+                            uuid_altBeacon_measured_power_characteristic, uuid_altBeacon_period_characteristic,
+
+                          uuid_scan_response_device_name_characteristic, uuid_scan_response_user_data_characteristic)
+
+XIM_SERVICE_UUIDS = (uuid_dis_service, uuid_xim_access_service, uuid_dali_service, uuid_xim_radio_configuration_service, uuid_xim_data_service,
+                     uuid_iBeacon_service, uuid_uriBeacon_service, uuid_altBeacon_service, uuid_scan_response_service,
+                     uuid_light_control_service)
+
+XIM_ATTRIBUTE_UUIDS = (DIS_ATTRIBUTE_UUIDS + RADIO_ATTRIBUTE_UUIDS + (uuid_xim_priority_data_characteristic,) + BEACON_ATTRIBUTE_UUIDS +
+                       (uuid_light_control_level_control_characteristic, uuid_light_control_indicate_characteristic, uuid_light_control_setup_characteristic,
+                        uuid_light_control_status_characteristic))
+
+XSENSOR_SERVICE_UUIDS = (uuid_dis_service, uuid_xim_access_service, uuid_xim_radio_configuration_service,
+                         uuid_iBeacon_service, uuid_uriBeacon_service, uuid_altBeacon_service, uuid_scan_response_service,
+                         uuid_sensor_config_service)
+
+XSENSOR_ATTRIBUTE_UUIDS = DIS_ATTRIBUTE_UUIDS + RADIO_ATTRIBUTE_UUIDS + BEACON_ATTRIBUTE_UUIDS
+
 # The BleDevice class stores generic information about BLE device
 class BleDevice(object):
+    # The slots cover the fields of every device type, since the packet
+    #   handlers set fields on whichever type of device sent the packet
+    __slots__ = ('ble', 'ser', 'address', '_swVersion', 'swVersionValue', 'hwVersion', 'address_type', 'deviceType',
+                 'connection_handle', 'connectionState', 'connectionSent', 'connectionAttemptTime', 'disconnectTime',
+                 'unexpectedDisconnections', 'failedConnectionAttempts', 'longConnectionTime', 'deviceName',
+                 'lastScanTime', 'encryptionRequired', 'bootloaderMode', 'bootloaderModeUpdateTime', 'packetStatus',
+                 'bulkPacketTransferred', 'encryptedAdv', 'adminLoggedIn', 'hasEncryptedHeader', 'txNetwork',
+                 'groups', 'receivedAllGroups', 'requestGroupAttempts', 'lastGroupRequestTime', 'serviceList',
+                 'attributeList', 'blServiceList', 'blAttributeList', 'attributeIndex', 'pcRssiValue',
+                 'scannedDeviceId', 'scannedProductId', 'scannedIntensity', 'scannedPower', 'scannedStatus',
+                 'scannedLedTemperature', 'scannedPcbTemperature', 'scannedVin', 'scannedVinRipple',
+                 'scannedLockoutTimeRemaining', 'scannedHours', 'scannedPowerCycles', 'scannedLedCycles',
+                 'daliStatus', 'scannedRssi', 'ledControllerVersion', 'programmedFlux', 'overloadTemperature',
+                 'xb1UpdateTime', 'xb2UpdateTime', 'deviceInfoUpdateTime', 'scannedTemperature', 'scannedLux',
+                 'scannedMotion', 'fwVersion', 'motionUpdateTime', 'luxUpdateTime', 'historyUpdateTime')
+
     def __init__(self, ble, ser, address, address_type, deviceType):
         self.ble = ble #,
         self.ser = ser
@@ -1098,6 +1376,7 @@ class BleDevice(object):
 
         self.blServiceList = [ServiceInfo(uuid_bls_service)]
         self.blAttributeList = [  AttributeInfo(uuid_bls_command_characteristic)]
+        self.attributeIndex = None
 
 
     def IsConnected(self):
@@ -1112,8 +1391,24 @@ class BleDevice(object):
     def IsEncryptedAdv(self):
         return self.encryptedAdv
 
+    # swVersionValue is the software version as a float, or None when it is
+    #   unknown or can't be parsed, so the version checks don't reparse it
+    @property
+    def swVersion(self):
+        return self._swVersion
+
+    @swVersion.setter
+    def swVersion(self, swVersion):
+        self._swVersion = swVersion
+        try:
+            self.swVersionValue = float(swVersion)
+        except (TypeError, ValueError):
+            self.swVersionValue = None
+
 # The XimBleDevice class stores information that is specific to XIM BLE devices
 class XimBleDevice(BleDevice):
+    __slots__ = ()
+
     def __init__(self, ble, ser, address, address_type):
         BleDevice.__init__(self, ble, ser, address, address_type, DEVICE_TYPE_XIM)
 
@@ -1152,47 +1447,18 @@ class XimBleDevice(BleDevice):
 
     def InitializeServiceAttributeList(self):
         # Contains the list of all supported services
-        self.serviceList = [ServiceInfo(uuid_dis_service), ServiceInfo(uuid_xim_access_service), ServiceInfo(uuid_dali_service), ServiceInfo(uuid_xim_radio_configuration_service), ServiceInfo(uuid_xim_data_service),
-                                     ServiceInfo(uuid_iBeacon_service), ServiceInfo(uuid_uriBeacon_service), ServiceInfo(uuid_altBeacon_service), ServiceInfo(uuid_scan_response_service),
-                                     ServiceInfo(uuid_light_control_service)]
-
-
+        self.serviceList = [ServiceInfo(uuid) for uuid in XIM_SERVICE_UUIDS]
 
         # Contains the list of all supported characteristics
-        self.attributeList = [  AttributeInfo(uuid_dis_mfg_name_characteristic), AttributeInfo(uuid_dis_model_number_characteristic), AttributeInfo(uuid_dis_serial_number_characteristic),
-                                    AttributeInfo(uuid_dis_hardware_rev_characteristic), AttributeInfo(uuid_dis_firmware_rev_characteristic), AttributeInfo(uuid_dis_software_rev_characteristic),
-
-                                AttributeInfo(uuid_rssi_characteristic), AttributeInfo(uuid_tx_power_characteristic), AttributeInfo(uuid_rx_gain_characteristic),
-                                    AttributeInfo(uuid_advertisement_settings_characteristic),
-
-                                AttributeInfo(uuid_xim_priority_data_characteristic),
-
-                                AttributeInfo(uuid_iBeacon_uuid_characteristic), AttributeInfo(uuid_iBeacon_major_characteristic), AttributeInfo(uuid_iBeacon_minor_characteristic),
-                                    AttributeInfo(uuid_iBeacon_measured_power_characteristic), AttributeInfo(uuid_iBeacon_period_characteristic),
-
-                                AttributeInfo(uuid_uriBeacon_lock_state_characteristic), AttributeInfo(uuid_uriBeacon_lock_characteristic),
-                                    AttributeInfo(uuid_uriBeacon_unlock_characteristic), AttributeInfo(uuid_uriBeacon_uri_data_characteristic), AttributeInfo(uuid_uriBeacon_flags_characteristic),
-                                    AttributeInfo(uuid_uriBeacon_tx_power_levels_characteristic), AttributeInfo(uuid_uriBeacon_tx_power_mode_characteristic), AttributeInfo(uuid_uriBeacon_period_characteristic),
-                                    AttributeInfo(uuid_uriBeacon_reset_characteristic),
-
-                                AttributeInfo(uuid_altBeacon_company_id_characteristic), AttributeInfo(uuid_altBeacon_beacon_id_characteristic), AttributeInfo(uuid_altBeacon_mfg_data_characteristic),
-                                    AttributeInfo(uuid_altBeacon_measured_power_characteristic), AttributeInfo(uuid_altBeacon_period_characteristic),
-
-                                AttributeInfo(uuid_scan_response_device_name_characteristic), AttributeInfo(uuid_scan_response_user_data_characteristic),
-
-                                AttributeInfo(uuid_light_control_level_control_characteristic), AttributeInfo(uuid_light_control_indicate_characteristic), AttributeInfo(uuid_light_control_setup_characteristic),
-                                    AttributeInfo(uuid_light_control_status_characteristic)
-
-                                ]
+        self.attributeList = [AttributeInfo(uuid) for uuid in XIM_ATTRIBUTE_UUIDS]
 
 # The XSensorBleDevice class stores information that is specific to Xicato Sensor devices
 class XSensorBleDevice(BleDevice):
+    __slots__ = ()
+
     def __init__(self, ble, ser, address, address_type):
         BleDevice.__init__(self, ble, ser, address, address_type, DEVICE_TYPE_XSENSOR)
 
-        self.blServiceList = [ServiceInfo(uuid_bls_service)]
-        self.blAttributeList = [  AttributeInfo(uuid_bls_command_characteristic)]
-
         self.pcRssiValue = None
 
         # xBeacon1 Fields
@@ -1221,34 +1487,10 @@ class XSensorBleDevice(BleDevice):
 
     def InitializeServiceAttributeList(self):
         # Contains the list of all supported services
-        self.serviceList = [ServiceInfo(uuid_dis_service), ServiceInfo(uuid_xim_access_service), ServiceInfo(uuid_xim_radio_configuration_service),
-                                     ServiceInfo(uuid_iBeacon_service), ServiceInfo(uuid_uriBeacon_service), ServiceInfo(uuid_altBeacon_service), ServiceInfo(uuid_scan_response_service),
-                                     ServiceInfo(uuid_sensor_config_service)]
-
+        self.serviceList = [ServiceInfo(uuid) for uuid in XSENSOR_SERVICE_UUIDS]
 
         # Contains the list of all supported characteristics
-        self.attributeList = [  AttributeInfo(uuid_dis_mfg_name_characteristic), AttributeInfo(uuid_dis_model_number_characteristic), AttributeInfo(uuid_dis_serial_number_characteristic),
-                                    AttributeInfo(uuid_dis_hardware_rev_characteristic), AttributeInfo(uuid_dis_firmware_rev_characteristic), AttributeInfo(uuid_dis_software_rev_characteristic),
-
-                                AttributeInfo(uuid_rssi_characteristic), AttributeInfo(uuid_tx_power_characteristic), AttributeInfo(uuid_rx_gain_characteristic),
-                                    AttributeInfo(uuid_advertisement_settings_characteristic),
-
-                                AttributeInfo(uuid_iBeacon_uuid_characteristic), AttributeInfo(uuid_iBeacon_major_characteristic), AttributeInfo(uuid_iBeacon_minor_characteristic),
-                                    AttributeInfo(uuid_iBeacon_measured_power_characteristic), AttributeInfo(uuid_iBeacon_period_characteristic),
-
-                                AttributeInfo(uuid_uriBeacon_lock_state_characteristic), AttributeInfo(uuid_uriBeacon_lock_characteristic),
-                                    AttributeInfo(uuid_uriBeacon_unlock_characteristic), AttributeInfo(uuid_uriBeacon_uri_data_characteristic), AttributeInfo(uuid_uriBeacon_flags_characteristic),
-                                    AttributeInfo(uuid_uriBeacon_tx_power_levels_characteristic), AttributeInfo(uuid_uriBeacon_tx_power_mode_characteristic), AttributeInfo(uuid_uriBeacon_period_characteristic),
-                                    AttributeInfo(uuid_uriBeacon_reset_characteristic),
-
-                                AttributeInfo(uuid_altBeacon_company_id_characteristic), AttributeInfo(uuid_altBeacon_beacon_id_characteristic), AttributeInfo(uuid_altBeacon_mfg_data_characteristic),
-                                    AttributeInfo(uuid_altBeacon_measured_power_characteristic), AttributeInfo(uuid_altBeacon_period_characteristic),
-
-                                AttributeInfo(uuid_scan_response_device_name_characteristic), AttributeInfo(uuid_scan_response_user_data_characteristic)
-
-
-
-                                ]
+        self.attributeList = [AttributeInfo(uuid) for uuid in XSENSOR_ATTRIBUTE_UUIDS]
 
 
 # ######################################
@@ -1256,7 +1498,6 @@ class XSensorBleDevice(BleDevice):
 # ######################################
 
 networkConfigs = []
-aesNonce = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
 
 ##NETWORK_STATE_DISABLED = 0
 ##NETWORK_STATE_SCANNING = 1
@@ -1264,11 +1505,36 @@ aesNonce = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x
 ##NETWORK_STATE_SYNCED = 3
 ##
 class NetworkConfig(object):
+    __slots__ = ('id', '_headerKey', 'headerKeyBytes', '_key', 'keyBytes', 'txSqn', 'savedSqn')
+
     def __init__(self, id, networkHeaderKey, key, sqn):
         self.id = id
         self.headerKey = networkHeaderKey
         self.key = key
         self.txSqn = sqn
+        # The sequence number stored in the network config file
+        self.savedSqn = sqn
+
+    # The keys are kept as lists for the config file and web API. The bytes
+    #   copies are what the cipher cache is keyed on, so they are rebuilt
+    #   whenever a key is assigned rather than on every packet
+    @property
+    def headerKey(self):
+        return self._headerKey
+
+    @headerKey.setter
+    def headerKey(self, networkHeaderKey):
+        self._headerKey = networkHeaderKey
+        self.headerKeyBytes = BytesToString(networkHeaderKey)
+
+    @property
+    def key(self):
+        return self._key
+
+    @key.setter
+    def key(self, key):
+        self._key = key
+        self.keyBytes = BytesToString(key)
 
     def Print(self):
         print("id: {0}, headerKey: {3}, key: {1}, txSqn: {2}".format(self.id, self.key, self.txSqn, self.headerKey))
@@ -1295,11 +1561,11 @@ class NetworkConfig(object):
 
 # Converts an intensity (0-100%) to the format that the XIM uses (10000 = 100%)
 def ConvertIntensityToValue(intensity):
-    return int(round(intensity * 100.0, 0))
+    return round(intensity * 100.0)
 
 # Converts the format that the XIM uses (10000 = 100%) to an intensity (0-100%)
 def ConvertValueToIntensity(value):
-    return (float(value) / 100.0)
+    return value / 100.0
 
 # Advertisement parameters are updated
 def my_ble_rsp_gap_set_adv_parameters(sender, args):
@@ -1375,32 +1641,29 @@ def BroadcastCommand(packetType, txPacket):
     print ("fullPacket: {0}".format(fullPacket))
 
     TransmitAdvertisement(fullPacket)
-    UpdateNetworkConfigFile()
+    SaveTxSequenceNumber()
 
 def BroadcastIXBUnassigned(destination, payloadType, payload):
     payload = [payloadType] + destination [1:3] + payload
-    xbUnassigned = [AD1_LENGTH, AD1_TYPE, AD1_VALUE, 17, 0x07]
-    xbUnassigned.append(destination[0])
-    xbUnassigned += [XBX_RFU_VALUE] * 4
-    xbUnassigned += payload
-    xbUnassigned += [0] * (11 - len(payload))
-    xbUnassigned += [0x09, 0x09] # , 0x58, 0x49, 0x35, 0x42, 0x31, 0x32, 0x33, 0x34]
-    xbUnassigned += [ord('X'), ord('I')]
-    xbUnassigned += HexToAsciiList(XB_TYPE_UNASSIGNED_DEST)
-    xbUnassigned += GetLocalSourceAsciiAddress()  # Source address
-
-    logHandler.printLog("Unassigned iXB packet: {0}".format(xbUnassigned), True)
+    xbUnassigned = bytearray((AD1_LENGTH, AD1_TYPE, AD1_VALUE, 17, 0x07, destination[0]))
+    xbUnassigned.extend([XBX_RFU_VALUE] * 4)
+    xbUnassigned.extend(payload)
+    xbUnassigned.extend([0] * (11 - len(payload)))
+    xbUnassigned.extend(ADV_IXB_NAME_FIELD) # , 0x58, 0x49, 0x35, 0x42, 0x31, 0x32, 0x33, 0x34]
+    xbUnassigned.extend(HEX_ASCII_PAIRS[XB_TYPE_UNASSIGNED_DEST])
+    xbUnassigned.extend(GetLocalSourceAsciiAddress())  # Source address
+
+    logHandler.printLog("Unassigned iXB packet: {0}".format(list(xbUnassigned)), True)
     TransmitAdvertisement(xbUnassigned)
 
+# The two ASCII hex digits of each byte value
+HEX_ASCII_PAIRS = tuple(("%.2X" % hexValue).encode('ascii') for hexValue in range(256))
+
 def HexListToAsciiList(hexList):
-    asciiList = []
-    for hexValue in hexList:
-        asciiList += HexToAsciiList(hexValue)
-    return asciiList
+    return list(b''.join([HEX_ASCII_PAIRS[hexValue] for hexValue in hexList]))
 
 def HexToAsciiList(hexValue):
-    hexString = "%.2X" % hexValue
-    return [ord(hexString[0]), ord(hexString[1])]
+    return list(HEX_ASCII_PAIRS[hexValue])
 
 def GetLocalSourceAddress():
     return bleLocalDeviceId
@@ -1414,89 +1677,87 @@ def BroadcastIXBAssigned(destination, payloadType, payload):
 
     payload = [payloadType] + destinationList + payload
 
-    networkConfigs[selectedTxNetworkIndex].txSqn += 1
-    if(networkConfigs[selectedTxNetworkIndex].txSqn >= XBX_SEQUENCE_ID_MAX_VALUE):
-        networkConfigs[selectedTxNetworkIndex].txSqn = 1
+    # The TX network is looked up once for the sequence number, nonce, keys
+    #   and header byte
+    txNetwork = networkConfigs[selectedTxNetworkIndex]
+    txNetwork.txSqn += 1
+    if(txNetwork.txSqn >= XBX_SEQUENCE_ID_MAX_VALUE):
+        txNetwork.txSqn = 1
 
 
 ##    if(((networkConfigs[selectedTxNetworkIndex].key != NETWORK_KEY_NONE) and IsGroupAddress(destination)) or (IsEncryptedAdvEnabled(destination))):
-    if((IsEncryptedAdvEnabled(destination)) and (adminMode or (networkConfigs[selectedTxNetworkIndex].key != NETWORK_KEY_NONE))):
+    # IsEncryptedAdvEnabled is False whenever the TX network has no key, so
+    #   there is nothing else to check before taking the encrypted path
+    if(IsEncryptedAdvEnabled(destination)):
 
-        aesNonce[NONCE_SOURCE_ADDR_OFFSET: NONCE_SOURCE_ADDR_OFFSET + XBX_SOURCE_ADDR_LENGTH] = ConvertIntToList(GetLocalSourceAddress(), 2)
-        aesNonce[NONCE_SQN_OFFSET: NONCE_SQN_OFFSET + XBX_SEQUENCE_ID_LENGTH] = ConvertIntToList(networkConfigs[selectedTxNetworkIndex].txSqn, XBX_SEQUENCE_ID_LENGTH)
+        sourceAddress = GetLocalSourceAddress()
+        header = list(XBX_HEADER.pack(sourceAddress, txNetwork.txSqn, XBX_RFU_VALUE))
+        aesNonce = XBX_NONCE.pack(sourceAddress, txNetwork.txSqn)
 ##        aesNonce[NONCE_RFU_OFFSET: NONCE_RFU_OFFSET + XBX_RFU_LENGTH] = [0] * XBX_RFU_LENGTH
 
-        logHandler.printLog("aesNonce: {0}".format(aesNonce))
-        logHandler.printLog("aesKey: {0}".format(networkConfigs[selectedTxNetworkIndex].key))
+        logHandler.printDebug("aesNonce: {0}", aesNonce)
+        logHandler.printDebug("aesKey: {0}", txNetwork.key)
 
-        eMsg, eMic = AesCcmEncrypt(networkConfigs[selectedTxNetworkIndex].key, aesNonce, payload)
+        eMsg, eMic = AesCcmEncrypt(txNetwork.keyBytes, aesNonce, payload)
 
 
-        headerByte = (XB_TYPE_ENCRYPTED_FLAG + (networkConfigs[selectedTxNetworkIndex].id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK))
+        headerByte = (XB_TYPE_ENCRYPTED_FLAG + (txNetwork.id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK))
 
 
-        header = ConvertIntToList(bleLocalDeviceId, 2) + ConvertIntToList(networkConfigs[selectedTxNetworkIndex].txSqn, XBX_SEQUENCE_ID_LENGTH) + [0] * XBX_RFU_LENGTH
-        logHandler.printLog("Header: {0}".format(header))
-        logHandler.printLog("Header key: {0}".format(networkConfigs[selectedTxNetworkIndex].headerKey))
+        logHandler.printDebug("Header: {0}", header)
+        logHandler.printDebug("Header key: {0}", txNetwork.headerKey)
 
 ##        if((IsEncryptedHeaderEnabled(destination)) and (len(networkConfigs[selectedTxNetworkIndex].headerKey) == NETWORK_KEY_LENGTH) and (networkConfigs[selectedTxNetworkIndex].headerKey != [0] * NETWORK_KEY_LENGTH)):
 ##            headerByte |= XBX_HEADER_ENCRYPTED_FLAG
         payloadAndMic = eMsg + eMic
-        headerNonce = [0] * NONCE_LENGTH
-        tempLength = min(NONCE_LENGTH, len(payloadAndMic))
-        for i in range(tempLength):
-            headerNonce[i] = payloadAndMic[i]
+        headerNonce = XBX_PADDED_NONCE.pack(bytes(payloadAndMic[:NONCE_LENGTH]))
 
-        logHandler.printLog("headerKey: {0}, headerNonce: {1}".format(networkConfigs[selectedTxNetworkIndex].headerKey, headerNonce))
-        header, unusedMic = AesCcmEncrypt(networkConfigs[selectedTxNetworkIndex].headerKey, headerNonce, header) #[0x31, 0x32, 0x33, 0x34] # Source address)
-        logHandler.printLog("TX Encrypted header: {0}".format(header))
+        logHandler.printDebug("headerKey: {0}, headerNonce: {1}", txNetwork.headerKey, headerNonce)
+        # Receivers always decrypt the header, so it is encrypted even with an
+        #   all zero header key. A header key equal to the key shares its cipher
+        header, unusedMic = AesCcmEncrypt(txNetwork.headerKeyBytes, headerNonce, header) #[0x31, 0x32, 0x33, 0x34] # Source address)
+        logHandler.printDebug("TX Encrypted header: {0}", header)
 
-        xbAssigned = [AD1_LENGTH, AD1_TYPE, AD1_VALUE, 10 + len(payload), 0x07]
-        xbAssigned += header[XBX_SOURCE_ADDR_LENGTH:XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH]
-        xbAssigned += header[XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH:XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH + XBX_RFU_LENGTH]
-        xbAssigned += eMsg + eMic
+        xbAssigned = bytearray((AD1_LENGTH, AD1_TYPE, AD1_VALUE, 10 + len(payload), 0x07))
+        xbAssigned.extend(header[XBX_SOURCE_ADDR_LENGTH:XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH + XBX_RFU_LENGTH])
+        xbAssigned.extend(eMsg)
+        xbAssigned.extend(eMic)
 
-        xbAssigned += [0x09, 0x09] # , 0x58, 0x49, 0x35, 0x42, 0x31, 0x32, 0x33, 0x34]
-        xbAssigned += [ord('X'), ord('I')]
+        xbAssigned.extend(ADV_IXB_NAME_FIELD) # , 0x58, 0x49, 0x35, 0x42, 0x31, 0x32, 0x33, 0x34]
 
         print ("headerByte: {0}".format(headerByte))
-        xbAssigned += HexToAsciiList(headerByte)
+        xbAssigned.extend(HEX_ASCII_PAIRS[headerByte])
 ##        xbAssigned += [ord('0'), ord('5')]
-        xbAssigned += HexListToAsciiList(header[:XBX_SOURCE_ADDR_LENGTH])
+        for addressByte in header[:XBX_SOURCE_ADDR_LENGTH]:
+            xbAssigned.extend(HEX_ASCII_PAIRS[addressByte])
 
-        logHandler.printLog("Encrypted assigned iXB packet: {0}".format(xbAssigned), True)
+        logHandler.printLog("Encrypted assigned iXB packet: {0}".format(list(xbAssigned)), True)
     else:
-        xbAssigned = [AD1_LENGTH, AD1_TYPE, AD1_VALUE, 17, 0x07]
-        xbAssigned += ConvertIntToList(networkConfigs[selectedTxNetworkIndex].txSqn, XBX_SEQUENCE_ID_LENGTH)
+        xbAssigned = bytearray((AD1_LENGTH, AD1_TYPE, AD1_VALUE, 17, 0x07))
+        # txSqn was just wrapped into 1 to XBX_SEQUENCE_ID_MAX_VALUE - 1, so it always fits
+        xbAssigned.extend(txNetwork.txSqn.to_bytes(XBX_SEQUENCE_ID_LENGTH, 'little'))
         xbAssigned.append(XBX_RFU_VALUE)
-        xbAssigned += payload
-        xbAssigned += [0] * (11 - len(payload))
-        xbAssigned += [0x09, 0x09] # , 0x58, 0x49, 0x35, 0x42, 0x31, 0x32, 0x33, 0x34]
-        xbAssigned += [ord('X'), ord('I')]
-        xbAssigned += HexToAsciiList(XB_TYPE_UNENCRYPTED)
-        xbAssigned += GetLocalSourceAsciiAddress() # Source address
+        xbAssigned.extend(payload)
+        xbAssigned.extend([0] * (11 - len(payload)))
+        xbAssigned.extend(ADV_IXB_NAME_FIELD) # , 0x58, 0x49, 0x35, 0x42, 0x31, 0x32, 0x33, 0x34]
+        xbAssigned.extend(HEX_ASCII_PAIRS[XB_TYPE_UNENCRYPTED])
+        xbAssigned.extend(GetLocalSourceAsciiAddress()) # Source address
 
-        logHandler.printLog("Unencrypted assigned iXB packet: {0}".format(xbAssigned), True)
+        logHandler.printLog("Unencrypted assigned iXB packet: {0}".format(list(xbAssigned)), True)
 
 
     TransmitAdvertisement(xbAssigned)
 
-    UpdateNetworkConfigFile()
+    SaveTxSequenceNumber()
 
 def IsOobSupported(destination):
     devices = GetDevicesInGroup(destination)
 
     isSupported = (len(devices) > 0)
     for device in devices:
-        if(device.deviceType == DEVICE_TYPE_XIM):
-            try:
-                swVersionValue = float(device.swVersion)
-                if(swVersionValue < 0.081):
-                    isSupported = False
-            except:
-                isSupported = False
-        else:
+        if(device.deviceType != DEVICE_TYPE_XIM) or (device.swVersionValue is None) or (device.swVersionValue < 0.081):
             isSupported = False
+            break
 
 ##        if(device.encryptedAdv == False):
 ##            isSupported = False
@@ -1514,7 +1775,7 @@ def SetOobData(destination):
     if(len(destination) == 1):
         if(bootloadRunning or adminMode): #  (adminMode and IsEncryptedAdvEnabled(destination))
             oobData = ADMIN_KEY_DEFAULT
-        elif((IsEncryptedAdvEnabled(destination)) and (networkConfigs[selectedTxNetworkIndex].key != NETWORK_KEY_NONE) and (IsOobSupported(destination))):
+        elif((IsEncryptedAdvEnabled(destination)) and (IsOobSupported(destination))):
             oobData = networkConfigs[selectedTxNetworkIndex].key
         else:
             oobData = []
@@ -1538,16 +1799,11 @@ def SetXBPacket(destination, payloadType, payload):
 ##        BroadcastIXBAssigned(destination, payloadType, payload)
 
 def SetXBUnassignedPacket(destination, payloadType, payload):
-    xbUnassigned = [AD1_LENGTH, AD1_TYPE, AD1_VALUE, 11 + len(payload) + len(destination), 0xFF, 0x53, 0x02]
-
-    xbUnassigned.append(XB_TYPE_UNASSIGNED_DEST)
-    xbUnassigned += ConvertIntToList(bleLocalDeviceId, 2) # Source address
-    xbUnassigned.append(destination[0])
-    xbUnassigned += [0] * 4
-    xbUnassigned.append(payloadType)
-    xbUnassigned += destination [1:3]
-    xbUnassigned += payload
-    logHandler.printLog("xbUnassigned: {0}".format(xbUnassigned))
+    xbUnassigned = bytearray(XB_UNASSIGNED_PACKET.pack(AD1_LENGTH, AD1_TYPE, AD1_VALUE, 11 + len(payload) + len(destination), 0xFF, 0x53, 0x02, XB_TYPE_UNASSIGNED_DEST,
+                                                       bleLocalDeviceId, destination[0], payloadType))
+    xbUnassigned.extend(destination [1:3])
+    xbUnassigned.extend(payload)
+    logHandler.printDebug("xbUnassigned: {0}", xbUnassigned)
 
     TransmitAdvertisement(xbUnassigned)
 
@@ -1558,43 +1814,46 @@ def SetXBAssignedPacket(destination, payloadType, payload):
 
     payload = [payloadType] + destinationList + payload
 
-    networkConfigs[selectedTxNetworkIndex].txSqn += 1
-    if(networkConfigs[selectedTxNetworkIndex].txSqn >= XBX_SEQUENCE_ID_MAX_VALUE):
-        networkConfigs[selectedTxNetworkIndex].txSqn = 1
+    # The TX network is looked up once for the sequence number, nonce, keys
+    #   and header byte
+    txNetwork = networkConfigs[selectedTxNetworkIndex]
+    txNetwork.txSqn += 1
+    if(txNetwork.txSqn >= XBX_SEQUENCE_ID_MAX_VALUE):
+        txNetwork.txSqn = 1
 
 
-    if((IsEncryptedAdvEnabled(destination)) and (adminMode or (networkConfigs[selectedTxNetworkIndex].key != NETWORK_KEY_NONE))):
+    # IsEncryptedAdvEnabled is False whenever the TX network has no key, so
+    #   there is nothing else to check before taking the encrypted path
+    if(IsEncryptedAdvEnabled(destination)):
 
         if(adminMode):
             applicationKey = adminKey
         else:
-            applicationKey = networkConfigs[selectedTxNetworkIndex].key
-        aesNonce[NONCE_SOURCE_ADDR_OFFSET: NONCE_SOURCE_ADDR_OFFSET + XBX_SOURCE_ADDR_LENGTH] = ConvertIntToList(bleLocalDeviceId, 2)
-        aesNonce[NONCE_SQN_OFFSET: NONCE_SQN_OFFSET + XBX_SEQUENCE_ID_LENGTH] = ConvertIntToList(networkConfigs[selectedTxNetworkIndex].txSqn, XBX_SEQUENCE_ID_LENGTH)
+            applicationKey = txNetwork.keyBytes
+        header = list(XBX_HEADER.pack(bleLocalDeviceId, txNetwork.txSqn, XBX_RFU_VALUE))
+        aesNonce = XBX_NONCE.pack(bleLocalDeviceId, txNetwork.txSqn)
 ##        aesNonce[NONCE_RFU_OFFSET: NONCE_RFU_OFFSET + XBX_RFU_LENGTH] = [0 * XBX_RFU_LENGTH]
 
-        logHandler.printLog("aesNonce: {0}".format(aesNonce))
-        logHandler.printLog("aesKey: {0}".format(applicationKey))
+        logHandler.printDebug("aesNonce: {0}", aesNonce)
+        logHandler.printDebug("aesKey: {0}", applicationKey)
 
         eMsg, eMic = AesCcmEncrypt(applicationKey, aesNonce, payload)
 
-        headerByte = XB_TYPE_ENCRYPTED_FLAG + (networkConfigs[selectedTxNetworkIndex].id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK)
+        headerByte = XB_TYPE_ENCRYPTED_FLAG + (txNetwork.id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK)
 ##        headerByte |= 0x40
-        header = ConvertIntToList(bleLocalDeviceId, 2) + ConvertIntToList(networkConfigs[selectedTxNetworkIndex].txSqn, XBX_SEQUENCE_ID_LENGTH) + [0] * XBX_RFU_LENGTH
-        logHandler.printLog("Header: {0}".format(header))
-        logHandler.printLog("Header key: {0}".format(networkConfigs[selectedTxNetworkIndex].headerKey))
+        logHandler.printDebug("Header: {0}", header)
+        logHandler.printDebug("Header key: {0}", txNetwork.headerKey)
 
 ##        if((IsEncryptedHeaderEnabled(destination)) and (len(networkConfigs[selectedTxNetworkIndex].headerKey) == NETWORK_KEY_LENGTH)) and (networkConfigs[selectedTxNetworkIndex].headerKey != [0] * NETWORK_KEY_LENGTH):
 ##            headerByte |= XBX_HEADER_ENCRYPTED_FLAG
         payloadAndMic = eMsg + eMic
-        headerNonce = [0] * NONCE_LENGTH
-        tempLength = min(NONCE_LENGTH, len(payloadAndMic))
-        for i in range(tempLength):
-            headerNonce[i] = payloadAndMic[i]
+        headerNonce = XBX_PADDED_NONCE.pack(bytes(payloadAndMic[:NONCE_LENGTH]))
 
-        logHandler.printLog("headerKey: {0}, headerNonce: {1}".format(networkConfigs[selectedTxNetworkIndex].headerKey, headerNonce))
-        header, unusedMic = AesCcmEncrypt(networkConfigs[selectedTxNetworkIndex].headerKey, headerNonce, header) #[0x31, 0x32, 0x33, 0x34] # Source address)
-        logHandler.printLog("TX Encrypted header: {0}".format(header))
+        logHandler.printDebug("headerKey: {0}, headerNonce: {1}", txNetwork.headerKey, headerNonce)
+        # Receivers always decrypt the header, so it is encrypted even with an
+        #   all zero header key. A header key equal to the key shares its cipher
+        header, unusedMic = AesCcmEncrypt(txNetwork.headerKeyBytes, headerNonce, header) #[0x31, 0x32, 0x33, 0x34] # Source address)
+        logHandler.printDebug("TX Encrypted header: {0}", header)
 
 ##        if((len(headerKey) == NETWORK_KEY_LENGTH) and (headerKey != [0] * NETWORK_KEY_LENGTH)):
 ##            headerByte |= XBX_HEADER_ENCRYPTED_FLAG
@@ -1604,29 +1863,24 @@ def SetXBAssignedPacket(destination, payloadType, payload):
 ##        else:
 ##            sourceAddress = ConvertIntToList(bleLocalDeviceId, 2)
 
-        xbAssigned = [AD1_LENGTH, AD1_TYPE, AD1_VALUE, 15 + len(payload), 0xFF, 0x53, 0x02]
-        xbAssigned.append(headerByte)
-        xbAssigned += header[:XBX_SOURCE_ADDR_LENGTH]
-        xbAssigned += header[XBX_SOURCE_ADDR_LENGTH:XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH]
-        xbAssigned += header[XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH:XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH + XBX_RFU_LENGTH]
-        xbAssigned += eMsg + eMic
-        logHandler.printLog("Encrypted assigned packet: {0}".format(xbAssigned))
+        xbAssigned = bytearray((AD1_LENGTH, AD1_TYPE, AD1_VALUE, 15 + len(payload), 0xFF, 0x53, 0x02, headerByte))
+        xbAssigned.extend(header)
+        xbAssigned.extend(eMsg)
+        xbAssigned.extend(eMic)
+        logHandler.printDebug("Encrypted assigned packet: {0}", xbAssigned)
 
     else:
-        xbAssigned = [AD1_LENGTH, AD1_TYPE, AD1_VALUE, 11 + len(payload), 0xFF, 0x53, 0x02]
-        xbAssigned.append(XB_TYPE_UNENCRYPTED)
-        xbAssigned += ConvertIntToList(bleLocalDeviceId, 2) # Source address
-        xbAssigned += ConvertIntToList(networkConfigs[selectedTxNetworkIndex].txSqn, XBX_SEQUENCE_ID_LENGTH)
-        xbAssigned.append(XBX_RFU_VALUE)
-        xbAssigned += payload
-        logHandler.printLog("Unencrypted assigned packet: {0}".format(xbAssigned))
+        xbAssigned = bytearray(XB_UNENCRYPTED_ASSIGNED_PACKET.pack(AD1_LENGTH, AD1_TYPE, AD1_VALUE, 11 + len(payload), 0xFF, 0x53, 0x02, XB_TYPE_UNENCRYPTED,
+                                                                  bleLocalDeviceId, txNetwork.txSqn, XBX_RFU_VALUE))
+        xbAssigned.extend(payload)
+        logHandler.printDebug("Unencrypted assigned packet: {0}", xbAssigned)
 
 
 ##    print "xbAssigned: {0}".format(xbAssigned)
 
     TransmitAdvertisement(xbAssigned)
 
-    UpdateNetworkConfigFile()
+    SaveTxSequenceNumber()
 
 ##    print "Encrypted time: {0}".format(time.time() - start_time)
 
@@ -1691,304 +1945,340 @@ def my_ble_rsp_gap_end_procedure(sender, args):
 def my_ble_evt_gap_scan_response(sender, args):
     global lastScanResponse
 
-    lastScanResponse = time.time()
+    # Sampled once and used for every timestamp this packet needs
+    scanTime = time.time()
+    lastScanResponse = scanTime
+
+    # Looked up once here rather than for every encrypted field
+    rxNetwork = networkConfigs[selectedRxNetworkIndex]
+    rxPartialId = rxNetwork.id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK
 
     # Initialise variables
     ad_services = []
     this_field = []
     deviceName = ""
-    bytes_left = 0
     companyId = None
     logText = ""
 
     # Check if the device is in the peripheral_list
     device = GetDeviceWithAddress(args['sender'])
 
-##    print ("Scanned {0}".format(args['data']))
-
-    # Parse the packet data
-    for b in args['data']:
-        # Start of new field
-        if bytes_left == 0:
-            bytes_left = b
-            this_field = []
-        else:
-            # Buffer the bytes in the field
-            this_field.append(b)
-            bytes_left = bytes_left - 1
-
-            # Complete field received
-            if bytes_left == 0:
-                # partial or complete list of 16-bit UUIDs
-                if this_field[0] == 0x02 or this_field[0] == 0x03:
-                    for i in xrange((len(this_field) - 1) / 2):
-                        ad_services.append(this_field[-1 - i*2 : -3 - i*2 : -1])
-
-                # partial or complete list of 32-bit UUIDs
-                if this_field[0] == 0x04 or this_field[0] == 0x05:
-                    for i in xrange((len(this_field) - 1) / 4):
-                        ad_services.append(this_field[-1 - i*4 : -5 - i*4 : -1])
-
-                # partial or complete list of 128-bit UUIDs
-                if this_field[0] == 0x06 or this_field[0] == 0x07:
-                    for i in xrange((len(this_field) - 1) / 16):
-                        ad_services.append(this_field[-1 - i*16 : -17 - i*16 : -1])
-
-                # Device Name
-                if this_field[0] == 0x09:
-                    for i in xrange(1, len(this_field)):
-                        deviceName += chr(this_field[i])
-
-                    if(device):
-                        if(device.deviceName != deviceName):
-                            logHandler.printLog ("Stored device name {0} for device {1}".format(deviceName, device.address))
-                        device.deviceName = deviceName
-
-                # iXBeacon packet
-                if(len(ad_services) == 1) and (len(ad_services[0]) == 16) and (len(deviceName) == 8):
-                    logText = "{0},{1},{2},{3},".format(time.time(), ConvertListToSeparatedString(list(reversed(args['sender'])),':'), args['rssi'], ConvertListToSeparatedHexString(args['data'], ' '))
-                    logText += deviceName + ", "
-
-                    packetType = int(deviceName[2:4],16)
-                    srcAddr = [int(deviceName[4:6], 16), int(deviceName[6:8], 16)]
-                    iXBUuidField = list(reversed(ad_services[0]))
-                    header = srcAddr + iXBUuidField[0:5]
-                    payloadAndMic = iXBUuidField[5:16]
-                    print ("nameField {0} uuidField {1}".format(deviceName, iXBUuidField))
-                    print ("iXB packetType {0}, header {1}, payload {2}".format(packetType, header, payloadAndMic))
-                    if(packetType & XB_TYPE_ENCRYPTED_FLAG):
-
-                        if((packetType & XBX_NETWORK_ID_PARTIAL_ID_MASK) == (networkConfigs[selectedRxNetworkIndex].id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK)):
-                            header, decryptedData, isValid = XDecrypt(header, payloadAndMic)
-                            if(isValid):
-                                deviceId = ConvertListToInt(header[:2])
-                                sqn = ConvertListToInt(header[2:6])
-                                payloadType = GetPayloadTypeText([packetType], decryptedData[0:], True)
-                                payload = decryptedData[1:]
-                        else:
-                            isValid = False
-                    else:
-                        deviceId = ConvertListToInt(header[:2])
-                        sqn = ConvertListToInt(header[2:6])
-                        payloadType = GetPayloadTypeText([packetType], payloadAndMic[0:], True)
-                        payload = payloadAndMic[1:-4]
-                        isValid = True
-
-                    if(isValid):
-                        logText += "{0},".format(deviceId)
-    ##                    logText += "iXBeacon,"
-                        logText += "{0},".format(payloadType)
-                        logText += "{0},".format(ConvertListToSeparatedHexString(payload, ' '))
-                    else:
-                        logText += "Unknown,Unknown,Unknown,"
-                    packetLogger.printLog(logText)
-
-
-
-                # Manufacturer-specific data
-                if this_field[0] == 0xFF:
-                    this_field.pop(0)
-
-                    if(len(this_field) >= 2):
-                        companyId = this_field[:2]
-
-                        # Xicato packet
-                        if(companyId == ADV_COMPANY_ID_XICATO):
-                            logText = "{0},{1},{2},{3}".format(time.time(), ConvertListToSeparatedString(list(reversed(args['sender'])),':'), args['rssi'], ConvertListToSeparatedHexString(args['data'], ' '))
-                            logTextPayloadType = ""
-                            logTextPayload = None
+    # Packets from other devices are only parsed if they contain Xicato data
+    if(device == None):
+        data = bytes(args['data'])
+        if((data.find(ADV_XICATO_MANUFACTURER_DATA) < 0) and (data.find(ADV_IXB_NAME_FIELD) < 0)):
+            return
 
-                            # xBeacon data is in advertisment packets (not scan response)
-                            if(args['packet_type'] != ADV_PACKET_TYPE_SCAN_RESPONSE):
-
-
-                                if(this_field[XBX_NETWORK_ID_OFFSET] & XB_TYPE_ENCRYPTED_FLAG):
-##                                    logHandler.printLog("XBX field: {0}, len:{1}".format(this_field, len(this_field)))
-
-                                    if((this_field[XBX_NETWORK_ID_OFFSET] & XBX_NETWORK_ID_PARTIAL_ID_MASK) == (networkConfigs[selectedRxNetworkIndex].id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK)):
-
-                                        payloadAndMic = this_field[XBX_PAYLOAD_AND_MIC_OFFSET:]
-                                        header = this_field[XBX_SOURCE_ADDR_OFFSET: XBX_SOURCE_ADDR_OFFSET + (XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH + XBX_RFU_LENGTH)]
-                                        header, decryptedData, isValid = XDecrypt(header, payloadAndMic)
+##    print ("Scanned {0}".format(args['data']))
 
-                                        if(isValid):
-                                            sourceAddress = header[:XBX_SOURCE_ADDR_LENGTH]
-                                            rxSqnTemp = ConvertListToInt(header[XBX_SOURCE_ADDR_LENGTH:(XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH)])
-                                            logTextPayloadType = GetPayloadTypeText(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2], decryptedData[0:])
-                                            logTextPayload = decryptedData[1:]
+    # Parse the packet data one field at a time. Each field starts with its
+    #   length. Empty fields are skipped and a truncated last field is ignored
+    scanData = args['data']
+    fieldStart = 0
+    while fieldStart < len(scanData):
+        fieldLength = scanData[fieldStart]
+        fieldEnd = fieldStart + 1 + fieldLength
+        if(fieldEnd > len(scanData)):
+            break
+        this_field = scanData[fieldStart + 1:fieldEnd]
+        fieldStart = fieldEnd
+        if(fieldLength == 0):
+            continue
 
-                                            # Jeff TODO: Store SQNs per device
-##                                            rxSqnTemp = this_field[XBX_SEQUENCE_ID_OFFSET] + (this_field[XBX_SEQUENCE_ID_OFFSET + 1] * 256) + ((this_field[XBX_SEQUENCE_ID_OFFSET + 2] & SEQUENCE_ID_MSB_MASK) * 65536)
-##                                            print "rxSqnTemp: {0}".format(rxSqnTemp)
-                                            if(rxSqnTemp > networkConfigs[selectedRxNetworkIndex].txSqn):
-                                                networkConfigs[selectedRxNetworkIndex].txSqn = rxSqnTemp
+        fieldType = this_field[0]
 
-                                            if(device == None):
-                                                if((decryptedData[0] in [ENCRYPTED_PACKET_TYPE_XB1, ENCRYPTED_PACKET_TYPE_XB2, ENCRYPTED_PACKET_TYPE_XGROUP]) or
-                                                    (((decryptedData[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD) and (decryptedData[1 + XBOOT_DEVICE_TYPE_OFFSET] & 0x80) == 0))):
-                                                    device = XimBleDevice(ble, ser, args['sender'], args['address_type'])
-                                                    peripheral_list.append(device)
-                                                    logHandler.printLog("Added XIM peripheral_list: {0}".format(peripheral_list))
-                                                elif((decryptedData[0] == ENCRYPTED_PACKET_TYPE_SENSORS_ALL) or
-                                                    (((decryptedData[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD) and (decryptedData[1 + XBOOT_DEVICE_TYPE_OFFSET] & 0x80)))):
-                                                    device = XSensorBleDevice(ble, ser, args['sender'], args['address_type'])
-                                                    peripheral_list.append(device)
-                                                    logHandler.printLog("Added XSensor to peripheral_list: {0}".format(peripheral_list))
+        # partial or complete list of 16, 32 or 128-bit UUIDs, kept as bytes in
+        #   wire order. Any partial UUID at the start of the field is skipped
+        uuidFormat = AD_UUID_LIST_FORMATS.get(fieldType)
+        if(uuidFormat):
+            uuidStart = len(this_field) - ((len(this_field) - 1) // uuidFormat.size) * uuidFormat.size
+            ad_services.extend([uuid for (uuid,) in uuidFormat.iter_unpack(BytesToString(this_field[uuidStart:]))])
 
-                                            if(device):
-                                                device.encryptedAdv = True
-                                                device.hasEncryptedHeader = True # isHeaderEncrypted
-                                                device.txNetwork = {'id': networkConfigs[selectedRxNetworkIndex].id, 'key': networkConfigs[selectedRxNetworkIndex].key}
-                                                device.scannedRssi = args['rssi']
-                                                device.lastScanTime = time.time()
-                                                device.scannedDeviceId = [ConvertListToInt(sourceAddress)]
-                                                ProcessXBPacket(device, decryptedData)
+        # Device Name
+        elif fieldType == 0x09:
+            # latin-1 maps each byte to the character chr() gives for it
+            deviceName += bytes(this_field[1:]).decode('latin-1')
 
-                                else:
-                                    if(device == None) and (GetDeviceTypeFromPacket(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2], this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:]) == DEVICE_TYPE_XIM):
-                                        device = XimBleDevice(ble, ser, args['sender'], args['address_type'])
-                                        peripheral_list.append(device)
-                                        logHandler.printLog("Added XIM peripheral_list: {0}".format(peripheral_list))
-                                    elif(device == None) and (GetDeviceTypeFromPacket(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2], this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:]) == DEVICE_TYPE_XSENSOR):
-                                        device = XSensorBleDevice(ble, ser, args['sender'], args['address_type'])
-                                        peripheral_list.append(device)
-                                        logHandler.printLog("Added XSensor to peripheral_list: {0}".format(peripheral_list))
-
-                                    # Try legacy packets first. This will get overwritten if a new packet is detected
-                                    logTextPayloadType = GetPayloadTypeText(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2], [])
-
-
-                                    # xBeacon1 packet
-##                                    if(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2] == PACKET_TYPE_XB1) and (len(this_field) == XB1_FIELD_LENGTH):
-                                    if(this_field[XB_PACKET_TYPE_OFFSET] in [XB_TYPE_UNASSIGNED_SOURCE, XB_TYPE_UNENCRYPTED]):
-                                        logTextPayloadType = GetPayloadTypeText(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2], this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:])
-                                        if(device):
-                                            device.encryptedAdv = False
-                                            device.txNetwork = None
-                                            device.scannedRssi = args['rssi']
-                                            device.lastScanTime = time.time()
-
-                                            if(this_field[XB_PACKET_TYPE_OFFSET] == XB_TYPE_UNASSIGNED_SOURCE):
-##                                                print "{0:.3f}: XB_TYPE_UNASSIGNED_SOURCE {1}".format(time.time() % 100.0, this_field)
-                                                device.scannedDeviceId = this_field[XB_UNASSIGNED_SOURCE_ADDRESS_OFFSET:XB_UNASSIGNED_SOURCE_ADDRESS_OFFSET + UNASSIGNED_ADDRESS_LENGTH]
-                                                payload = this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:]
-                                            else:
-##                                                print "{0:.3f}: XB_TYPE_UNENCRYPTED {1}".format(time.time() % 100.0, this_field)
-                                                device.scannedDeviceId = [ConvertListToInt(this_field[XBX_SOURCE_ADDR_OFFSET:XBX_SOURCE_ADDR_OFFSET + XBX_SOURCE_ADDR_LENGTH])]
-                                                payload = this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:]
-
-##                                            print "this_field[XB_UNASSIGNED_PAYLOAD_OFFSET]: {0}, XB_UNASSIGNED_PAYLOAD_OFFSET: {1}".format(this_field[XB_UNASSIGNED_PAYLOAD_OFFSET], XB_UNASSIGNED_PAYLOAD_OFFSET)
-                                            ProcessXBPacket(device, payload)
-                                            logTextPayload = payload
-
-
-                                    # xBeacon1 packet
-                                    elif(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2] == PACKET_TYPE_XB1)  and (len(this_field) == XB1_FIELD_LENGTH):
-                                        if(device):
-                                            device.bootloaderMode = False
-                                            device.scannedRssi = args['rssi']
-                                            device.lastScanTime = time.time()
-                                            device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
-                                            ProcessXBeacon1Fields(device, this_field[XB1_V0_PAYLOAD_OFFSET:])
-                                            logTextPayload = this_field[XB1_V0_PAYLOAD_OFFSET:]
-
-                                    # xBeacon2 packet
-                                    elif(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2] == PACKET_TYPE_XB2)  and (len(this_field) == XB2_FIELD_LENGTH):
-                                        if(device):
-                                            device.bootloaderMode = False
-                                            device.scannedRssi = args['rssi']
-                                            device.lastScanTime = time.time()
-                                            device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
-                                            ProcessXBeacon2Fields(device, this_field[XB2_V0_PAYLOAD_OFFSET:])
-                                            logTextPayload = this_field[XB1_V0_PAYLOAD_OFFSET:]
-
-
-                                    # Bootloader Mode packet
-                                    elif(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2] == PACKET_TYPE_XBL)  and (len(this_field) == XBL_FIELD_LENGTH):
-    ##                                        device.xb2UpdateTime = time.time()
-                                        logHandler.printLog("{0}: Bootloader Mode Detected for {1}".format(time.time(), args['sender']))
-                                        if(device):
-                                            device.bootloaderMode = True
-                                            device.scannedRssi = args['rssi']
-                                            device.lastScanTime = time.time()
-        ##                                        print "xBootload Packet: {0}".format(this_field)
-                                            device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
-                                            logTextPayload = []
-
-    ##                                        # If in bootloader mode, the regular mode service and attribute list should be cleared
-    ##                                        if(GetHandle(device, uuid_scan_response_user_data_characteristic)):
-    ##                                            logHandler.printLog("Clearing old UUID handle map for device: {0}".format(device.scannedDeviceId))
-    ##                                            device.InitializeServiceAttributeList()
-
-                                    # XSensor packet
-                                    elif(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2] in [PACKET_TYPE_XSENSOR_MOTION, PACKET_TYPE_XSENSOR_LUX]): #  and (len(this_field) == XBL_FIELD_LENGTH):
-    ##                                        print "this_field: {0}".format(this_field)
-    ##                                        device.xb2UpdateTime = time.time()
-##                                        logHandler.printLog("{0}: XSensor Detected {1}".format(time.time(), this_field))
-##                                        if(device == None):
-##                                            device = XSensorBleDevice(ble, ser, args['sender'], args['address_type'])
-##                                            peripheral_list.append(device)
-##                                            logHandler.printLog("Added XSensor to peripheral_list: {0}".format(peripheral_list))
-
-                                        if(device):
-                                            ProcessXSensorFields(device, this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2], this_field[XB1_V0_PAYLOAD_OFFSET:])
-                                            device.bootloaderMode = False
-                                            device.scannedRssi = args['rssi']
-                                            device.lastScanTime = time.time()        ##
-                                            device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
-                                            logTextPayload = this_field[XB1_V0_PAYLOAD_OFFSET:]
+            if(device):
+                if(device.deviceName != deviceName):
+                    logHandler.printLog ("Stored device name {0} for device {1}".format(deviceName, device.address))
+                device.deviceName = deviceName
+
+        # iXBeacon packet. Only its UUID or name field can complete one, so other
+        #   fields don't decode it again
+        if(uuidFormat or (fieldType == 0x09)) and (len(ad_services) == 1) and (len(ad_services[0]) == 16) and (len(deviceName) == 8):
+            logText = "{0},{1},{2},{3},".format(scanTime, ConvertListToSeparatedString(args['sender'][::-1],':'), args['rssi'], ConvertListToSeparatedHexString(args['data'], ' '))
+            logText += deviceName + ", "
+
+            packetType = int(deviceName[2:4],16)
+            srcAddr = [int(deviceName[4:6], 16), int(deviceName[6:8], 16)]
+            iXBUuidField = list(ad_services[0])
+            header = srcAddr + iXBUuidField[0:5]
+            payloadAndMic = iXBUuidField[5:16]
+            print ("nameField {0} uuidField {1}".format(deviceName, iXBUuidField))
+            print ("iXB packetType {0}, header {1}, payload {2}".format(packetType, header, payloadAndMic))
+            if(packetType & XB_TYPE_ENCRYPTED_FLAG):
+
+                partialId = packetType & XBX_NETWORK_ID_PARTIAL_ID_MASK
+                if(partialId == rxPartialId):
+                    header, decryptedData, isValid = XDecrypt(header, payloadAndMic, partialId)
+                    if(isValid):
+                        deviceId, sqn, unusedRfu = XBX_HEADER.unpack(BytesToString(header))
+                        payloadType = GetPayloadTypeText([packetType], decryptedData[0:], True)
+                        payload = decryptedData[1:]
+                else:
+                    isValid = False
+            else:
+                deviceId, sqn, unusedRfu = XBX_HEADER.unpack(BytesToString(header))
+                payloadType = GetPayloadTypeText([packetType], payloadAndMic[0:], True)
+                payload = payloadAndMic[1:-4]
+                isValid = True
 
+            if(isValid):
+                logText += "{0},".format(deviceId)
+    ##            logText += "iXBeacon,"
+                logText += "{0},".format(payloadType)
+                logText += "{0},".format(ConvertListToSeparatedHexString(payload, ' '))
+            else:
+                logText += "Unknown,Unknown,Unknown,"
+            packetLogger.printLog(logText)
+
+
+
+        # Manufacturer-specific data
+        if fieldType == 0xFF:
+            this_field.pop(0)
+
+            if(len(this_field) >= COMPANY_ID_LENGTH):
+                companyId = this_field[:COMPANY_ID_LENGTH]
+
+                # Xicato packet
+                if(companyId == ADV_COMPANY_ID_XICATO):
+                    logText = "{0},{1},{2},{3}".format(scanTime, ConvertListToSeparatedString(args['sender'][::-1],':'), args['rssi'], ConvertListToSeparatedHexString(args['data'], ' '))
+                    logTextPayloadType = ""
+                    logTextPayload = None
+                    xbPacketType = this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2]
+
+                    # xBeacon data is in advertisment packets (not scan response)
+                    if(args['packet_type'] != ADV_PACKET_TYPE_SCAN_RESPONSE):
+
+
+                        networkIdField = this_field[XBX_NETWORK_ID_OFFSET]
+                        if(networkIdField & XB_TYPE_ENCRYPTED_FLAG):
+##                            logHandler.printLog("XBX field: {0}, len:{1}".format(this_field, len(this_field)))
+
+                            partialId = networkIdField & XBX_NETWORK_ID_PARTIAL_ID_MASK
+                            if(partialId == rxPartialId):
+
+                                payloadAndMic = this_field[XBX_PAYLOAD_AND_MIC_OFFSET:]
+                                header = this_field[XBX_SOURCE_ADDR_OFFSET: XBX_SOURCE_ADDR_OFFSET + (XBX_SOURCE_ADDR_LENGTH + XBX_SEQUENCE_ID_LENGTH + XBX_RFU_LENGTH)]
+                                header, decryptedData, isValid = XDecrypt(header, payloadAndMic, partialId)
+
+                                if(isValid):
+                                    sourceAddress, rxSqnTemp, unusedRfu = XBX_HEADER.unpack(BytesToString(header))
+                                    logTextPayloadType = GetPayloadTypeText(xbPacketType, decryptedData[0:])
+                                    logTextPayload = decryptedData[1:]
+
+                                    # Jeff TODO: Store SQNs per device
+##                                    rxSqnTemp = this_field[XBX_SEQUENCE_ID_OFFSET] + (this_field[XBX_SEQUENCE_ID_OFFSET + 1] * 256) + ((this_field[XBX_SEQUENCE_ID_OFFSET + 2] & SEQUENCE_ID_MSB_MASK) * 65536)
+##                                    print "rxSqnTemp: {0}".format(rxSqnTemp)
+                                    if(rxSqnTemp > rxNetwork.txSqn):
+                                        rxNetwork.txSqn = rxSqnTemp
+
+                                    if(device == None):
+                                        deviceType = GetDeviceTypeFromPayload(decryptedData)
+                                        if(deviceType == DEVICE_TYPE_XIM):
+                                            device = XimBleDevice(ble, ser, args['sender'], args['address_type'])
+                                            AddDevice(device)
+                                            logHandler.printLog("Added XIM peripheral_list: {0}".format(peripheral_list))
+                                        elif(deviceType == DEVICE_TYPE_XSENSOR):
+                                            device = XSensorBleDevice(ble, ser, args['sender'], args['address_type'])
+                                            AddDevice(device)
+                                            logHandler.printLog("Added XSensor to peripheral_list: {0}".format(peripheral_list))
+
+                                    if(device):
+                                        device.encryptedAdv = True
+                                        device.hasEncryptedHeader = True # isHeaderEncrypted
+                                        device.txNetwork = {'id': rxNetwork.id, 'key': rxNetwork.key}
+                                        device.scannedRssi = args['rssi']
+                                        device.lastScanTime = scanTime
+                                        device.scannedDeviceId = [sourceAddress]
+                                        ProcessXBPacket(device, decryptedData, scanTime)
 
+                        else:
+                            deviceType = None
+                            if(device == None):
+                                deviceType = GetDeviceTypeFromPacket(xbPacketType, this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:])
+                            if(deviceType == DEVICE_TYPE_XIM):
+                                device = XimBleDevice(ble, ser, args['sender'], args['address_type'])
+                                AddDevice(device)
+                                logHandler.printLog("Added XIM peripheral_list: {0}".format(peripheral_list))
+                            elif(deviceType == DEVICE_TYPE_XSENSOR):
+                                device = XSensorBleDevice(ble, ser, args['sender'], args['address_type'])
+                                AddDevice(device)
+                                logHandler.printLog("Added XSensor to peripheral_list: {0}".format(peripheral_list))
+
+                            # Try legacy packets first. This will get overwritten if a new packet is detected
+                            logTextPayloadType = GetPayloadTypeText(xbPacketType, [])
+
+
+                            # xBeacon1 packet
+##                            if(this_field[XB_PACKET_TYPE_OFFSET: XB_PACKET_TYPE_OFFSET + 2] == PACKET_TYPE_XB1) and (len(this_field) == XB1_FIELD_LENGTH):
+                            if(this_field[XB_PACKET_TYPE_OFFSET] in XB_TYPES_UNENCRYPTED_PAYLOAD):
+                                logTextPayloadType = GetPayloadTypeText(xbPacketType, this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:])
+                                if(device):
+                                    device.encryptedAdv = False
+                                    device.txNetwork = None
+                                    device.scannedRssi = args['rssi']
+                                    device.lastScanTime = scanTime
+
+                                    if(this_field[XB_PACKET_TYPE_OFFSET] == XB_TYPE_UNASSIGNED_SOURCE):
+##                                        print "{0:.3f}: XB_TYPE_UNASSIGNED_SOURCE {1}".format(time.time() % 100.0, this_field)
+                                        device.scannedDeviceId = this_field[XB_UNASSIGNED_SOURCE_ADDRESS_OFFSET:XB_UNASSIGNED_SOURCE_ADDRESS_OFFSET + UNASSIGNED_ADDRESS_LENGTH]
+                                        payload = this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:]
                                     else:
-                                        if(device):
-                                            device.bootloaderMode = False
-                                        logHandler.printLog("{0}: Other Packet Detected {1}".format(time.time(), this_field))
-
-                            # Can only store the scanned data if the device is in the peripheral_list
-                            try:
-                                if(logTextPayload == None):
-                                    logTextPayload = "Unknown"
-                                else:
-                                    logTextPayload = ConvertListToSeparatedHexString(logTextPayload, ' ')
-                            except:
-                                logTextPayload = "Unknown"
+##                                        print "{0:.3f}: XB_TYPE_UNENCRYPTED {1}".format(time.time() % 100.0, this_field)
+                                        device.scannedDeviceId = [ConvertListToInt(this_field[XBX_SOURCE_ADDR_OFFSET:XBX_SOURCE_ADDR_OFFSET + XBX_SOURCE_ADDR_LENGTH])]
+                                        payload = this_field[XB_UNASSIGNED_PAYLOAD_OFFSET:]
+
+##                                    print "this_field[XB_UNASSIGNED_PAYLOAD_OFFSET]: {0}, XB_UNASSIGNED_PAYLOAD_OFFSET: {1}".format(this_field[XB_UNASSIGNED_PAYLOAD_OFFSET], XB_UNASSIGNED_PAYLOAD_OFFSET)
+                                    ProcessXBPacket(device, payload, scanTime)
+                                    logTextPayload = payload
+
+
+                            # xBeacon1 packet
+                            elif(xbPacketType == PACKET_TYPE_XB1)  and (len(this_field) == XB1_FIELD_LENGTH):
+                                if(device):
+                                    device.bootloaderMode = False
+                                    device.scannedRssi = args['rssi']
+                                    device.lastScanTime = scanTime
+                                    device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
+                                    ProcessXBeacon1Fields(device, this_field[XB1_V0_PAYLOAD_OFFSET:], scanTime)
+                                    logTextPayload = this_field[XB1_V0_PAYLOAD_OFFSET:]
+
+                            # xBeacon2 packet
+                            elif(xbPacketType == PACKET_TYPE_XB2)  and (len(this_field) == XB2_FIELD_LENGTH):
+                                if(device):
+                                    device.bootloaderMode = False
+                                    device.scannedRssi = args['rssi']
+                                    device.lastScanTime = scanTime
+                                    device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
+                                    ProcessXBeacon2Fields(device, this_field[XB2_V0_PAYLOAD_OFFSET:], scanTime)
+                                    logTextPayload = this_field[XB1_V0_PAYLOAD_OFFSET:]
+
+
+                            # Bootloader Mode packet
+                            elif(xbPacketType == PACKET_TYPE_XBL)  and (len(this_field) == XBL_FIELD_LENGTH):
+    ##                                device.xb2UpdateTime = time.time()
+                                logHandler.printLog("{0}: Bootloader Mode Detected for {1}".format(scanTime, args['sender']))
+                                if(device):
+                                    device.bootloaderMode = True
+                                    device.scannedRssi = args['rssi']
+                                    device.lastScanTime = scanTime
+        ##                                print "xBootload Packet: {0}".format(this_field)
+                                    device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
+                                    logTextPayload = []
+
+    ##                                # If in bootloader mode, the regular mode service and attribute list should be cleared
+    ##                                if(GetHandle(device, uuid_scan_response_user_data_characteristic)):
+    ##                                    logHandler.printLog("Clearing old UUID handle map for device: {0}".format(device.scannedDeviceId))
+    ##                                    device.InitializeServiceAttributeList()
+
+                            # XSensor packet
+                            elif(xbPacketType in PACKET_TYPES_XSENSOR): #  and (len(this_field) == XBL_FIELD_LENGTH):
+    ##                                print "this_field: {0}".format(this_field)
+    ##                                device.xb2UpdateTime = time.time()
+##                                logHandler.printLog("{0}: XSensor Detected {1}".format(time.time(), this_field))
+##                                if(device == None):
+##                                    device = XSensorBleDevice(ble, ser, args['sender'], args['address_type'])
+##                                    AddDevice(device)
+##                                    logHandler.printLog("Added XSensor to peripheral_list: {0}".format(peripheral_list))
+
+                                if(device):
+                                    ProcessXSensorFields(device, xbPacketType, this_field[XB1_V0_PAYLOAD_OFFSET:], scanTime)
+                                    device.bootloaderMode = False
+                                    device.scannedRssi = args['rssi']
+                                    device.lastScanTime = scanTime        ##
+                                    device.scannedDeviceId = this_field[XB_V0_DEVICE_ID_OFFSET:XB_V0_DEVICE_ID_OFFSET + XB_V0_DEVICE_ID_LENGTH]
+                                    logTextPayload = this_field[XB1_V0_PAYLOAD_OFFSET:]
+
 
-                            if(device):
-                                logText += ",{0},{1},{2},{3}".format(device.deviceName, ConvertListToSeparatedString(device.scannedDeviceId, '.'), logTextPayloadType, logTextPayload)
                             else:
-                                logText += ", , , ,"
+                                if(device):
+                                    device.bootloaderMode = False
+                                logHandler.printLog("{0}: Other Packet Detected {1}".format(scanTime, this_field))
+
+                    # Can only store the scanned data if the device is in the peripheral_list
+                    try:
+                        if(logTextPayload == None):
+                            logTextPayload = "Unknown"
+                        else:
+                            logTextPayload = ConvertListToSeparatedHexString(logTextPayload, ' ')
+                    except:
+                        logTextPayload = "Unknown"
 
-                            packetLogger.printLog(logText)
+                    if(device):
+                        logText += ",{0},{1},{2},{3}".format(device.deviceName, ConvertListToSeparatedString(device.scannedDeviceId, '.'), logTextPayloadType, logTextPayload)
+                    else:
+                        logText += ", , , ,"
+
+                    packetLogger.printLog(logText)
         # To log all packets
 ##        if(logText == ""):
 ##            logText = "{0},{1},{2},{3}".format(time.time(), ConvertListToSeparatedString(list(reversed(args['sender'])),':'), args['rssi'], ConvertListToSeparatedString(args['data'], ' '))
 ##            packetLogger.printLog(logText)
 
-def XDecrypt(header, payloadAndMic):
+# XDecrypt results by packet and network. Each advertisement is received
+#   several times (once per advertising channel and burst), and the repeats
+#   are answered from here instead of being decrypted again
+xDecryptCache = {}
+XDECRYPT_CACHE_SIZE = 512
+
+def XDecrypt(header, payloadAndMic, partialId):
+    rxNetwork = networkConfigs[selectedRxNetworkIndex]
+    txNetwork = networkConfigs[selectedTxNetworkIndex]
+
+    # The networks and their current keys are part of the cache key, so a
+    #   network or key change can't return an old result
+    cacheKey = (BytesToString(header), BytesToString(payloadAndMic), partialId,
+                rxNetwork, rxNetwork.headerKeyBytes, rxNetwork.keyBytes, txNetwork, txNetwork.keyBytes)
+    result = xDecryptCache.get(cacheKey)
+    if(result is None):
+        if(len(xDecryptCache) >= XDECRYPT_CACHE_SIZE):
+            xDecryptCache.clear()
+        result = XDecryptPacket(header, payloadAndMic, partialId, rxNetwork, txNetwork)
+        xDecryptCache[cacheKey] = result
+
+    # Copies, so callers can't change the cached result
+    header, decryptedData, isValid = result
+    return list(header), list(decryptedData), isValid
+
+def XDecryptPacket(header, payloadAndMic, partialId, rxNetwork, txNetwork):
     payloadLength = len(payloadAndMic) - XBX_MIC_LENGTH
     headerLength = len(header)
 
-    headerNonce = [0] * NONCE_LENGTH
-    tempLength = min(NONCE_LENGTH, payloadLength + XBX_MIC_LENGTH)
-    for i in range(tempLength):
-        headerNonce[i] = payloadAndMic[i]
+    headerNonce = XBX_PADDED_NONCE.pack(bytes(payloadAndMic[:NONCE_LENGTH]))
 
-    logHandler.printLog("RX Encrypted header: {0}.".format(header))
-    # This decryption isn't authenticated, so ignore isValid
-    header, isValid = AesCcmDecrypt(networkConfigs[selectedRxNetworkIndex].headerKey, headerNonce, header, [0] * XBX_MIC_LENGTH)
-    logHandler.printLog("RX Decrypted header: {0}. Using key {1} and nonce {2}".format(header, networkConfigs[selectedRxNetworkIndex].headerKey, headerNonce))
+    logHandler.printDebug("RX Encrypted header: {0}.", header)
+    # This decryption isn't authenticated, so there is no MIC to check
+    header = AesCcmDecryptUnauthenticated(rxNetwork.headerKeyBytes, headerNonce, header)
+    logHandler.printDebug("RX Decrypted header: {0}. Using key {1} and nonce {2}", header, rxNetwork.headerKey, headerNonce)
 
 ##    isHeaderEncrypted = True
 
-    aesNonce[:(headerLength - XBX_RFU_LENGTH)] = header[:(headerLength - XBX_RFU_LENGTH)]
+    aesNonce = XBX_PADDED_NONCE.pack(bytes(header[:(headerLength - XBX_RFU_LENGTH)]))
 ##   print "aesNonce: {0}".format(aesNonce)
+    encryptedPayload = payloadAndMic[:payloadLength]
     outMic = payloadAndMic[payloadLength:payloadLength + XBX_MIC_LENGTH]
 
-    decryptedData, isValid = AesCcmDecrypt(networkConfigs[selectedRxNetworkIndex].key, aesNonce, payloadAndMic[:payloadLength], outMic)
+    decryptedData, isValid = AesCcmDecrypt(rxNetwork.keyBytes, aesNonce, encryptedPayload, outMic)
 
+    # Retrying is only worth an AES pass if the TX network is a different network
+    #   that this packet could belong to
     if(isValid == False):
-        decryptedData, isValid = AesCcmDecrypt(networkConfigs[selectedTxNetworkIndex].key, aesNonce, payloadAndMic[:payloadLength], outMic)
-    logHandler.printLog("DecryptedData Out: {0}".format(decryptedData))
+        if((txNetwork.keyBytes != rxNetwork.keyBytes) and ((txNetwork.id[0] & XBX_NETWORK_ID_PARTIAL_ID_MASK) == partialId)):
+            decryptedData, isValid = AesCcmDecrypt(txNetwork.keyBytes, aesNonce, encryptedPayload, outMic)
+    logHandler.printDebug("DecryptedData Out: {0}", decryptedData)
 
 
 ##    logHandler.printLog("isValid: {0}".format(isValid))
@@ -1999,41 +2289,51 @@ def XDecrypt(header, payloadAndMic):
 ##    print "isValid: {0}".format(isValid)
     return header, decryptedData, isValid
 
+# Log text for encrypted packet types, by the first payload byte
+XB_DEVICE_PAYLOAD_TEXT = {
+    ENCRYPTED_PACKET_TYPE_XB1: "XIM,Status 1",
+    ENCRYPTED_PACKET_TYPE_XB2: "XIM,Status 2",
+    ENCRYPTED_PACKET_TYPE_XDEV_INFO: "XIM,Device Info",
+    ENCRYPTED_PACKET_TYPE_XGROUP: "X Device,Group Info",
+}
+XB_CONTROLLER_PAYLOAD_TEXT = {
+    ENCRYPTED_PACKET_TYPE_LIGHT_CONTROL: ",Light Control",
+    ENCRYPTED_PACKET_TYPE_RECALL_SCENE: ",Recall Scene",
+    ENCRYPTED_PACKET_TYPE_INDICATE: ",Indicate",
+    ENCRYPTED_PACKET_TYPE_SET_CONNECTABLE: ",Enable Connections",
+    ENCRYPTED_PACKET_TYPE_REQUEST_ADV: ",Request Data",
+}
+
+# Log text and device type for legacy packet types, by the packet type bytes
+LEGACY_PACKET_TYPE_TEXT = {
+    tuple(PACKET_TYPE_XB1): "XIM,Status 1 (Legacy)",
+    tuple(PACKET_TYPE_XB2): "XIM,Status 2 (Legacy)",
+    tuple(PACKET_TYPE_XBL): "XIM,Bootloader (Legacy)",
+    tuple(PACKET_TYPE_XSENSOR_MOTION): "XSensor,Motion (Legacy)",
+    tuple(PACKET_TYPE_XSENSOR_LUX): "XSensor,Lux (Legacy)",
+}
+LEGACY_PACKET_DEVICE_TYPES = {
+    tuple(PACKET_TYPE_XB1): DEVICE_TYPE_XIM,
+    tuple(PACKET_TYPE_XB2): DEVICE_TYPE_XIM,
+    tuple(PACKET_TYPE_XBL): DEVICE_TYPE_XIM,
+    tuple(PACKET_TYPE_XSENSOR_MOTION): DEVICE_TYPE_XSENSOR,
+    tuple(PACKET_TYPE_XSENSOR_LUX): DEVICE_TYPE_XSENSOR,
+}
+
 def GetPayloadTypeText(packetTypeList, payload, isIXBeacon = False):
-    if(packetTypeList == PACKET_TYPE_XB1):
-        return "XIM,Status 1 (Legacy)"
-    elif(packetTypeList == PACKET_TYPE_XB2):
-        return "XIM,Status 2 (Legacy)"
-    elif(packetTypeList == PACKET_TYPE_XBL):
-        return "XIM,Bootloader (Legacy)"
-    elif(packetTypeList == PACKET_TYPE_XSENSOR_MOTION):
-        return "XSensor,Motion (Legacy)"
-    elif(packetTypeList == PACKET_TYPE_XSENSOR_LUX):
-        return "XSensor,Lux (Legacy)"
+    legacyText = LEGACY_PACKET_TYPE_TEXT.get(tuple(packetTypeList))
+    if(legacyText):
+        return legacyText
 
     if(isIXBeacon):
         controllerName = "iX Controller"
     else:
         controllerName = "X Controller"
-    if((len(payload) > 0) and ((packetTypeList[0] in [XB_TYPE_UNASSIGNED_SOURCE, XB_TYPE_UNENCRYPTED]) or (packetTypeList[0] & XB_TYPE_ENCRYPTED_FLAG))):
-        if(payload[0] == ENCRYPTED_PACKET_TYPE_XB1):
-            return "XIM,Status 1"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_XB2):
-            return "XIM,Status 2"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_XDEV_INFO):
-            return "XIM,Device Info"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_XGROUP):
-            return "X Device,Group Info"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_LIGHT_CONTROL):
-            return controllerName + ",Light Control"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_RECALL_SCENE):
-            return controllerName + ",Recall Scene"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_INDICATE):
-            return controllerName + ",Indicate"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_SET_CONNECTABLE):
-            return controllerName + ",Enable Connections"
-        elif(payload[0] == ENCRYPTED_PACKET_TYPE_REQUEST_ADV):
-            return controllerName + ",Request Data"
+    if((len(payload) > 0) and ((packetTypeList[0] in XB_TYPES_UNENCRYPTED_PAYLOAD) or (packetTypeList[0] & XB_TYPE_ENCRYPTED_FLAG))):
+        if(payload[0] in XB_DEVICE_PAYLOAD_TEXT):
+            return XB_DEVICE_PAYLOAD_TEXT[payload[0]]
+        elif(payload[0] in XB_CONTROLLER_PAYLOAD_TEXT):
+            return controllerName + XB_CONTROLLER_PAYLOAD_TEXT[payload[0]]
         elif((payload[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD) and ((payload[1 + XBOOT_DEVICE_TYPE_OFFSET] & 0x80) == 0)):
             return "XIM,Bootloader"
         elif(payload[0] in [ENCRYPTED_PACKET_TYPE_SENSORS_ALL]) and (len(payload) > 1):
@@ -2048,81 +2348,87 @@ def GetPayloadTypeText(packetTypeList, payload, isIXBeacon = False):
 
 def GetDeviceTypeFromPacket(packetTypeList, payload):
 ##    print "packetTypeList {0}, payload {1}".format(packetTypeList, payload)
-    if(packetTypeList in  [PACKET_TYPE_XB1, PACKET_TYPE_XB2, PACKET_TYPE_XBL]):
-        return DEVICE_TYPE_XIM
-    elif(packetTypeList in [PACKET_TYPE_XSENSOR_MOTION, PACKET_TYPE_XSENSOR_LUX]):
-        return DEVICE_TYPE_XSENSOR
-    if(packetTypeList[0] in [XB_TYPE_UNASSIGNED_SOURCE, XB_TYPE_UNENCRYPTED]) or (packetTypeList[0] & XB_TYPE_ENCRYPTED_FLAG):
-        if((payload[0] in [ENCRYPTED_PACKET_TYPE_XB1, ENCRYPTED_PACKET_TYPE_XB2]) or
-            ((payload[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD) and ((payload[1 + XBOOT_DEVICE_TYPE_OFFSET] & 0x80) == 0))):
-            return DEVICE_TYPE_XIM
-        elif((payload[0] in [ENCRYPTED_PACKET_TYPE_SENSORS_ALL])  or
-            ((payload[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD) and ((payload[1 + XBOOT_DEVICE_TYPE_OFFSET] & 0x80)))):
-             return DEVICE_TYPE_XSENSOR
+    legacyDeviceType = LEGACY_PACKET_DEVICE_TYPES.get(tuple(packetTypeList))
+    if(legacyDeviceType):
+        return legacyDeviceType
+    if(packetTypeList[0] in XB_TYPES_UNENCRYPTED_PAYLOAD) or (packetTypeList[0] & XB_TYPE_ENCRYPTED_FLAG):
+        # Group packets only add devices when they are encrypted
+        if(payload[0] != ENCRYPTED_PACKET_TYPE_XGROUP):
+            return GetDeviceTypeFromPayload(payload)
     return None
 
+# Device type that sends each packet type, by the first payload byte. Bootload
+#   packets carry the device type in their payload
+XB_PAYLOAD_DEVICE_TYPES = {
+    ENCRYPTED_PACKET_TYPE_XB1: DEVICE_TYPE_XIM,
+    ENCRYPTED_PACKET_TYPE_XB2: DEVICE_TYPE_XIM,
+    ENCRYPTED_PACKET_TYPE_XGROUP: DEVICE_TYPE_XIM,
+    ENCRYPTED_PACKET_TYPE_SENSORS_ALL: DEVICE_TYPE_XSENSOR,
+}
+
+def GetDeviceTypeFromPayload(payload):
+    if(payload[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD):
+        if(payload[1 + XBOOT_DEVICE_TYPE_OFFSET] & 0x80):
+            return DEVICE_TYPE_XSENSOR
+        return DEVICE_TYPE_XIM
+    return XB_PAYLOAD_DEVICE_TYPES.get(payload[0])
+
 #    logHandler.printLog ("{1}: Ad Services from address {2}: {0}".format(ad_services, time.time(), args['sender']))
 
-def ProcessXBPacket(device, payload):
-    if(payload[0] == ENCRYPTED_PACKET_TYPE_XB1):
-        ProcessXBeacon1Fields(device, payload[1:])
-    elif(payload[0] == ENCRYPTED_PACKET_TYPE_XB2):
-        ProcessXBeacon2Fields(device, payload[1:])
-    elif(payload[0] == ENCRYPTED_PACKET_TYPE_XDEV_INFO):
-        ProcessXDevInfoFields(device, payload[1:])
-    elif(payload[0] == ENCRYPTED_PACKET_TYPE_XGROUP):
-        ProcessXBeaconGroupFields(device, payload[1:])
-    elif(payload[0] == ENCRYPTED_PACKET_TYPE_BOOTLOAD):
-        ProcessXBBootloadFields(device, payload[1:])
-    elif(payload[0] == ENCRYPTED_PACKET_TYPE_SENSORS_ALL):
-        ProcessXSensorFields(device, list(reversed(payload[:2])), payload[2:])
-
-
-def ProcessXBeacon1Fields(device, this_field):
+def ProcessXBPacket(device, payload, scanTime):
+    handler = XB_PACKET_HANDLERS.get(payload[0])
+    if(handler):
+        handler(device, payload, scanTime)
+
+
+def ProcessXBeacon1Fields(device, this_field, scanTime):
 ##    print "ProcessXBeacon1Fields: {0}".format(this_field)
+    intensity, status, power, ledTemperature, pcbTemperature, vin, vinRipple, lockoutTime, extendedVin = XB1_FIELDS.unpack_from(BytesToString(this_field), XB1_INTENSITY_OFFSET)
     device.bootloaderMode = False
-    device.xb1UpdateTime = time.time()
-    device.scannedStatus = this_field[XB1_STATUS_OFFSET]
-    device.scannedIntensity = (this_field[XB1_INTENSITY_OFFSET] + this_field[XB1_INTENSITY_OFFSET + 1] * 256) / 100.0
-    device.scannedLedTemperature = this_field[XB1_LED_TEMPERATURE_OFFSET]
-    device.scannedPcbTemperature = this_field[XB1_PCB_TEMPERATURE_OFFSET]
-    device.scannedPower = float(this_field[XB1_POWER_OFFSET] + this_field[XB1_POWER_OFFSET + 1] * 256) * 0.1
-    device.scannedVin = this_field[XB1_VIN_OFFSET] * 0.25 + float((this_field[XB1_EXTENDED_VIN_OFFSET] & 0xF0) >> 4) * 0.025
-    device.scannedVinRipple = (this_field[XB1_VIN_RIPPLE_OFFSET] * 0.05 + float((this_field[XB1_EXTENDED_VIN_OFFSET] & 0x0F) * 0.005)) * 1000.0
-    device.scannedLockoutTimeRemaining = this_field[XB1_LOCKOUT_TIME_OFFSET] * 10
-
-def ProcessXBeacon2Fields(device, this_field):
-    logHandler.printLog("ProcessXBeacon2Fields: {0}".format(this_field))
+    device.xb1UpdateTime = scanTime
+    device.scannedStatus = status
+    device.scannedIntensity = intensity / 100.0
+    device.scannedLedTemperature = ledTemperature
+    device.scannedPcbTemperature = pcbTemperature
+    device.scannedPower = power * 0.1
+    device.scannedVin = vin * 0.25 + ((extendedVin & 0xF0) >> 4) * 0.025
+    device.scannedVinRipple = (vinRipple * 0.05 + (extendedVin & 0x0F) * 0.005) * 1000.0
+    device.scannedLockoutTimeRemaining = lockoutTime * 10
+
+def ProcessXBeacon2Fields(device, this_field, scanTime):
+    logHandler.printDebug("ProcessXBeacon2Fields: {0}", this_field)
+    hours, powerCycles, ledCycles, operationExtension, daliStatus = XB2_FIELDS.unpack_from(BytesToString(this_field), XB2_HOURS_OFFSET)
     device.bootloaderMode = False
-    device.xb2UpdateTime = time.time()
+    device.xb2UpdateTime = scanTime
     device.scannedProductId = this_field[XB2_PRODUCT_ID_OFFSET: XB2_PRODUCT_ID_OFFSET + XB2_PRODUCT_ID_LENGTH]
-    device.scannedHours = this_field[XB2_HOURS_OFFSET] + this_field[XB2_HOURS_OFFSET + 1] * 256
-    device.scannedPowerCycles = this_field[XB2_POWER_CYCLES_OFFSET] + this_field[XB2_POWER_CYCLES_OFFSET + 1] * 256
-    device.scannedLedCycles = this_field[XB2_LED_CYCLES_OFFSET] + this_field[XB2_LED_CYCLES_OFFSET + 1] * 256
-    device.daliStatus = this_field[XB2_DALI_STATUS_OFFSET]
+    device.scannedHours = hours
+    device.scannedPowerCycles = powerCycles
+    device.scannedLedCycles = ledCycles
+    device.daliStatus = daliStatus
 
-def ProcessXDevInfoFields(device, this_field):
-    logHandler.printLog("ProcessXDevInfoFields: {0}".format(this_field))
+def ProcessXDevInfoFields(device, this_field, scanTime):
+    logHandler.printDebug("ProcessXDevInfoFields: {0}", this_field)
     device.bootloaderMode = False
-    device.deviceInfoUpdateTime = time.time()
+    device.deviceInfoUpdateTime = scanTime
 ##    print "{0:.3f}: XDevInfo: {1}".format(time.time() % 100.0, this_field)
     device.scannedProductId = this_field[XDEV_INFO_PRODUCT_ID_OFFSET: XDEV_INFO_PRODUCT_ID_OFFSET + XB2_PRODUCT_ID_LENGTH]
-    device.hwVersion = "{0}.{1}".format(this_field[XDEV_INFO_HW_VERSION_OFFSET] >> 4, this_field[XDEV_INFO_HW_VERSION_OFFSET] & 0x0F)
+    hwVersion, bleVersionMajor, bleVersionMinor, ledControllerVersion, programmedFlux, overloadTemperature = XDEV_INFO_FIELDS.unpack_from(BytesToString(this_field), XDEV_INFO_HW_VERSION_OFFSET)
+    device.hwVersion = "{0}.{1}".format(hwVersion >> 4, hwVersion & 0x0F)
 ##    device.swVersion = GetVersionString(this_field[XDEV_INFO_BLE_VERSION_OFFSET], this_field[XDEV_INFO_BLE_VERSION_OFFSET + 1])
 
     if(device.deviceType == DEVICE_TYPE_XSENSOR):
-        device.fwVersion = GetVersionString(this_field[XDEV_INFO_HW_VERSION_OFFSET] >> 4, this_field[XDEV_INFO_LED_CONTROLLER_VERSION_OFFSET])
+        device.fwVersion = GetVersionString(hwVersion >> 4, ledControllerVersion)
     else:
-        device.ledControllerVersion = GetVersionString(this_field[XDEV_INFO_HW_VERSION_OFFSET] >> 4, this_field[XDEV_INFO_LED_CONTROLLER_VERSION_OFFSET])
-    device.programmedFlux = ConvertListToInt(this_field[XDEV_INFO_PROGRAMMED_FLUX_OFFSET: XDEV_INFO_PROGRAMMED_FLUX_OFFSET + XDEV_INFO_PROGRAMMED_FLUX_LENGTH])
-    device.overloadTemperature = this_field[XDEV_INFO_OVERTEMP_THRESHOLD_VERSION_OFFSET]
+        device.ledControllerVersion = GetVersionString(hwVersion >> 4, ledControllerVersion)
+    device.programmedFlux = programmedFlux
+    device.overloadTemperature = overloadTemperature
 
-    ProcessSwVersion(device, GetVersionString(this_field[XDEV_INFO_BLE_VERSION_OFFSET], this_field[XDEV_INFO_BLE_VERSION_OFFSET + 1]))
+    ProcessSwVersion(device, GetVersionString(bleVersionMajor, bleVersionMinor))
 
-def ProcessXBBootloadFields(device, this_field):
-    logHandler.printLog("ProcessXBBootloadFields: {0}".format(this_field))
+def ProcessXBBootloadFields(device, this_field, scanTime):
+    logHandler.printDebug("ProcessXBBootloadFields: {0}", this_field)
     device.bootloaderMode = True
-    device.bootloaderModeUpdateTime = time.time()
+    device.bootloaderModeUpdateTime = scanTime
 
     if(len(this_field) >= XBOOT_DEVICE_TYPE_OFFSET + 1):
 
@@ -2136,33 +2442,30 @@ def ProcessXBBootloadFields(device, this_field):
         device.fwVersion = GetVersionString(this_field[XBOOT_FW_VERSION_OFFSET], this_field[XBOOT_FW_VERSION_OFFSET + 1])
         device.hwVersion = "{0}.{1}".format(hwVersionMajor, deviceType)
         ProcessSwVersion(device, GetVersionString(this_field[XBOOT_BLE_VERSION_OFFSET], this_field[XBOOT_BLE_VERSION_OFFSET + 1]))
-        logHandler.printLog("Bootload fields HW {0} and BLE FW {1}".format(device.hwVersion, device.swVersion))
+        logHandler.printDebug("Bootload fields HW {0} and BLE FW {1}", device.hwVersion, device.swVersion)
 
 
 
 
 
+# The minor version is zero padded to 3 digits
 def GetVersionString(major, minor):
-    if(minor < 10):
-        return "{0}.00{1}".format(major, minor)
-    elif(minor < 100):
-        return "{0}.0{1}".format(major, minor)
-    else:
-        return "{0}.{1}".format(major, minor)
+    return "{0}.{1:03d}".format(major, minor)
 
-def ProcessXBeaconGroupFields(device, this_field):
+def ProcessXBeaconGroupFields(device, this_field, scanTime):
     device.bootloaderMode = False
-    logHandler.printLog("{0:.3f}: Device {1}, XBeaconGroup: {2}".format(time.time() % 100.0, device.scannedDeviceId, this_field), True)
+    logHandler.printLog("{0:.3f}: Device {1}, XBeaconGroup: {2}".format(scanTime % 100.0, device.scannedDeviceId, this_field), True)
     groupOffset = this_field[XBGROUP_HEADER_OFFSET] & ~XGROUP_LAST_PACKET_FLAG
 ##    print "groupOffset: {0}".format(groupOffset)
-    numAdvGroups = (len(this_field) - XBGROUP_HEADER_LENGTH) / GROUP_MEMBER_LENGTH
+    numAdvGroups = (len(this_field) - XBGROUP_HEADER_LENGTH) // GROUP_MEMBER_LENGTH
 ##    print "numAdvGroups: {0}".format(numAdvGroups)
 
     device.requestGroupAttempts = 0
 
-    for i in range(numAdvGroups):
-        if(groupOffset + i < len(device.groups)):
-            device.groups[groupOffset + i]  = ConvertListToInt(this_field[XBGROUP_MEMBERS_OFFSET + (i * GROUP_MEMBER_LENGTH): XBGROUP_MEMBERS_OFFSET + (i * GROUP_MEMBER_LENGTH) + GROUP_MEMBER_LENGTH])
+    # Members beyond the end of the group list are ignored
+    numStoredGroups = min(numAdvGroups, len(device.groups) - groupOffset)
+    if(numStoredGroups > 0):
+        device.groups[groupOffset:groupOffset + numStoredGroups] = struct.unpack_from(GROUP_MEMBERS_FORMAT.format(numStoredGroups), BytesToString(this_field), XBGROUP_MEMBERS_OFFSET)
 
     if(this_field[XBGROUP_HEADER_OFFSET] & XGROUP_LAST_PACKET_FLAG):
         device.groups[groupOffset + numAdvGroups:] = [GROUP_MEMBER_UNASSIGNED] * (NUM_GROUPS - (groupOffset + numAdvGroups))
@@ -2171,24 +2474,22 @@ def ProcessXBeaconGroupFields(device, this_field):
 
 ##    print "device.groups: {0}".format(device.groups)
 
-def ProcessXSensorFields(device, packetType, this_field):
+def ProcessXSensorFields(device, packetType, this_field, scanTime):
     device.bootloaderMode = False
 ##    logHandler.printLog("{0:.3f}: Device {1}, XSensor: {2}".format(time.time() % 100.0, device.scannedDeviceId, this_field), True)
 
-    temp = this_field[XSENSOR_TEMPERATURE_OFFSET]
-    if(temp >= 0x80):
-        temp = temp - 256
+    temp, vinUpper, statusVinLower = XSENSOR_FIELDS.unpack_from(BytesToString(this_field), XSENSOR_TEMPERATURE_OFFSET)
     device.scannedTemperature = temp
 
-    vin = this_field[XSENSOR_VIN_OFFSET] * 250 + ((this_field[XSENSOR_STATUS_VINLOWER_OFFSET] & 0x0F) * 25)
+    vin = vinUpper * 250 + ((statusVinLower & 0x0F) * 25)
     device.scannedVin = vin
-    device.scannedStatus = this_field[XSENSOR_STATUS_VINLOWER_OFFSET] & 0xF0
+    device.scannedStatus = statusVinLower & 0xF0
 
 
 ##    print "packetType: {0}".format(packetType)
     if(packetType == PACKET_TYPE_XSENSOR_MOTION):
 ##        logHandler.printLog("{0:.3f}: Device {1}, XSensor: {2}".format(time.time() % 100.0, device.scannedDeviceId, this_field), True)
-        device.motionUpdateTime = time.time()
+        device.motionUpdateTime = scanTime
         if(this_field[XSENSOR_VALUE_OFFSET] >= 254):
             motion = "None"
 ##            print "{0:.1f} motion: None".format(time.time() % 100)
@@ -2200,25 +2501,37 @@ def ProcessXSensorFields(device, packetType, this_field):
 ##                                            print "{4:.3f}: xSensor Motion. ID: {0}, Time since Motion: {1}, Temp: {2} C, Vin: {3} mV".format('.'.join(map(str,this_field[4:8])), motion, temp, vin, time.time() % 100)
     elif(packetType == PACKET_TYPE_XSENSOR_LUX):
 
-        device.luxUpdateTime = time.time()
+        device.luxUpdateTime = scanTime
 
         lux = this_field[XSENSOR_VALUE_OFFSET] + this_field[XSENSOR_VALUE_OFFSET + 1] * 256
 ##        print "{1:.1f} lux: {0}".format(lux, time.time() % 100)
         device.scannedLux = lux
 ##                                            print "{4:.3f}: xSensor Lux. ID: {0}, Lux: {1}, Temp: {2} C, Vin: {3} mV".format('.'.join(map(str,this_field[4:8])), lux, temp, vin, time.time() % 100)
 
+# Encrypted packet handlers, by the first payload byte
+XB_PACKET_HANDLERS = {
+    ENCRYPTED_PACKET_TYPE_XB1: lambda device, payload, scanTime: ProcessXBeacon1Fields(device, payload[1:], scanTime),
+    ENCRYPTED_PACKET_TYPE_XB2: lambda device, payload, scanTime: ProcessXBeacon2Fields(device, payload[1:], scanTime),
+    ENCRYPTED_PACKET_TYPE_XDEV_INFO: lambda device, payload, scanTime: ProcessXDevInfoFields(device, payload[1:], scanTime),
+    ENCRYPTED_PACKET_TYPE_XGROUP: lambda device, payload, scanTime: ProcessXBeaconGroupFields(device, payload[1:], scanTime),
+    ENCRYPTED_PACKET_TYPE_BOOTLOAD: lambda device, payload, scanTime: ProcessXBBootloadFields(device, payload[1:], scanTime),
+    ENCRYPTED_PACKET_TYPE_SENSORS_ALL: lambda device, payload, scanTime: ProcessXSensorFields(device, list(reversed(payload[:2])), payload[2:], scanTime),
+}
+
 # Converts the provided list to a string separated by the provided separator character
 def ConvertListToSeparatedString(inList, separator):
-    outString = ""
     if(inList):
-        for value in inList:
-            outString += "{0}{1}".format(value, separator)
-        outString = outString[:-1]
-    return outString
+        return separator.join(map(str, inList))
+    return ""
 
 def ConvertListToSeparatedHexString(inList, separator):
     outString = ""
     if(inList):
+        try:
+            return bytes(inList).hex(separator).upper()
+        except (TypeError, ValueError):
+            pass
+
         for value in inList:
             try:
                 hexString = hex(value)[2:].upper()
@@ -2368,7 +2681,7 @@ def ProcessNormalConnection(device, connHandle):
     if(tempHandle == None):
         logHandler.printLog("{0}: Get SW Version. pending_write = {1}".format(time.time(), pending_write))
         device.connectionState = STATE_GET_VERSION
-        ble.send_command(ser, ble.ble_cmd_attclient_read_by_type(connHandle, 0x0001, 0xFFFF, list(reversed(uuid_dis_software_rev_characteristic))))
+        ble.send_command(ser, ble.ble_cmd_attclient_read_by_type(connHandle, 0x0001, 0xFFFF, uuid_dis_software_rev_characteristic[::-1]))
         SetBusyFlag()
 
     else:
@@ -2379,7 +2692,7 @@ def ProcessBootloadConnection(device, connHandle):
     if(tempHandle == None):
         logHandler.printLog("{0}: Find Bootloader Services. pending_write = {1}".format(time.time(), pending_write), True)
         device.connectionState = STATE_FINDING_SERVICES
-        ble.send_command(ser, ble.ble_cmd_attclient_read_by_group_type(connHandle, 0x0001, 0xFFFF, list(reversed(uuid_service))))
+        ble.send_command(ser, ble.ble_cmd_attclient_read_by_group_type(connHandle, 0x0001, 0xFFFF, uuid_service[::-1]))
         SetBusyFlag()
     else:
         ProcessDiscoveredBootloaderXim(device)
@@ -2497,7 +2810,7 @@ def InitializeConnectionParameters():
     bleAdvertisingIntervalMin = ADVERTISING_INTERVAL_MIN
     bleAdvertisingIntervalMax = ADVERTISING_INTERVAL_MAX
     bleAdvertisingWindow = ADVERTISING_WINDOW
-    bleLocalDeviceId = randint(LOCAL_DEVICE_ID_DEFAULT_MIN, LOCAL_DEVICE_ID_DEFAULT_MAX)
+    bleLocalDeviceId = LOCAL_DEVICE_ID_DEFAULT_MIN + secrets.randbelow(LOCAL_DEVICE_ID_DEFAULT_MAX - LOCAL_DEVICE_ID_DEFAULT_MIN + 1)
 
     fileNeedsUpdate = False
 
@@ -2637,10 +2950,9 @@ def GetTimeoutValue(time):
 
 def IsCombinedNotification(device):
 ##    print "device.swVersion: {0}".format(device.swVersion)
-    try:
-        swVersionValue = float(device.swVersion)
-        isCombined = (swVersionValue >= 0.076)
-    except:
+    if(device and (device.swVersionValue is not None)):
+        isCombined = (device.swVersionValue >= 0.076)
+    else:
         isCombined = True
 ##    print "allIisCombinednOne: {0}".format(isCombined)
     return isCombined
@@ -2982,56 +3294,71 @@ def HasCharacteristic(device, uuid):
             return True
     return False
 
+# Gets the AttributeIndex of the attribute list in use for the given device.
+#   The index is rebuilt when the list is replaced or attributes are added
+def GetAttributeIndex(device):
+    if(device.bootloaderMode):
+        thisList = device.blAttributeList
+    else:
+        thisList = device.attributeList
+    index = device.attributeIndex
+    if(index == None) or (index.attributeList is not thisList) or (index.length != len(thisList)):
+        index = AttributeIndex(thisList)
+        device.attributeIndex = index
+    return index
+
+# Gets the attributes of the given device with the given characteristic UUID
+def GetAttributesWithUuid(device, uuid):
+    return GetAttributeIndex(device).byUuid.get(uuid, ())
+
+# Gets the attributes of the given device with the given characteristic handle
+def GetAttributesWithHandle(device, handle):
+    index = GetAttributeIndex(device)
+    if(index.byHandle == None):
+        index.byHandle = {}
+        for attr in index.attributeList:
+            if(attr.handle != None):
+                index.byHandle.setdefault(attr.handle, []).append(attr)
+    return index.byHandle.get(handle, ())
+
+# Must be called after changing the handle of any of the device's attributes
+def ClearAttributeHandleIndex(device):
+    if(device.attributeIndex):
+        device.attributeIndex.byHandle = None
+
 # Sets the stored attribute value of the given device with the given characteristic UUID
 def SetDeviceAttributeValue(device, uuid, value, isCCC = False):
     if(device):
-        if(device.bootloaderMode):
-            thisList = device.blAttributeList
-        else:
-            thisList = device.attributeList
-        for attr in thisList:
-            if(attr.uuid == uuid):
-                if(isCCC):
-                    attr.cccValue = value
-                else:
-                    attr.value = value
-                break
+        attrs = GetAttributesWithUuid(device, uuid)
+        if(attrs):
+            if(isCCC):
+                attrs[0].cccValue = value
+            else:
+                attrs[0].value = value
 
 # Gets the stored attribute value of the given device with the given characteristic UUID
 def GetDeviceAttributeValue(device, uuid, isCCC = False):
     if(device):
-        if(device.bootloaderMode):
-            thisList = device.blAttributeList
-        else:
-            thisList = device.attributeList
-        for attr in thisList:
-            if(attr.uuid == uuid):
-                if(isCCC):
-                    return attr.cccValue
-                else:
-                    return attr.value
+        attrs = GetAttributesWithUuid(device, uuid)
+        if(attrs):
+            if(isCCC):
+                return attrs[0].cccValue
+            else:
+                return attrs[0].value
     return None
 
 # Gets the stored characterisitc handle of the given device with the given characteristic UUID
 def GetHandle(device, uuid):
     if(device):
-        if(device.bootloaderMode):
-            thisList = device.blAttributeList
-        else:
-            thisList = device.attributeList
-        for attr in thisList:
-            if(attr.uuid == uuid):
-                return attr.handle
+        attrs = GetAttributesWithUuid(device, uuid)
+        if(attrs):
+            return attrs[0].handle
     return None
 # Gets the stored client characterisitc configuration handle of the given device with the given characteristic UUID
 def GetCCCHandle(device, uuid):
     if(device):
-        if(device.bootloaderMode):
-            thisList = device.blAttributeList
-        else:
-            thisList = device.attributeList
-        for attr in thisList:
-            if(attr.uuid == uuid) and (attr.cccHandle):
+        for attr in GetAttributesWithUuid(device, uuid):
+            if(attr.cccHandle):
                 return attr.cccHandle
     return None
 
@@ -3047,8 +3374,9 @@ def my_ble_evt_attclient_group_found(sender, args):
                 thisServiceList = device.blServiceList
             else:
                 thisServiceList = device.serviceList
+            uuid = GetUuidFromWire(args['uuid'])
             for service in thisServiceList:
-                if service.uuid == list(reversed(args['uuid'])):
+                if service.uuid == uuid:
                     logHandler.printLog("Found attribute group for service {0}: start={1}, end={2}".format(service.uuid, args['start'], args['end']), True  )
                     service.att_handle_start = args['start']
                     service.att_handle_end = args['end']
@@ -3067,45 +3395,65 @@ def GetAttributeInfoFromFile(device):
     else:
         fileName = sensorUuidHandleMapFileName
 
+    for swVersion, attrInfoByUuid in GetAttributeInfoFileLines(fileName):
+        if(swVersion == device.swVersion):
+##            logHandler.printLog ("Found matching version in file!")
+
+            missingInfo = False
+
+            for attr in thisList:
+
+                matchFound = False
+                attrInfo = attrInfoByUuid.get(attr.uuid)
+                if(attrInfo):
+##                    logHandler.printLog ("Found AttrInfo match!")
+
+                    handleText = attrInfo[1]
+
+                    if(handleText != "None"):
+                        attr.handle = int(handleText)
+                        matchFound = True
+                    if(len(attrInfo) > 2):
+                        try:
+                            attr.cccHandle = int(attrInfo[2])
+                        except ValueError:
+                            pass
+##                            logHandler.printLog ("Invalid ccdHandle file value Error")
+                if(matchFound == False):
+                    logHandler.printLog ("missingInfo for attr.uuid: {0}".format(attr.uuid), True)
+                    missingInfo = True
+            if(missingInfo == False):
+                break
+    ClearAttributeHandleIndex(device)
+    return missingInfo
+
+# Parsed UUID->Handle map files, by file name. Each entry holds the modification
+#   time of the file and a (swVersion, attrInfoByUuid) tuple per line, where
+#   attrInfoByUuid has the ':' separated fields of the first entry for each UUID
+attributeInfoFileCache = {}
+
+# Returns the parsed lines of a UUID->Handle map file. The file is only parsed
+#   again when it has been modified, so devices with the same version share it
+def GetAttributeInfoFileLines(fileName):
+    modifiedTime = os.path.getmtime(fileName)
+    cachedFile = attributeInfoFileCache.get(fileName)
+    if(cachedFile and (cachedFile[0] == modifiedTime)):
+        return cachedFile[1]
+
+    fileLines = []
     with open(fileName, 'r') as f:
-        lines = f.readlines()
-        for line in lines:
+        for line in f.readlines():
             deviceInfo = line.split(',')
             if(len(deviceInfo) > 1):
-                if(deviceInfo[0] == device.swVersion):
-##                    logHandler.printLog ("Found matching version in file!")
-
-                    missingInfo = False
-
-                    for attr in thisList:
-
-                        matchFound = False
-                        for attrString in deviceInfo[1:]:
-                            attrInfo = attrString.split(':')
-                            if(len(attrInfo) > 1):
-                                uuidList = [int(attrInfo[0][i:i+2],16) for i in range(0,len(attrInfo[0]), 2)]
-##                                logHandler.printLog ("AttrInfo uuidList: {0}".format(uuidList))
-                                if(attr.uuid == uuidList):
-##                                    logHandler.printLog ("Found AttrInfo match!")
-
-                                    handleText = attrInfo[1]
-
-                                    if(handleText != "None"):
-                                        attr.handle = int(handleText)
-                                        matchFound = True
-                                    if(len(attrInfo) > 2):
-                                        try:
-                                            attr.cccHandle = int(attrInfo[2])
-                                        except ValueError:
-                                            pass
-##                                            logHandler.printLog ("Invalid ccdHandle file value Error")
-                                    break
-                        if(matchFound == False):
-                            logHandler.printLog ("missingInfo for attr.uuid: {0}".format(attr.uuid), True)
-                            missingInfo = True
-                    if(missingInfo == False):
-                        break
-    return missingInfo
+                attrInfoByUuid = {}
+                for attrString in deviceInfo[1:]:
+                    attrInfo = attrString.split(':')
+                    if(len(attrInfo) > 1):
+                        attrInfoByUuid.setdefault(bytes.fromhex(attrInfo[0]), attrInfo)
+                fileLines.append((deviceInfo[0], attrInfoByUuid))
+
+    attributeInfoFileCache[fileName] = (modifiedTime, fileLines)
+    return fileLines
 
 # Updates the UUID->Handle mapping of each characteristic for the given device
 def UpdateAttributeInfoFile(device):
@@ -3130,7 +3478,7 @@ def UpdateAttributeInfoFile(device):
     hasNullHandle = False
 
     for attr in thisList:
-        newLine += ",{0}:{1}:{2}".format("{0}".format(str(bytearray(attr.uuid)).encode('hex').upper()), attr.handle, attr.cccHandle)
+        newLine += ",{0}:{1}:{2}".format(attr.uuid.hex().upper(), attr.handle, attr.cccHandle)
         if(attr.handle == None):
             logHandler.printLog ("attr.handle for uuid {0} is None".format(attr.uuid), True)
             hasNullHandle = True
@@ -3151,6 +3499,7 @@ def UpdateAttributeInfoFile(device):
                     f.write(line)
 
         logHandler.RenameSafely(fileNameTemp, fileName)
+        attributeInfoFileCache.pop(fileName, None)
 
 
 def GetNetworkInfoFromFile():
@@ -3190,7 +3539,15 @@ def GetNetworkInfoFromFile():
 def UpdateNetworkConfigFile():
     with open(bleNetworkConfigFileName, 'w') as f:
         for netConfig in networkConfigs:
-            f.write("{0},{1},{2},{3}\n".format(str(bytearray(netConfig.id)).encode('hex'), str(bytearray(netConfig.key)).encode('hex'), str(bytearray(netConfig.headerKey)).encode('hex'), netConfig.txSqn))
+            netConfig.savedSqn = min(netConfig.txSqn + XBX_SEQUENCE_ID_RESERVE, XBX_SEQUENCE_ID_MAX_VALUE - 1)
+            f.write("{0},{1},{2},{3}\n".format(bytearray(netConfig.id).hex(), bytearray(netConfig.key).hex(), bytearray(netConfig.headerKey).hex(), netConfig.savedSqn))
+
+# Called after each packet is sent. The file is only rewritten once the TX
+#   sequence number has used up the block reserved by the last write
+def SaveTxSequenceNumber():
+    txNetwork = networkConfigs[selectedTxNetworkIndex]
+    if(txNetwork.txSqn >= txNetwork.savedSqn):
+        UpdateNetworkConfigFile()
 
 
 def ProcessSwVersion(device, swVersion):
@@ -3216,12 +3573,14 @@ def my_ble_evt_attclient_find_information_found(sender, args):
         else:
             thisList = device.attributeList
 
+        uuid = GetUuidFromWire(args['uuid'])
         for attr in thisList:
-            if args['uuid'] == list(reversed(attr.uuid)):
+            if uuid == attr.uuid:
                 logHandler.printLog("Found matching uuid {0} with handle {1}".format(args['uuid'], args['chrhandle']))
                 attr.handle = args['chrhandle']
+                ClearAttributeHandleIndex(device)
                 break
-            elif args['uuid'] == list(reversed(uuid_client_characteristic_configuration)) and (attr.handle) and (args['chrhandle'] == attr.handle + 1):
+            elif uuid == uuid_client_characteristic_configuration and (attr.handle) and (args['chrhandle'] == attr.handle + 1):
                 logHandler.printLog("Found CCC with handle {1}".format(args['uuid'], args['chrhandle']))
                 attr.cccHandle = args['chrhandle']
 
@@ -3316,8 +3675,7 @@ def my_ble_evt_attclient_procedure_completed(sender, args):
                                 device.serviceList = [ServiceInfo(uuid_dis_service)]
 
                             if(len(device.attributeList) > 6):
-                                device.attributeList = [  AttributeInfo(uuid_dis_mfg_name_characteristic), AttributeInfo(uuid_dis_model_number_characteristic), AttributeInfo(uuid_dis_serial_number_characteristic),
-                                                            AttributeInfo(uuid_dis_hardware_rev_characteristic), AttributeInfo(uuid_dis_firmware_rev_characteristic), AttributeInfo(uuid_dis_software_rev_characteristic)]
+                                device.attributeList = [AttributeInfo(uuid) for uuid in DIS_ATTRIBUTE_UUIDS]
 
                     elif(device.deviceType == DEVICE_TYPE_XSENSOR):
 
@@ -3365,7 +3723,7 @@ def my_ble_evt_attclient_procedure_completed(sender, args):
                                 service.attributesDiscovered = SERVICE_ATTRIBUTES_NONE
 
                         device.connectionState = STATE_FINDING_SERVICES
-                        ble.send_command(ser, ble.ble_cmd_attclient_read_by_group_type(args['connection'], 0x0001, 0xFFFF, list(reversed(uuid_service))))
+                        ble.send_command(ser, ble.ble_cmd_attclient_read_by_group_type(args['connection'], 0x0001, 0xFFFF, uuid_service[::-1]))
 ##                        device.connectionState = STATE_FINDING_ATTRIBUTES
 ##                        ble.send_command(ser, ble.ble_cmd_attclient_find_information(device.connection_handle, 14, 0xFFFF))
                         SetBusyFlag()
@@ -3496,28 +3854,22 @@ def my_ble_evt_attclient_attribute_value(sender, args):
         else:
             isInList = False
 
-            if(device.bootloaderMode):
-                thisList = device.blAttributeList
-            else:
-                thisList = device.attributeList
-            for attr in thisList:
+            for attr in GetAttributesWithHandle(device, args['atthandle']):
+                logHandler.printLog("{0}: Value received: {1} for attribute in list".format(time.time(), args))
 
-                if(args['atthandle'] == attr.handle):
-                    logHandler.printLog("{0}: Value received: {1} for attribute in list".format(time.time(), args))
-
-                    isInList = True
-                    if(args['type'] in [1, 2]):
-                        if(attr.cccValue == None):
-                            attr.cccValue = args['value']
-                        else:
-                            logHandler.printLog("{0} Appending {1} to {2}".format(time.time(), args['value'], attr.cccValue), True)
-                            attr.cccValue += args['value']
+                isInList = True
+                if(args['type'] in [1, 2]):
+                    if(attr.cccValue == None):
+                        attr.cccValue = args['value']
                     else:
-                        if(attr.value == None):
-                            attr.value = args['value']
-                        else:
-                            logHandler.printLog("{0} Appending {1} to {2}".format(time.time(), args['value'], attr.value), True)
-                            attr.value += args['value']
+                        logHandler.printLog("{0} Appending {1} to {2}".format(time.time(), args['value'], attr.cccValue), True)
+                        attr.cccValue += args['value']
+                else:
+                    if(attr.value == None):
+                        attr.value = args['value']
+                    else:
+                        logHandler.printLog("{0} Appending {1} to {2}".format(time.time(), args['value'], attr.value), True)
+                        attr.value += args['value']
 
             if(isInList == False):
                 logHandler.printLog("{0}: Value received: {1} for attribute not in list".format(time.time(), args))
@@ -3644,7 +3996,7 @@ def TestPort(portTest):
                 logHandler.printLog("No serial port at /dev/ttyACM{0}".format(portTest))
     else:
 
-        ble.bgapi_rx_buffer = []
+        ble.bgapi_rx_length = 0
         ble.bgapi_rx_expected_length = 0
         ble.send_command(ser, ble.ble_cmd_system_hello())
         start_time = time.time()
@@ -3684,7 +4036,7 @@ def TestPort(portTest):
 # Sends the commands for initializing the BlueGiga module
 def SendInitSequence():
     global pending_write
-    global peripheral_list
+    global peripheral_list, devicesByAddress, devicesByConnectionHandle
 
     global scanningEnabled
 
@@ -3695,6 +4047,8 @@ def SendInitSequence():
         TestConnection()
 
         peripheral_list = []
+        devicesByAddress = {}
+        devicesByConnectionHandle = {}
 
         # stop advertising if we are advertising already
         ble.send_command(ser, ble.ble_cmd_gap_set_mode(0, 0))
@@ -3766,24 +4120,23 @@ def IsPeripherialBusy():
 # Section: Value Conversion
 # ######################################
 def ConvertListToInt(thisList, isLittleEndian = True):
-    total = 0
-    multiplier = 1
-    if(isLittleEndian == False):
-        thisList = list(reversed(thisList))
-    for value in thisList:
-        total += value * multiplier
-        multiplier *= 256
-    return total
+    return int.from_bytes(BytesToString(thisList), 'little' if isLittleEndian else 'big')
 
 def ConvertIntToList(value, length, isLittleEndian = True):
+    try:
+        return list(int(value).to_bytes(length, 'little' if isLittleEndian else 'big'))
+    except OverflowError:
+        # Negative or too large for length bytes. Keep the old digit-by-digit result
+        pass
+
     outList = []
     divisor = 256 ** (length - 1)
 
     while(length > 0):
-        valueItem = int(value / divisor)
+        valueItem = int(value // divisor)
         outList.append(valueItem)
         value -= valueItem * divisor
-        divisor /= 256
+        divisor //= 256
         length -= 1
 
     if(isLittleEndian):
@@ -3917,26 +4270,26 @@ fadeMap = [0, 100, 200, 300, 400, 500, 600, 700, 800, 900,
 1200000, 1350000, 1500000, 1650000, 1800000, 2100000, 2400000, 2700000, 3000000, 3300000,
 3600000, 4200000, 4800000, 5400000, 6000000, 6600000, 7200000, 8100000, 9000000, 9900000,
 10800000, 12600000, 14400000]
-def TableIndexLookup(table, value):
-    pos = bisect_left(table, value)
-    if pos == 0:
-        return 0
-    if pos == len(table):
-        return len(table) - 1
-    before = table[pos - 1]
-    after = table[pos]
-    if after - value < value - before:
-       return pos
-    else:
-       return pos - 1
+
+# Midpoints between neighbouring entries of a sorted table. The number of
+# midpoints below a value is the index of the nearest entry (ties go to the
+# lower entry)
+def GetTableMidpoints(table):
+    return [(table[i] + table[i + 1]) / 2.0 for i in range(len(table) - 1)]
+
+def TableIndexLookup(midpoints, value):
+    return bisect_left(midpoints, value)
 
 overrideMap = [0, 10, 20, 30, 60, 120, 300, 600]
 
+fadeMapMidpoints = GetTableMidpoints(fadeMap)
+overrideMapMidpoints = GetTableMidpoints(overrideMap)
+
 def BroadcastLightControl(destination, intensityInteger, fadeTimeInteger, values):
 
-    txPacket = ConvertIntToList(intensityInteger, 2)
     if(len(destination) == 4):
 
+        txPacket = ConvertIntToList(intensityInteger, 2)
         txPacket += ConvertIntToList(fadeTimeInteger, 2)
         txPacket.append(int(values['response_time'] / 10))
         txPacket.append(int(values['override_time'] / 10))
@@ -3947,7 +4300,7 @@ def BroadcastLightControl(destination, intensityInteger, fadeTimeInteger, values
 
         BroadcastCommand(BLEX_SENSOR_PACKET, [0, BLEX_SENSOR_LIGHT_CONTROL] + destination + txPacket + [0, 0, 0])
     else:
-        newFadeIndex = TableIndexLookup(fadeMap, fadeTimeInteger)
+        newFadeIndex = TableIndexLookup(fadeMapMidpoints, fadeTimeInteger)
 
 ##        print "newFadeIndex {0} for fade time {1}".format(newFadeIndex, fadeTimeInteger)
 ##        txPacket.append(min(255, int(round(fadeTimeInteger / 100))))
@@ -3958,15 +4311,13 @@ def BroadcastLightControl(destination, intensityInteger, fadeTimeInteger, values
         except:
             pass
 
-        txPacket.append(newFadeIndex)
-
         txResponseTime = min(7, int(round(values['response_time'] / 50)))
-        txOverrideTime = min(7, TableIndexLookup(overrideMap, values['override_time']))
+        txOverrideTime = min(7, TableIndexLookup(overrideMapMidpoints, values['override_time']))
         if(values['lock_light_control']):
             txLockout = 1
         else:
             txLockout = 0
-        txPacket.append((txLockout << 7) + (txOverrideTime << 3) + txResponseTime)
+        txPacket = list(XB_LIGHT_CONTROL_PAYLOAD.pack(intensityInteger, newFadeIndex, (txLockout << 7) + (txOverrideTime << 3) + txResponseTime))
 ##        print "txOverrideTime: {0}".format(txOverrideTime)
 ##        print "LightLevel: {0}".format(txPacket)
 
@@ -4012,7 +4363,7 @@ def BroadcastRecallScene(destination, values):
             txPacket.append(0xFF)
         else:
 
-            newFadeIndex = TableIndexLookup(fadeMap, values['fade_time'])
+            newFadeIndex = TableIndexLookup(fadeMapMidpoints, values['fade_time'])
 
             try:
                 if(values['use_fade_rate']):
@@ -4188,23 +4539,22 @@ Returned values are:
     'lastBootloaderUpdate': Most recent time that a bootloader mode packet was received
 """
 def GetScannedData(address):
-    for device in peripheral_list:
-        if(device.address == address):
-            if(device.deviceType == DEVICE_TYPE_XIM):
-                return {'lastScanTime':device.lastScanTime, 'lastRealTimeUpdate':device.xb1UpdateTime, 'lastHistoryUpdate':device.xb2UpdateTime, 'lastDeviceInfoUpdate': device.deviceInfoUpdateTime,
-                        'deviceId':device.scannedDeviceId,  'deviceName': device.deviceName, 'productId': device.scannedProductId,
-                        'intensity':device.scannedIntensity, 'power':device.scannedPower, 'status':device.scannedStatus,
-                        'coreTemperature': device.scannedLedTemperature, 'pcbTemperature': device.scannedPcbTemperature, 'vin': device.scannedVin, 'vinRipple': device.scannedVinRipple,
-                        'hours':device.scannedHours, 'rssi':device.scannedRssi,
-                        'lockoutTimeRemaining': device.scannedLockoutTimeRemaining,
-                        'powerCycles': device.scannedPowerCycles , 'ledCycles': device.scannedLedCycles,
-                        'daliStatus': device.daliStatus,
-                        'bootloaderMode': device.bootloaderMode, 'lastBootloaderUpdate': device.bootloaderModeUpdateTime,
-                        'encryptedAdv': device.encryptedAdv,
-                        'swVersion': device.swVersion, 'hwVersion': device.hwVersion, 'fwVersion': device.ledControllerVersion,
-                        'programmedFlux': device.programmedFlux,
-                        'overloadTemperature': device.overloadTemperature
-                        }
+    device = GetDeviceWithAddress(address)
+    if(device and (device.deviceType == DEVICE_TYPE_XIM)):
+        return {'lastScanTime':device.lastScanTime, 'lastRealTimeUpdate':device.xb1UpdateTime, 'lastHistoryUpdate':device.xb2UpdateTime, 'lastDeviceInfoUpdate': device.deviceInfoUpdateTime,
+                'deviceId':device.scannedDeviceId,  'deviceName': device.deviceName, 'productId': device.scannedProductId,
+                'intensity':device.scannedIntensity, 'power':device.scannedPower, 'status':device.scannedStatus,
+                'coreTemperature': device.scannedLedTemperature, 'pcbTemperature': device.scannedPcbTemperature, 'vin': device.scannedVin, 'vinRipple': device.scannedVinRipple,
+                'hours':device.scannedHours, 'rssi':device.scannedRssi,
+                'lockoutTimeRemaining': device.scannedLockoutTimeRemaining,
+                'powerCycles': device.scannedPowerCycles , 'ledCycles': device.scannedLedCycles,
+                'daliStatus': device.daliStatus,
+                'bootloaderMode': device.bootloaderMode, 'lastBootloaderUpdate': device.bootloaderModeUpdateTime,
+                'encryptedAdv': device.encryptedAdv,
+                'swVersion': device.swVersion, 'hwVersion': device.hwVersion, 'fwVersion': device.ledControllerVersion,
+                'programmedFlux': device.programmedFlux,
+                'overloadTemperature': device.overloadTemperature
+                }
 
     return None
 
@@ -4231,29 +4581,28 @@ Returned values are:
     'lastBootloaderUpdate': Most recent time that a bootloader mode packet was received
 """
 def GetScannedSensorData(address):
-    for device in peripheral_list:
-        if(device.address == address):
-            if(device.deviceType == DEVICE_TYPE_XSENSOR):
-                return {'lastScanTime':device.lastScanTime, 'lastMotionUpdate':device.motionUpdateTime, 'lastLuxUpdate':device.luxUpdateTime,
-                    'lastHistoryUpdate':device.historyUpdateTime,
-                    'deviceId':device.scannedDeviceId,  'deviceName': device.deviceName, 'productId': device.scannedProductId,
-                    'status':device.scannedStatus, 'vin': device.scannedVin, 'temperature': device.scannedTemperature,
-                    'motion': device.scannedMotion, 'lux': device.scannedLux,
-##                     'pcbTemperature': device.scannedPcbTemperature, 'vinRipple': device.scannedVinRipple, 'hours':device.scannedHours,
-                    'rssi':device.scannedRssi,
-##                    'powerCycles': device.scannedPowerCycles , 'ledCycles': device.scannedLedCycles,
-                    'bootloaderMode': device.bootloaderMode, 'lastBootloaderUpdate': device.bootloaderModeUpdateTime,
-                    'encryptedAdv': device.encryptedAdv,
-                    'swVersion': device.swVersion, 'hwVersion': device.hwVersion, 'fwVersion': device.fwVersion,
-                    }
+    device = GetDeviceWithAddress(address)
+    if(device and (device.deviceType == DEVICE_TYPE_XSENSOR)):
+        return {'lastScanTime':device.lastScanTime, 'lastMotionUpdate':device.motionUpdateTime, 'lastLuxUpdate':device.luxUpdateTime,
+            'lastHistoryUpdate':device.historyUpdateTime,
+            'deviceId':device.scannedDeviceId,  'deviceName': device.deviceName, 'productId': device.scannedProductId,
+            'status':device.scannedStatus, 'vin': device.scannedVin, 'temperature': device.scannedTemperature,
+            'motion': device.scannedMotion, 'lux': device.scannedLux,
+##             'pcbTemperature': device.scannedPcbTemperature, 'vinRipple': device.scannedVinRipple, 'hours':device.scannedHours,
+            'rssi':device.scannedRssi,
+##            'powerCycles': device.scannedPowerCycles , 'ledCycles': device.scannedLedCycles,
+            'bootloaderMode': device.bootloaderMode, 'lastBootloaderUpdate': device.bootloaderModeUpdateTime,
+            'encryptedAdv': device.encryptedAdv,
+            'swVersion': device.swVersion, 'hwVersion': device.hwVersion, 'fwVersion': device.fwVersion,
+            }
 
     return None
 
 
 def GetGroupMembers(address):
-    for device in peripheral_list:
-        if(device.address == address):
-            return device.groups
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.groups
 
 """
 API Name: RequestRSSI
@@ -4301,11 +4650,9 @@ RequestRSSI must be sent at least once before calling this.
     address: 6-byte BLE address
 """
 def GetRSSI(address):
-    global peripheral_list
-
-    for device in peripheral_list:
-        if(device.address == address):
-            return device.pcRssiValue
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.pcRssiValue
     return None
 
 
@@ -5100,7 +5447,7 @@ def RequestBleScenesConfig(address, timeout):
                 intensityValue = MAX_INTENSITY
             intensity = ConvertValueToIntensity(intensityValue)
 
-            scenes.append({'sceneNumber': sceneNumber, 'intensity': intensity, 'fadeTime': fadeMap[values[i + 4]], 'delayTime': fadeMap[values[i + 5]] / 10})
+            scenes.append({'sceneNumber': sceneNumber, 'intensity': intensity, 'fadeTime': fadeMap[values[i + 4]], 'delayTime': fadeMap[values[i + 5]] // 10})
 ##            print "SI {1}: {0}".format(scenes[-1], len(scenes))
         return scenes
     else:
@@ -5122,8 +5469,8 @@ def SetBleScenesConfig(address, scenes):
 
             values += ConvertIntToList(ConvertIntensityToValue(scene['intensity']), 2)
 
-            values.append(TableIndexLookup(fadeMap, scene['fadeTime']))
-            values.append(TableIndexLookup(fadeMap, scene['delayTime'] * 10))
+            values.append(TableIndexLookup(fadeMapMidpoints, scene['fadeTime']))
+            values.append(TableIndexLookup(fadeMapMidpoints, scene['delayTime'] * 10))
 
 
         isSuccess = TransmitPacket(address, values, uuid_light_control_scenes_characteristic)
@@ -5145,7 +5492,7 @@ def RequestDaliAddressConfig(address, timeout):
         return None
 
 def SetDaliAddressConfig(address, values):
-    txPacket =[values['address'], values['groups'] & 0xFF, values['groups'] / 256]
+    txPacket =[values['address'], values['groups'] & 0xFF, values['groups'] // 256]
     isSuccess = TransmitPacket(address, txPacket, uuid_dali_address_config_characteristic)
 ##    print "SetDaliAddressConfig : {0}".format(isSuccess)
     return isSuccess
@@ -5267,7 +5614,7 @@ def SetDeviceId(address, deviceId):
         if(deviceId[0] > 0xBFFF):
             return False
         else:
-            txPacket = [1, deviceId[0] % 256, deviceId[0] / 256]
+            txPacket = [1, deviceId[0] % 256, deviceId[0] // 256]
     elif(len(deviceId) == 3):
         if(deviceId == ([255] * 3)):
             return False
@@ -5547,16 +5894,17 @@ def RequestUriBeaconURI(address, timeout):
     logHandler.printLog( "uriBytes = {0}".format(uriBytes), True)
     if(uriBytes):
         if(len(uriBytes) > 0 and uriBytes[0] < len(EDDYSTONE_URI_PREFIXES)):
-            uriString = EDDYSTONE_URI_PREFIXES[uriBytes[0]]
+            uriParts = [EDDYSTONE_URI_PREFIXES[uriBytes[0]]]
         else:
-            uriString = chr(uriBytes[0])
+            uriParts = [chr(uriBytes[0])]
 
         for uriByte in uriBytes[1:]:
             if(uriByte < len(EDDYSTONE_URI_SUFFIXES)):
-                uriString += EDDYSTONE_URI_SUFFIXES[uriByte]
+                uriParts.append(EDDYSTONE_URI_SUFFIXES[uriByte])
             else:
-                uriString += chr(uriByte)
+                uriParts.append(chr(uriByte))
 
+        uriString = "".join(uriParts)
 ##        logHandler.printLog( "uriString = {0}".format(uriString), True)
         return uriString
     return None
@@ -5579,18 +5927,13 @@ def SetUriBeaconURI(address, uriString):
                 uriByteIndex += len(prefix)
                 break
 
-        while(uriByteIndex < len(uriString)):
-            suffixFound = False
-            for i, suffix in enumerate(EDDYSTONE_URI_SUFFIXES):
-                if(uriString[uriByteIndex:uriByteIndex + len(suffix)] == suffix):
-                    logHandler.printLog("Found suffix match {0}".format(uriString), True)
-                    uriBytes.append(i)
-                    uriByteIndex += len(suffix)
-                    suffixFound = True
-                    break
-            if(suffixFound == False):
-                uriBytes.append(ord(uriString[uriByteIndex]))
-                uriByteIndex += 1
+        # Characters between the suffix matches are sent as they are
+        for match in EDDYSTONE_URI_SUFFIX_PATTERN.finditer(uriString, uriByteIndex):
+            uriBytes.extend(ord(uriChar) for uriChar in uriString[uriByteIndex:match.start()])
+            logHandler.printLog("Found suffix match {0}".format(uriString), True)
+            uriBytes.append(EDDYSTONE_URI_SUFFIX_CODES[match.group()])
+            uriByteIndex = match.end()
+        uriBytes.extend(ord(uriChar) for uriChar in uriString[uriByteIndex:])
 
         # Remove trailing spaces
         while(True):
@@ -5922,18 +6265,26 @@ API Name: GetDeviceWithAddress
 Returns the XimBleDevice object that has a matching BLE address
 """
 def GetDeviceWithAddress(address):
-    for device in peripheral_list:
-        if device.address == address:
-            return device
-    return None
+    if(address == None):
+        return None
+    return devicesByAddress.get(tuple(address))
+
+def AddDevice(device):
+    peripheral_list.append(device)
+    devicesByAddress[tuple(device.address)] = device
 
 """
 API Name: GetDeviceWithConnectionHandle
 Returns the XimBleDevice object that has a matching connection handle
 """
 def GetDeviceWithConnectionHandle(connectionHandle):
+    device = devicesByConnectionHandle.get(connectionHandle)
+    if(device and (device.connection_handle == connectionHandle)):
+        return device
+
     for device in peripheral_list:
         if(device.connection_handle == connectionHandle):
+            devicesByConnectionHandle[connectionHandle] = device
             return device
     return None
 
@@ -5944,32 +6295,33 @@ Returns the XimBleDevice objects that are within the groupId
 def GetDevicesInGroup(groupId):
     inGroupList = []
     if(len(groupId) == 1):
-        for device in peripheral_list:
-
-            if (groupId[0] == BLEX_BROADCAST_ADDRESS) or (device.scannedDeviceId == groupId):
-                inGroupList.append(device)
-            elif(groupId[0] >= BLEX_GROUP_ADDRESS_MIN) and (groupId[0] <= BLEX_GROUP_ADDRESS_MAX):
-                realGroupNumber = groupId[0] - BLEX_GROUP_ADDRESS_MIN
+        # The kind of address is worked out once, rather than for every device
+        if(groupId[0] == BLEX_BROADCAST_ADDRESS):
+            inGroupList = peripheral_list[:]
+        elif(groupId[0] >= BLEX_GROUP_ADDRESS_MIN) and (groupId[0] <= BLEX_GROUP_ADDRESS_MAX):
+            realGroupNumber = groupId[0] - BLEX_GROUP_ADDRESS_MIN
+            for device in peripheral_list:
 ##                print "Test realGroupNumber {0} for device {2} in groups {1}".format(realGroupNumber, device.groups, device.scannedDeviceId)
-                if(realGroupNumber in device.groups):
+                if(device.scannedDeviceId == groupId) or (realGroupNumber in device.groups):
 ##                    print "Found {0} for device {2} in groups {1}".format(realGroupNumber, device.groups, device.scannedDeviceId)
                     inGroupList.append(device)
+        else:
+            inGroupList = [device for device in peripheral_list if device.scannedDeviceId == groupId]
     elif(len(groupId) == 3):
-        for device in peripheral_list:
-            if(device.scannedDeviceId == groupId):
-                inGroupList.append(device)
+        inGroupList = [device for device in peripheral_list if device.scannedDeviceId == groupId]
     elif(len(groupId) == 4):
+        # 255 is a wildcard, so only the other bytes need to match
+        matchBytes = [(i, groupId[i]) for i in range(4) if groupId[i] != 255]
 
         for device in peripheral_list:
-            isValid = False
     ##        print "groupId: {0}, device.scannedDeviceId: {1}, device.address: {2}".format(groupId, device.scannedDeviceId, device.address)
-            if (device.scannedDeviceId and (len(device.scannedDeviceId) == 4)):
-                isValid = True
-                for i in range(4):
-                    if((groupId[i] != 255) and (groupId[i] != device.scannedDeviceId[i])):
-                        isValid = False
-            if(isValid):
-                inGroupList.append(device)
+            deviceId = device.scannedDeviceId
+            if (deviceId and (len(deviceId) == 4)):
+                for i, value in matchBytes:
+                    if(deviceId[i] != value):
+                        break
+                else:
+                    inGroupList.append(device)
     return inGroupList
 
 """
@@ -5998,9 +6350,9 @@ API Name: GetDeviceName
 Returns the name of the device that has a matching BLE address
 """
 def GetDeviceName(address):
-    for device in peripheral_list:
-        if(device.address == address):
-            return device.deviceName
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.deviceName
     return None
 
 
@@ -6009,9 +6361,9 @@ API Name: GetDeviceId
 Returns the logical address of the device that has a matching BLE address
 """
 def GetDeviceId(address):
-    for device in peripheral_list:
-        if(device.address == address):
-            return device.scannedDeviceId
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.scannedDeviceId
     return None
 
 
@@ -6020,9 +6372,9 @@ API Name: IsDeviceConnected
 Returns True if the device that has a matching BLE address is currently connected
 """
 def IsDeviceConnected(address):
-    for device in peripheral_list:
-        if(device and device.address == address):
-            return device.IsConnected()
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.IsConnected()
     return False
 
 """
@@ -6030,9 +6382,9 @@ API Name: IsDeviceConnecting
 Returns True if the device that has a matching BLE address is trying to be connected
 """
 def IsDeviceConnecting(address):
-    for device in peripheral_list:
-        if(device and device.address == address):
-            return device.IsConnecting()
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.IsConnecting()
     return False
 
 """
@@ -6041,9 +6393,9 @@ Returns True if the device that has a matching BLE address is trying to discover
     services and characteristics
 """
 def IsDeviceDiscovering(address):
-    for device in peripheral_list:
-        if(device and device.address == address):
-            return device.IsDiscovering()
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.IsDiscovering()
     return False
 
 """
@@ -6052,9 +6404,9 @@ Returns True if the device that has a matching BLE address is using encrypted
     advertisements
 """
 def IsDeviceEncryptedAdv(address):
-    for device in peripheral_list:
-        if(device and device.address == address):
-            return device.IsEncryptedAdv()
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.IsEncryptedAdv()
     return False
 
 """
@@ -6063,9 +6415,9 @@ Returns True if the device that has a matching BLE address is using encrypted
     header in its advertisements
 """
 def IsDeviceEncryptedHeader(address):
-    for device in peripheral_list:
-        if(device and device.address == address):
-            return device.hasEncryptedHeader
+    device = GetDeviceWithAddress(address)
+    if(device):
+        return device.hasEncryptedHeader
     return False
 
 
@@ -6099,11 +6451,13 @@ Removes the XIM device that has a matching BLE address from the device list
 """
 def RemoveDevice(bleAddress):
     global peripheral_list
-    for device in peripheral_list:
-        if(device.address == bleAddress):
-            peripheral_list.remove(device)
-            logHandler.printLog("Updated peripheral_list after removal: {0}".format(peripheral_list))
-            break
+    device = GetDeviceWithAddress(bleAddress)
+    if(device):
+        peripheral_list.remove(device)
+        devicesByAddress.pop(tuple(bleAddress), None)
+        if(devicesByConnectionHandle.get(device.connection_handle) is device):
+            del devicesByConnectionHandle[device.connection_handle]
+        logHandler.printLog("Updated peripheral_list after removal: {0}".format(peripheral_list))
 
 # ######################################
 # Section: Main System
@@ -6123,6 +6477,7 @@ def Initialize(newLogHandler = None):
     ble = bglib.BGLib()
     ble.packet_mode = False
     ble.debug = False
+    ble.rx_event = activityEvent
 
     # add handler for BGAPI timeout condition (hopefully won't happen)
     ble.on_timeout += my_timeout
@@ -6173,19 +6528,15 @@ def Initialize(newLogHandler = None):
 
 
     if(newLogHandler == None):
-        if (cfg.WINDOWS):
-            logHandler = LogHandler.LogHandler("{0}\Event_Logs".format(os.getcwd()), "eventLog.txt", True, 5)
-        if (cfg.LINUX):
-            logHandler = LogHandler.LogHandler("{0}/Event_Logs".format(os.getcwd()), "eventLog.txt", True, 5)
+        logHandler = LogHandler.LogHandler(os.path.join(workingDirectory, "Event_Logs"), "eventLog.txt", True, 5)
         logHandler.EnableCleanUp(60.0, 20000)
     else:
         logHandler = newLogHandler
+    logHandler.EnableDebug(cfg.DEBUG)
 
-    if (cfg.WINDOWS):
-        packetLogger = LogHandler.LogHandler("{0}\Packet_Logs".format(os.getcwd()), "PacketLog.csv", True, 5)
-    if (cfg.LINUX or cfg.OSX):
-        packetLogger = LogHandler.LogHandler("{0}/Packet_Logs".format(os.getcwd()), "PacketLog.csv", True, 5)
+    packetLogger = LogHandler.LogHandler(os.path.join(workingDirectory, "Packet_Logs"), "PacketLog.csv", True, 5, PACKET_LOG_BUFFER_SIZE)
     packetLogger.EnableCleanUp(60.0, 50000)
+    packetLogger.EnableFlushTimer(PACKET_LOG_FLUSH_INTERVAL)
     packetLogger.printLog("BLE Packet Log", False)
     packetLogger.printLog("Time,BLE Address,RSSI,Data,Name,Device ID,Device Type,Payload Type,Payload", False)
 
@@ -6197,8 +6548,8 @@ Starts the stack
 def Start():
     global bgCentralState, lastScanResponse
 
-    if not os.path.exists(bleDirectory):
-        os.makedirs(bleDirectory)
+    if not os.path.exists(bleDirectoryPath):
+        os.makedirs(bleDirectoryPath)
 
     if(os.path.isfile(uuidHandleMapFileName) == False):
         with open(uuidHandleMapFileName, 'w') as f:
@@ -6271,10 +6622,49 @@ def Stop():
     except:
         logHandler.printLog("Failed to stop BLE connection")
 
+"""
+API Name: WaitForActivity
+Blocks until serial data arrives, SignalActivity is called or timeout (in
+seconds) expires. Returns True if woken before the timeout
+"""
+def WaitForActivity(timeout):
+    return activityEvent.wait(timeout)
+
+"""
+API Name: SignalActivity
+Wakes up WaitForActivity, e.g. when a command has been queued
+"""
+def SignalActivity():
+    activityEvent.set()
+
 """
 API Name: Process
 Runs the stack
 """
+def CheckConnectingTimeout(device, now):
+    connectionTime = now - device.connectionAttemptTime
+
+    # Connection is taking a long time
+    if(connectionTime > CONNECT_ATTEMPT_WARNING):
+        device.longConnectionTime = connectionTime
+
+    # Connection is taking too long, so stop trying
+    if(connectionTime > CONNECT_ATTEMPT_TIMEOUT):
+        logHandler.printLog("{0}: ERROR: Long Connection time: {1}".format(now, connectionTime), True)
+        device.longConnectionTime = None
+
+        ProcessFailedConnection(device)
+
+def CheckDisconnectingTimeout(device, now):
+    if(now - device.disconnectTime > DISCONNECT_TIMEOUT):
+        device.connectionState = STATE_STANDBY
+
+# Timeout checks run by Process, by device connection state
+CONNECTION_STATE_CHECKS = {
+    STATE_CONNECTING: CheckConnectingTimeout,
+    STATE_DISCONNECTING: CheckDisconnectingTimeout,
+}
+
 def Process():
     global pending_write, bgCentralState
     global ble_write_time, lastScanResponse
@@ -6291,37 +6681,30 @@ def Process():
         Start()
 
 
-    # check for all incoming data (no timeout, non-blocking)
+    # check for all incoming data (no timeout, non-blocking). Anything that
+    #   arrives after the clear sets activityEvent again
+    activityEvent.clear()
     CheckActivity(ser)
 
+    # One timestamp for all of the timeout checks below
+    now = time.time()
+
 ##    if((pending_write) and (time.time() - ble_write_time > DISCONNECT_TIMEOUT + 0.1)):
-    if((pending_write) and (time.time() - ble_write_time > PENDING_WRITE_TIMEOUT + 0.1)):
-        logHandler.printLog("{0}: pending_write timeout {1}".format(time.time(), time.time() - ble_write_time), True)
+    if((pending_write) and (now - ble_write_time > PENDING_WRITE_TIMEOUT + 0.1)):
+        logHandler.printLog("{0}: pending_write timeout {1}".format(now, now - ble_write_time), True)
         pending_write = False
 
     isBusy = False
-    connectionProblem = False
 
     for device in peripheral_list:
-        if(device.connectionState == STATE_DISCONNECTING and time.time() - device.disconnectTime > DISCONNECT_TIMEOUT):
-            device.connectionState = STATE_STANDBY
-
-        # Connection is taking a long time
-        if(device.connectionState == STATE_CONNECTING and time.time() - device.connectionAttemptTime > CONNECT_ATTEMPT_WARNING):
-            device.longConnectionTime = time.time() - device.connectionAttemptTime
-            connectionProblem = True
-
-
-        # Connection is taking too long, so stop trying
-        if(device.connectionState == STATE_CONNECTING and time.time() - device.connectionAttemptTime > CONNECT_ATTEMPT_TIMEOUT):
-            logHandler.printLog("{0}: ERROR: Long Connection time: {1}".format(time.time(), time.time() - device.connectionAttemptTime ), True)
-            device.longConnectionTime = None
-
-            ProcessFailedConnection(device)
+        # Only the states with timeouts have a check
+        stateCheck = CONNECTION_STATE_CHECKS.get(device.connectionState)
+        if(stateCheck):
+            stateCheck(device, now)
 
         # Only print the message once after it finishes connecting
-        elif(device.connectionState != STATE_CONNECTING and device.longConnectionTime):
-            logHandler.printLog("{0}: WARNING: Long Connection time: {1}, state: {2}".format(time.time(), device.longConnectionTime, device.connectionState ), True)
+        if(device.longConnectionTime and device.connectionState != STATE_CONNECTING):
+            logHandler.printLog("{0}: WARNING: Long Connection time: {1}, state: {2}".format(now, device.longConnectionTime, device.connectionState ), True)
             device.longConnectionTime = None
 
 
@@ -6337,7 +6720,7 @@ def Process():
     if(pending_write == False):
         if(bootloadRunning):
             if(scanningEnabled == False and bgCentralState == CENTRAL_STATE_SCANNING):
-                logHandler.printLog("{0}: Disable scanning".format(time.time()), True)
+                logHandler.printLog("{0}: Disable scanning".format(now), True)
                 EndProcedure()
         else:
 
@@ -6348,14 +6731,14 @@ def Process():
 
 
             if((scanningEnabled) and (bgCentralState == CENTRAL_STATE_STANDBY)):
-                lastScanResponse = time.time()
+                lastScanResponse = now
                 Discover()
 
             elif(scanningEnabled == False and bgCentralState == CENTRAL_STATE_SCANNING):
-                logHandler.printLog("{0}: Disable scanning".format(time.time()), True)
+                logHandler.printLog("{0}: Disable scanning".format(now), True)
                 EndProcedure()
 
-            elif(bgPeriphState == PERIPH_STATE_ADVERTISING) and (time.time() - advertisingStartTime > (bleAdvertisingWindow / 1000.0)):
+            elif(bgPeriphState == PERIPH_STATE_ADVERTISING) and (now - advertisingStartTime > (bleAdvertisingWindow / 1000.0)):
 ##                print "Stopped after {0:.3f}".format(time.time() - advertisingStartTime)
                 SetAdvertisingState(False)
 
@@ -6393,36 +6776,68 @@ def SetBootloadActive(state):
     bootloadRunning = state
 
 
+# 1 byte of additional authentication data to match the Cypress method
+AES_CCM_AAD = bytes([1])
+AES_CCM_MIC_LENGTH = 4
+
+# AESCCM ciphers by key bytes, reused across packets
+ccmCipherCache = {}
+
+def GetCcmCipher(key):
+    keyBytes = BytesToString(key)
+    cipher = ccmCipherCache.get(keyBytes)
+    if cipher is None:
+        cipher = AESCCM(keyBytes, tag_length = AES_CCM_MIC_LENGTH)
+        ccmCipherCache[keyBytes] = cipher
+    return cipher
+
 def AesCcmEncrypt(key, nonce, inData):
-    cipher = AES.new(BytesToString(key), AES.MODE_CCM, BytesToString(nonce), mac_len = 4)
+    if AESCCM is not None:
+        cipher = GetCcmCipher(key)
+        outData = cipher.encrypt(BytesToString(nonce), BytesToString(inData), AES_CCM_AAD)
+        return StringToBytes(outData[:-AES_CCM_MIC_LENGTH]), StringToBytes(outData[-AES_CCM_MIC_LENGTH:])
 
-    # Add 1 byte of additional authentication data to match the Cypress method
-    cipher.update(BytesToString([1]))
-    return StringToBytes(cipher.encrypt(BytesToString(inData))), StringToBytes(cipher.digest())
+    cipher = AES.new(BytesToString(key), AES.MODE_CCM, nonce = BytesToString(nonce), mac_len = AES_CCM_MIC_LENGTH)
+    cipher.update(AES_CCM_AAD)
+    outData, mic = cipher.encrypt_and_digest(BytesToString(inData))
+    return StringToBytes(outData), StringToBytes(mic)
 
 def AesCcmDecrypt(key, nonce, inData, mac):
-    cipher = AES.new(BytesToString(key), AES.MODE_CCM, BytesToString(nonce), mac_len = 4)
-
-    # Add 1 byte of additional authentication data to match the Cypress method
-    cipher.update(BytesToString([1]))
+    if AESCCM is not None:
+        cipher = GetCcmCipher(key)
+        try:
+            outData = cipher.decrypt(BytesToString(nonce), BytesToString(inData) + BytesToString(mac), AES_CCM_AAD)
+            return StringToBytes(outData), True
+        except InvalidTag:
+            # Callers still need the plaintext when the MIC does not match
+            return AesCcmDecryptUnauthenticated(key, nonce, inData), False
+
+    cipher = AES.new(BytesToString(key), AES.MODE_CCM, nonce = BytesToString(nonce), mac_len = AES_CCM_MIC_LENGTH)
+    cipher.update(AES_CCM_AAD)
     outData = cipher.decrypt(BytesToString(inData))
     outData = StringToBytes(outData)
     try:
         cipher.verify(BytesToString(mac))
         isValid = True
-    except:
+    except ValueError:
         isValid = False
 
     return outData, isValid
 
-def BytesToString(bytes):
-    return "".join(chr(val) for val in bytes)
+# Decrypts data that has no MIC, in a single AES pass. CCM is counter mode, so
+#   encrypting the ciphertext yields the plaintext
+def AesCcmDecryptUnauthenticated(key, nonce, inData):
+    outData, unusedMic = AesCcmEncrypt(key, nonce, inData)
+    return outData
+
+def BytesToString(intList):
+    return bytes(intList)
 
-def StringToBytes(str):
-    return map(ord,list(str))
+def StringToBytes(byteString):
+    return list(bytearray(byteString))
 
 def IntListToHexString(intList):
-    return str(bytearray(intList)).encode('hex')
+    return bytearray(intList).hex()
 
 def HexStringToIntList(hexString):
     return [int(hexString[i:i+2],16) for i in range(0,len(hexString), 2)]
@@ -6435,17 +6850,14 @@ def EncryptTest():
 
     packetBytes = HexStringToIntList("10ffff00000a00")
 ##    aesNonce = [0xc5, 0x7c, 0x10, 0x00, 0x00, 0x00]
-    aesNonce[:] = header[:]
-    aesNonce += [0] * (13 - len(aesNonce))
+    aesNonce = XBX_PADDED_NONCE.pack(BytesToString(header))
     payload = packetBytes
     eMsg, eMic = AesCcmEncrypt(networkConfigs[selectedTxNetworkIndex].key, aesNonce, packetBytes)
     print ("eMsg: {0}, eMic: {1}".format(IntListToHexString(eMsg), IntListToHexString(eMic)))
 
     payloadAndMic = eMsg + eMic
-    aesNonce = eMsg + eMic
-    aesNonce = aesNonce[:13]
-    aesNonce += [0] * (13 - len(aesNonce))
-    print ("Header aesNonce: {0}, header: {1}".format(IntListToHexString(aesNonce), IntListToHexString(header)))
+    aesNonce = XBX_PADDED_NONCE.pack(BytesToString((eMsg + eMic)[:NONCE_LENGTH]))
+    print ("Header aesNonce: {0}, header: {1}".format(aesNonce.hex(), IntListToHexString(header)))
 
     header, unusedMic = AesCcmEncrypt(networkConfigs[selectedTxNetworkIndex].headerKey, aesNonce, header)
     print ("Header eMsg: {0}, eMic: {1}".format(IntListToHexString(header), IntListToHexString(unusedMic)))
@@ -6483,17 +6895,14 @@ if __name__ == '__main__':
 
     packetBytes = HexStringToIntList("21ffff08007764")
 ##    aesNonce = [0xc5, 0x7c, 0x10, 0x00, 0x00, 0x00]
-    aesNonce[:] = header[:]
-    aesNonce += [0] * (13 - len(aesNonce))
+    aesNonce = XBX_PADDED_NONCE.pack(BytesToString(header))
     payload = packetBytes
     eMsg, eMic = AesCcmEncrypt(txKey, aesNonce, packetBytes)
     print ("eMsg: {0}, eMic: {1}".format(IntListToHexString(eMsg), IntListToHexString(eMic)))
 
 
-    aesNonce = eMsg + eMic
-    aesNonce = aesNonce[:13]
-    aesNonce += [0] * (13 - len(aesNonce))
-    print ("Header aesNonce: {0}, header: {1}".format(IntListToHexString(aesNonce), IntListToHexString(header)))
+    aesNonce = XBX_PADDED_NONCE.pack(BytesToString((eMsg + eMic)[:NONCE_LENGTH]))
+    print ("Header aesNonce: {0}, header: {1}".format(aesNonce.hex(), IntListToHexString(header)))
 
     eMsg, eMic = AesCcmEncrypt(headerKey, aesNonce, header)
     print ("Header eMsg: {0}, eMic: {1}".format(IntListToHexString(eMsg), IntListToHexString(eMic)))
@@ -257,6 +257,12 @@ V1.2.5
 - Incorporates ble_xim V2.0.8 and LogHandler V2.1 updates
 
 V1.2.6l
+- Ported to Python 3
+- Queued commands wake the run loop through ble_xim.SignalActivity, and
+    WaitForActivity lets the caller sleep until there is work
+- Run reads the time once for the real-time update checks of all devices
+- When run standalone, the main loop waits on stopEvent instead of
+    time.sleep, so Ctrl-C stops the loop and closes the gateway at once
 - Port to linux (Raspberry Pi initially, then BeagleBone)
     - need to figure out options to use same code base for linux & windows,
     but for now just hard port to linux
@@ -286,6 +292,8 @@ from random import random
 
 import sys
 import traceback
+import signal
+import threading
 ##import json
 
 import LogHandler
@@ -639,7 +647,7 @@ def Demo_IsInGroup(deviceId):
 # Converts a string to a list of integers
 def Demo_GetIntListFromString(text, separator):
     try:
-        return map(int,eval("{0}".format(text.split(separator))))
+        return list(map(int,eval("{0}".format(text.split(separator)))))
     except:
         return None
 
@@ -702,7 +710,7 @@ def Add_ListId(bleAddr):
                         idList.append(testId) #didn't find a match, so append it to the list
 
                         try:
-                            testAddress = map(int, eval("{0}".format(dataInfo[XIMLIST_BLE_ADDRESS_OFFSET].split('.'))))
+                            testAddress = list(map(int, eval("{0}".format(dataInfo[XIMLIST_BLE_ADDRESS_OFFSET].split('.')))))
     ##                        logHandler.printLog ("fileAddress:{0}, address: {1}".format(testAddress, address), True)
 
                             if(testAddress == bleAddr):
@@ -760,7 +768,7 @@ def FindNewDeviceId():
             lines = lines[1:]
             for i, line in enumerate(lines):
                 info = line.split(',')
-                testId = map(int, info[XIMLIST_LOGICAL_ADDRESS_OFFSET].split('.'))
+                testId = list(map(int, info[XIMLIST_LOGICAL_ADDRESS_OFFSET].split('.')))
                 testIdList.append(testId)
                 if(testId != ble_xim.BLEX_UNASSIGNED_ADDRESS) and (testId > maxId):
                     maxId = testId
@@ -944,21 +952,21 @@ def ConvertBytesToValue(bytes):
 def SetIntensity(IdListIndex, intensity):
     global sendIntensity
 
-    # Set the intensity for all devices
-#    if(IdListIndex == DEMO_ID_ALL_DEVICES):
-#        if(len(ximList) > 0):
+    values = {"light_level": intensity, "fade_time":1000, "response_time":1, "override_time":0, "lock_light_control":True}
 
-            #allSameLevels = True
-
-#            commandQueue.append({'function':ble_xim.BroadcastLightLevel, 'deviceId':demoGroupMask, 'values':values, 'time':time.time()})
+    # Set the intensity for all devices with a single broadcast packet
+    if(IdListIndex == DEMO_ID_ALL_DEVICES):
+        if(len(ximList) > 0):
+            commandQueue.append({'function':ble_xim.BroadcastLightLevel, 'deviceId':[demoGroupMask], 'values': values, 'time':time.time()})
+            ble_xim.SignalActivity()
 
     # Set the intensity for one device
-#    else:
-    device = GetDeviceByDevIndex(IdListIndex)
-    if(device):
-#        values = {"light_level":Demo_ReverseScaleIntensity(device, intensity), "fade_time":device.demoFadeTime, "response_time":0, "override_time":0, "lock_light_control":False}
-        values = {"light_level": intensity, "fade_time":1000, "response_time":1, "override_time":0, "lock_light_control":True}
-        commandQueue.append({'function':ble_xim.BroadcastLightLevel, 'deviceId':device.deviceId, 'values': values, 'time':time.time()})
+    else:
+        device = GetDeviceByDevIndex(IdListIndex)
+        if(device):
+#            values = {"light_level":Demo_ReverseScaleIntensity(device, intensity), "fade_time":device.demoFadeTime, "response_time":0, "override_time":0, "lock_light_control":False}
+            commandQueue.append({'function':ble_xim.BroadcastLightLevel, 'deviceId':device.deviceId, 'values': values, 'time':time.time()})
+            ble_xim.SignalActivity()
 
 
 # >>> Gateway API call
@@ -971,6 +979,7 @@ def SetIndicate(IdListIndex):
     if(device):
         values = {'num_flashes':INDICATE_FLASHES, 'period':INDICATE_FLASH_INTERVAL, 'high_level':INDICATE_MAX_INTENSITY, 'low_level':INDICATE_MIN_INTENSITY}
         commandQueue.append({'function':ble_xim.BroadcastIndicate, 'deviceId':device.deviceId, 'values':values, 'time':time.time()})
+        ble_xim.SignalActivity()
 
 
 # Returns the next command in the queue (FIFO)
@@ -1114,7 +1123,7 @@ def LoadXimList():
 
                 try:
                     value = lines[5].split(':')[1]
-                    demoGroupMask = map(int, value.split('.'))
+                    demoGroupMask = list(map(int, value.split('.')))
                 except ValueError:
                     logHandler.printLog("Group mask not found in ximGatewayParameters. Setting to default", True)
                     demoGroupMask = GROUP_MASK_DEFAULT
@@ -1182,6 +1191,15 @@ def Start():
             exit(0)
 
 # Runs the gateway.
+# Sleeps until the BLE stack has serial data or a command is queued, for up to
+# timeout seconds
+def WaitForActivity(timeout):
+    return ble_xim.WaitForActivity(timeout)
+
+# Wakes up WaitForActivity
+def SignalActivity():
+    ble_xim.SignalActivity()
+
 def Run():
     global deviceIndex
     global connectionAttempted, connectionEnableSent, lastValidConnectionTime
@@ -1204,13 +1222,14 @@ def Run():
             logHandler.printLog("{0} ximGateway.Run: *** completed UpdateXimList ***".format(time.time()))
 
         # Doesn't require a connection to get the real-time data
+        now = time.time()
         for device in ximList:
-            logHandler.printLog("{0} ximGateway.Run: for device in ximList is: {1}, {2}".format(time.time(),device.IdListIndex, device.deviceId))
+            logHandler.printLog("{0} ximGateway.Run: for device in ximList is: {1}, {2}".format(now,device.IdListIndex, device.deviceId))
 #            device.updateInterval = time.time() - device.lastRealTimeUpdate
-            if(time.time() - device.lastRealTimeUpdate > REAL_TIME_UPDATE_INTERVAL):
+            if(now - device.lastRealTimeUpdate > REAL_TIME_UPDATE_INTERVAL):
 #            if(device.updateInterval > REAL_TIME_UPDATE_INTERVAL):
-                device.updateInterval = time.time() - device.lastRealTimeUpdate
-                device.lastRealTimeUpdate = time.time()
+                device.updateInterval = now - device.lastRealTimeUpdate
+                device.lastRealTimeUpdate = now
                 if (device.deviceId != None):
                     ble_xim.BroadcastRequestAdv(device.deviceId, [0x02])
                     ble_xim.BroadcastRequestAdv(device.deviceId, [0x03])
@@ -1317,13 +1336,24 @@ def Close():
     for device in ximList:
         if(ble_xim.IsDeviceConnected(device.bleAddress)):
             ble_xim.Disconnect(device.bleAddress)
+    logHandler.Flush()
+
+
 
+# Set by Ctrl-C to stop the standalone run loop
+stopEvent = threading.Event()
 
+def ctrl_c_handler(signal, frame):
+    stopEvent.set()
+    SignalActivity()
 
 if __name__ == '__main__':
 
+    signal.signal(signal.SIGINT, ctrl_c_handler)
+
     Start()   # Initialize and start the gateway
 
-    while(1): # run loop
-        time.sleep(LOOP_DELAY)
+    while not stopEvent.wait(LOOP_DELAY): # run loop
         Run()
+
+    Close()
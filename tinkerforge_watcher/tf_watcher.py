@@ -70,5 +70,5 @@ if __name__ == "__main__":
     #    previous_state = state
     #    time.sleep(0.5)
 
-    raw_input("Press key to exit\n") # Use input() in Python 3
+    input("Press key to exit\n")
     ipcon.disconnect()